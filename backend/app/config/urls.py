@@ -9,3 +9,10 @@ LEGAL_URLS = [
     # "https://example.com/regulament-local",
     # "https://primarie.ro/urbanism/pug",
 ]
+
+# Optional per-URL cache TTL in seconds (default: WEB_CACHE_DEFAULT_TTL, 6h)
+# The chatbot serves these pages from an in-memory cache that a background
+# task revalidates when the TTL expires.
+LEGAL_URL_TTLS = {
+    # "https://legislatie.just.ro/Public/DetaliiDocument/283": 24 * 3600,
+}
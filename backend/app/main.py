@@ -1,22 +1,43 @@
-from fastapi import FastAPI, UploadFile, File, HTTPException, Depends
+from fastapi import FastAPI, UploadFile, File, HTTPException, Depends, Query, BackgroundTasks
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import Response, StreamingResponse
 from pydantic import BaseModel
-from typing import Optional, List
+from typing import Optional, List, Tuple
+import asyncio
+import json
+import os
 import random
-from datetime import datetime
 
 from app.services.supabase_client import supabase
 from app.services.ai_processor import (
+    analyze_document_async,
     get_rag_answer,
+    stream_rag_answer,
     create_query_embedding,
-    validate_id_card,
-    extract_metadata,
-    extract_procedure_requirements,
-    validate_and_guide_dossier,
+    validate_id_card_async,
+    extract_metadata_async,
+    extract_procedure_requirements_async,
+    validate_and_guide_dossier_async,
 )
-from app.services.knowledge_loader import load_all_documents, search_relevant_chunks
-from app.services.document_classifier import detect_document_type
-from app.services.web_scraper import fetch_multiple_urls
+from app.services.knowledge_loader import search_relevant_chunks
+from app.services.knowledge_corpus import corpus, combine_chunk_sources
+from app.services.search_index import get_index, merge_ranked_results
+from app.services.vector_index import get_vector_index
+from app.services.document_classifier import detect_document_type_async
+from app.services import llm_client
+from app.services.web_cache import web_cache
+from app.services.single_flight import llm_flight
+from app.services.requirements_store import requirements_store
+from app.services.upload_reader import read_upload, read_uploads
+from app.services.storage_writer import STORAGE_UPLOAD_IN_BACKGROUND, storage_writer
+from app.services.answer_cache import answer_cache, context_key as answer_context_key, is_first_turn
+from app.services.conversation_state import (
+    CONVERSATION_HISTORY_LIMIT,
+    ConversationState,
+    conversation_store,
+)
+from app.services.web_scraper import close_async_client as close_scraper_client
 from app.services.urban_info_helper import (
     detect_urban_info_request,
     get_urban_info_instructions,
@@ -37,10 +58,10 @@ from app.services.city_hall_domains import (
     CITY_HALL_DOMAINS,
     EXTENDED_PROCEDURES,
 )
-from app.config.urls import LEGAL_URLS
 
 # 🔹 NOU – pentru prioritizare cereri
-from app.services.prioritization import Application, prioritize_applications
+from app.services.prioritization import application_from_row, join_with_rows, prioritize_applications
+from app.services.priority_queue import ACTIVE_STATUSES, PRIORITY_COLUMNS, priority_queue
 
 # 🔹 NOU – pentru autentificare Clerk pe endpoint
 from app.middleware.clerk_auth import get_current_user
@@ -58,6 +79,48 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+
+@app.on_event("startup")
+def load_knowledge_corpus():
+    """Load the knowledge base once, so /chatbot only reads it from memory."""
+    corpus.load()
+    get_index(corpus.get_chunks())  # construim indexul BM25 înainte de primul request
+    print(f"Knowledge corpus loaded: {corpus.stats()}")
+
+
+@app.on_event("startup")
+def load_priority_queue():
+    """Build the clerk priority queue from the active requests."""
+    try:
+        _sync_priority_queue()
+        print(f"Priority queue loaded: {priority_queue.stats()['active']} active requests")
+    except Exception as e:
+        print(f"Warning: Could not load priority queue: {e}")
+
+
+def _all_chunks() -> Tuple[str, ...]:
+    """Knowledge corpus + cached web pages (same tuple while nothing changed)."""
+    return combine_chunk_sources(corpus.get_chunks(), web_cache.get_chunks())
+
+
+@app.on_event("startup")
+async def start_web_cache_refresher():
+    """Fetch LEGAL_URLS in the background; /chatbot only reads the cache."""
+    if web_cache.urls:
+        # Indexul BM25 e reconstruit de refresher când se schimbă conținutul
+        app.state.web_cache_task = asyncio.create_task(
+            web_cache.run_refresher(on_change=lambda: get_index(_all_chunks()))
+        )
+
+
+@app.on_event("shutdown")
+async def stop_web_cache_refresher():
+    task = getattr(app.state, "web_cache_task", None)
+    if task:
+        task.cancel()
+    await close_scraper_client()
+    await llm_client.close_async_client()
+
 # ============================================
 # Pydantic Models
 # ============================================
@@ -97,6 +160,8 @@ class UploadResponse(BaseModel):
     missing_documents: Optional[List[str]] = None
     summary: Optional[str] = None
     procedure: Optional[str] = None
+    storage_job_id: Optional[str] = None  # GET /upload/storage/{job_id}
+    storage_status: Optional[str] = None
 
 class ChatResponse(BaseModel):
     answer: str
@@ -114,8 +179,332 @@ class ChatResponse(BaseModel):
 def read_root():
     return {"message": "ADU 🎉"}
 
+def _retrieve_context_chunks(
+    question: str, all_chunks, max_results: int = 3
+) -> Tuple[List[str], Optional[List[float]]]:
+    """
+    Keyword (BM25) retrieval, merged with local vector search when an
+    embedding index was built with build_embeddings.py.
+
+    Returns:
+        (context_chunks, query_embedding) – the embedding is None when no
+        vector index exists or the embedding call failed
+    """
+    keyword_chunks = search_relevant_chunks(question, all_chunks, max_results=max_results)
+
+    vector_index = get_vector_index()
+    if vector_index is None or len(vector_index) == 0:
+        return keyword_chunks, None
+
+    try:
+        query_embedding = create_query_embedding(question)
+        hits = vector_index.search(query_embedding, max_results=max_results)
+        semantic_chunks = corpus.texts_for_ids(chunk_id for _, chunk_id in hits)
+    except Exception as vec_err:
+        print(f"Warning: Vector search failed, using keyword results only: {vec_err}")
+        return keyword_chunks, None
+
+    return merge_ranked_results(semantic_chunks, keyword_chunks, max_results=max_results), query_embedding
+
+
+def _lookup_cached_rag_answer(
+    question: str,
+    query_embedding: Optional[List[float]],
+    context_chunks: List[str],
+    conversation_context: dict,
+    conversation_history: List[dict],
+) -> Tuple[Optional[dict], Optional[Tuple[List[float], str]]]:
+    """
+    Semantic answer cache lookup, for the first turn of a conversation only
+    (later turns are keyed by their own history and practically never hit).
+
+    Reuses the query embedding computed for vector retrieval; without a
+    vector index the cache is skipped rather than paying an extra embedding
+    round trip before the LLM call.
+
+    Returns:
+        (cached_answer, cache_slot) – cached_answer is None on a miss;
+        cache_slot is passed to _store_rag_answer once a fresh answer is
+        generated (None when the cache is skipped)
+    """
+    if query_embedding is None or not is_first_turn(conversation_history):
+        return None, None
+
+    key = answer_context_key(context_chunks, conversation_context, conversation_history)
+    return answer_cache.get(query_embedding, key, corpus.version), (query_embedding, key)
+
+
+def _store_rag_answer(cache_slot: Optional[Tuple[List[float], str]], ai_response: dict) -> None:
+    if cache_slot is not None:
+        query_embedding, key = cache_slot
+        answer_cache.put(query_embedding, key, ai_response, corpus.version)
+
+
+def _get_cached_rag_answer(
+    question: str,
+    query_embedding: Optional[List[float]],
+    context_chunks: List[str],
+    conversation_context: dict,
+    conversation_history: List[dict],
+) -> dict:
+    """
+    get_rag_answer behind the semantic answer cache: a similar question
+    asked with the same retrieved chunks and context is answered without
+    an LLM call.
+    """
+    cached, cache_slot = _lookup_cached_rag_answer(
+        question, query_embedding, context_chunks, conversation_context, conversation_history
+    )
+    if cached is not None:
+        return cached
+
+    ai_response = get_rag_answer(question, context_chunks, conversation_context, conversation_history)
+    _store_rag_answer(cache_slot, ai_response)
+    return ai_response
+
+
+def _chat_message_rows(
+    user_id: str, messages: List[Tuple[str, str]], metadata: Optional[dict] = None
+) -> List[dict]:
+    """
+    chat_messages rows for one turn, in order. Timestamps and ordering come
+    from the database: created_at defaults to now() and the identity column
+    seq follows the insert order (database/13_chat_messages_seq.sql).
+    metadata (detected domain, procedure) goes on the last message.
+    """
+    rows = [
+        {"user_id": user_id, "role": role, "content": content}
+        for role, content in messages
+    ]
+    if metadata and rows:
+        rows[-1]["metadata"] = metadata
+    return rows
+
+
+def _save_chat_messages(rows: List[dict]) -> None:
+    """Insert a chat turn with a single multi-row insert (runs as a background task)."""
+    try:
+        supabase.table("chat_messages").insert(rows).execute()
+    except Exception as save_err:
+        print(f"Warning: Could not save chat messages: {save_err}")
+
+
+def _fetch_recent_chat_rows(user_id: str) -> List[dict]:
+    """Last CONVERSATION_HISTORY_LIMIT chat_messages of a user, oldest first."""
+    try:
+        res = (
+            supabase.table("chat_messages")
+            .select("role, content, metadata, created_at")
+            .eq("user_id", user_id)
+            .order("seq", desc=True)
+            .limit(CONVERSATION_HISTORY_LIMIT)
+            .execute()
+        )
+        return list(reversed(res.data or []))
+    except Exception as hist_err:
+        print(f"Warning: Could not load chat history: {hist_err}")
+        return []
+
+
+def _record_chat_turn(
+    background_tasks: BackgroundTasks,
+    user_id: str,
+    messages: List[Tuple[str, str]],
+    detected_domain: Optional[str] = None,
+    procedure: Optional[str] = None,
+) -> None:
+    """
+    Write-through: update the cached conversation state now (rebuilt from
+    the DB first if the user isn't cached), insert the rows after the
+    response is sent.
+    """
+    conversation_store.record_turn(
+        user_id,
+        [{"role": role, "content": content} for role, content in messages],
+        lambda: _fetch_recent_chat_rows(user_id),
+        detected_domain=detected_domain,
+        procedure=procedure,
+    )
+    metadata = {k: v for k, v in (("detected_domain", detected_domain), ("procedure", procedure)) if v}
+    background_tasks.add_task(_save_chat_messages, _chat_message_rows(user_id, messages, metadata))
+
+
+def _urban_info_chat_response(request: ChatRequest, background_tasks: BackgroundTasks) -> Optional[ChatResponse]:
+    """Answer for urban information extract requests (no LLM call), or None."""
+    if not detect_urban_info_request(request.question):
+        return None
+
+    # Extract cadastral code from question if provided (priority)
+    cadastral_code = extract_cadastral_code_from_text(request.question)
+    
+    # If no cadastral code, try to extract address
+    address = None
+    if not cadastral_code:
+        address = extract_address_from_text(request.question)
+    
+    # Get instructions for downloading urban info
+    instructions = get_urban_info_instructions(cadastral_code, address)
+    
+    # If user is asking for troubleshooting
+    if any(word in request.question.lower() for word in ["problem", "eroare", "nu merge", "nu functioneaza", "nu gasesc"]):
+        instructions["message"] += f"\n\n{get_troubleshooting_tips()}"
+    
+    # Save conversation to history (after the response is sent)
+    if request.user_id:
+        _record_chat_turn(
+            background_tasks,
+            request.user_id,
+            [("user", request.question), ("assistant", instructions["message"])],
+            detected_domain="urbanism",
+        )
+    
+    return ChatResponse(
+        answer=instructions["message"],
+        detected_procedure="informare_urbanism",
+        detected_domain="urbanism",
+        needs_documents=False,
+        suggested_action="download_urban_info" if not instructions["needs_cadastral_code"] else "provide_cadastral_code",
+        available_procedures=[]
+    )
+
+
+def _prepare_rag_inputs(request: ChatRequest) -> Tuple[List[str], Optional[List[float]], dict, List[dict]]:
+    """
+    Everything get_rag_answer needs for a chatbot question.
+
+    Returns:
+        (context_chunks, query_embedding, conversation_context, conversation_history)
+    """
+    # 1. Load conversation state (history, detected domain, procedure) if
+    # user_id provided – from the server-side cache, the DB only on a miss
+    conversation_state = ConversationState()
+    if request.user_id:
+        conversation_state = conversation_store.load(
+            request.user_id, lambda: _fetch_recent_chat_rows(request.user_id)
+        )
+    conversation_history = conversation_state.history
+    
+    # 2. Get user's uploaded documents with validation status from database
+    uploaded_docs_from_db = []
+    if request.user_id:
+        try:
+            # Join with requests table to filter documents by user_id
+            docs_response = supabase.table("documents").select("*, requests!inner(user_id)").eq("requests.user_id", request.user_id).execute()
+            if docs_response.data:
+                uploaded_docs_from_db = [
+                    {
+                        "type": doc.get("document_type_ai") or doc.get("document_type") or "unknown",
+                        "status": doc.get("validation_status", "unknown"),
+                        "filename": doc.get("file_name", "N/A"),
+                        "message": doc.get("validation_message", "")
+                    }
+                    for doc in docs_response.data
+                ]
+        except Exception as docs_err:
+            print(f"Warning: Could not load documents: {docs_err}")
+    
+    # 3. Local documents from knowledge_base folder (in-memory, hot-reloaded)
+    # + content from configured URLs (in-memory, refreshed in background).
+    # Same tuple while nothing changed, so the search index is reused
+    all_chunks = _all_chunks()
+    
+    # Search for relevant chunks based on the question
+    context_chunks, query_embedding = _retrieve_context_chunks(request.question, all_chunks, max_results=3)
+    
+    # 4. Build conversation context
+    conversation_context = {}
+    
+    # Previously detected domain, kept in the conversation state
+    if conversation_state.detected_domain:
+        conversation_context["detected_domain"] = conversation_state.detected_domain
+    
+    procedure = request.procedure or conversation_state.procedure
+    if procedure:
+        conversation_context["procedure"] = procedure
+
+    # --- START NOUA LOGICĂ ---
+    # Verificăm documentele ÎNAINTE de a apela AI-ul, dacă avem o procedură și documente
+    if request.procedure and request.uploaded_documents_info:
+        
+        # Extragem tipurile de documente valide din contextul primit de la frontend
+        uploaded_doc_types = [
+            doc.type 
+            for doc in request.uploaded_documents_info 
+            if doc.status == "approved" or doc.status == "validated" # Folosim statusul din frontend
+        ]
+        
+        # Apelăm funcția de verificare a cerințelor
+        check_result = check_missing_documents(request.procedure, uploaded_doc_types)
+        
+        if not check_result.get("error"):
+            # Adăugăm informațiile despre documente lipsă în contextul conversației
+            conversation_context["requirements_check"] = {
+                "has_all_required": check_result.get("has_all_required", False),
+                "missing_required": [doc["description"] for doc in check_result.get("missing_required", [])],
+                "uploaded_count": check_result.get("uploaded_count", 0),
+                "required_count": check_result.get("required_count", 0)
+            }
+
+    # Adăugăm detaliile documentelor (așa cum era și înainte)
+    if request.uploaded_documents_info:
+        conversation_context["documents_details"] = [
+            {
+                "type": doc.type,
+                "status": doc.status,
+                "filename": doc.filename,
+                "validation_message": doc.message
+            }
+            for doc in request.uploaded_documents_info
+        ]
+    # --- SFÂRȘIT NOUA LOGICĂ ---
+
+    return context_chunks, query_embedding, conversation_context, conversation_history
+
+
+def _finish_chat_turn(request: ChatRequest, background_tasks: BackgroundTasks, ai_response: dict) -> ChatResponse:
+    """Save the turn (in the background) and build the chatbot response."""
+    # Get list of available procedures (extended version with all domains)
+    procedures = list_all_extended_procedures()
+    
+    # Detect domain from question if not already detected by AI
+    detected_domain = ai_response.get("detected_domain")
+    if not detected_domain and request.question:
+        detected_domain = detect_domain_from_question(request.question)
+    
+    # Save user message and AI response, with the detected domain and
+    # procedure as metadata (for the next message)
+    if request.user_id:
+        _record_chat_turn(
+            background_tasks,
+            request.user_id,
+            [("user", request.question), ("assistant", ai_response.get("answer", ""))],
+            detected_domain=detected_domain,
+            procedure=request.procedure,
+        )
+    
+    return ChatResponse(
+        answer=ai_response.get("answer", ""),
+        detected_procedure=ai_response.get("detected_procedure"),
+        detected_domain=detected_domain,
+        needs_documents=ai_response.get("needs_documents", False),
+        suggested_action=ai_response.get("suggested_action", ""),
+        available_procedures=procedures
+    )
+
+
+def _chat_error_response(e: Exception) -> ChatResponse:
+    return ChatResponse(
+        answer=f"Ne cerem scuze, dar a apărut o eroare: {str(e)}",
+        detected_procedure=None,
+        detected_domain=None,
+        needs_documents=False,
+        suggested_action="retry",
+        available_procedures=[]
+    )
+
+
 @app.post("/chatbot", response_model=ChatResponse)
-def chatbot(request: ChatRequest):
+def chatbot(request: ChatRequest, background_tasks: BackgroundTasks):
     """
     Context-aware chatbot that helps citizens understand what documents they need.
     
@@ -128,212 +517,99 @@ def chatbot(request: ChatRequest):
     """
     try:
         # Check if user is requesting urban information extract
-        if detect_urban_info_request(request.question):
-            # Extract cadastral code from question if provided (priority)
-            cadastral_code = extract_cadastral_code_from_text(request.question)
-            
-            # If no cadastral code, try to extract address
-            address = None
-            if not cadastral_code:
-                address = extract_address_from_text(request.question)
-            
-            # Get instructions for downloading urban info
-            instructions = get_urban_info_instructions(cadastral_code, address)
-            
-            # If user is asking for troubleshooting
-            if any(word in request.question.lower() for word in ["problem", "eroare", "nu merge", "nu functioneaza", "nu gasesc"]):
-                instructions["message"] += f"\n\n{get_troubleshooting_tips()}"
-            
-            # Save conversation to history
-            if request.user_id:
-                try:
-                    supabase.table("chat_messages").insert({
-                        "user_id": request.user_id,
-                        "role": "user",
-                        "content": request.question
-                    }).execute()
-                    
-                    supabase.table("chat_messages").insert({
-                        "user_id": request.user_id,
-                        "role": "assistant",
-                        "content": instructions["message"]
-                    }).execute()
-                except Exception as save_err:
-                    print(f"Warning: Could not save chat history: {save_err}")
-            
-            return ChatResponse(
-                answer=instructions["message"],
-                detected_procedure="informare_urbanism",
-                detected_domain="urbanism",
-                needs_documents=False,
-                suggested_action="download_urban_info" if not instructions["needs_cadastral_code"] else "provide_cadastral_code",
-                available_procedures=[]
-            )
-        
-        # 1. Load conversation history if user_id provided
-        conversation_history = []
-        if request.user_id:
-            try:
-                history_response = supabase.table("chat_messages").select("*").eq("user_id", request.user_id).order("created_at", desc=False).limit(20).execute()
-                if history_response.data:
-                    conversation_history = [
-                        {"role": msg["role"], "content": msg["content"]}
-                        for msg in history_response.data
-                    ]
-            except Exception as hist_err:
-                print(f"Warning: Could not load chat history: {hist_err}")
-        
-        # 2. Get user's uploaded documents with validation status from database
-        uploaded_docs_from_db = []
-        if request.user_id:
-            try:
-                # Join with requests table to filter documents by user_id
-                docs_response = supabase.table("documents").select("*, requests!inner(user_id)").eq("requests.user_id", request.user_id).execute()
-                if docs_response.data:
-                    uploaded_docs_from_db = [
-                        {
-                            "type": doc.get("document_type_ai") or doc.get("document_type") or "unknown",
-                            "status": doc.get("validation_status", "unknown"),
-                            "filename": doc.get("file_name", "N/A"),
-                            "message": doc.get("validation_message", "")
-                        }
-                        for doc in docs_response.data
-                    ]
-            except Exception as docs_err:
-                print(f"Warning: Could not load documents: {docs_err}")
-        
-        # 3. Load local documents from knowledge_base folder
-        local_chunks = load_all_documents()
-        
-        # Fetch content from configured URLs
-        web_chunks = fetch_multiple_urls(LEGAL_URLS) if LEGAL_URLS else []
-        
-        # Combine all sources
-        all_chunks = local_chunks + web_chunks
-        
-        # Search for relevant chunks based on the question
-        context_chunks = search_relevant_chunks(request.question, all_chunks, max_results=3)
-        
-        # 4. Build conversation context
-        conversation_context = {}
-        
-        # Extract previously detected domain from conversation history
-        detected_domain_from_history = None
-        for msg in reversed(conversation_history):
-            if "[SYSTEM] CONTEXT: Domain detected" in msg.get("content", ""):
-                try:
-                    detected_domain_from_history = msg["content"].split("=")[-1].strip()
-                    break
-                except:
-                    pass
-        
-        if detected_domain_from_history:
-            conversation_context["detected_domain"] = detected_domain_from_history
-        
-        if request.procedure:
-            conversation_context["procedure"] = request.procedure
+        urban_response = _urban_info_chat_response(request, background_tasks)
+        if urban_response is not None:
+            return urban_response
 
-        # --- START NOUA LOGICĂ ---
-        # Verificăm documentele ÎNAINTE de a apela AI-ul, dacă avem o procedură și documente
-        if request.procedure and request.uploaded_documents_info:
-            
-            # Extragem tipurile de documente valide din contextul primit de la frontend
-            uploaded_doc_types = [
-                doc.type 
-                for doc in request.uploaded_documents_info 
-                if doc.status == "approved" or doc.status == "validated" # Folosim statusul din frontend
-            ]
-            
-            # Apelăm funcția de verificare a cerințelor
-            check_result = check_missing_documents(request.procedure, uploaded_doc_types)
-            
-            if not check_result.get("error"):
-                # Adăugăm informațiile despre documente lipsă în contextul conversației
-                conversation_context["requirements_check"] = {
-                    "has_all_required": check_result.get("has_all_required", False),
-                    "missing_required": [doc["description"] for doc in check_result.get("missing_required", [])],
-                    "uploaded_count": check_result.get("uploaded_count", 0),
-                    "required_count": check_result.get("required_count", 0)
-                }
-
-        # Adăugăm detaliile documentelor (așa cum era și înainte)
-        if request.uploaded_documents_info:
-            conversation_context["documents_details"] = [
-                {
-                    "type": doc.type,
-                    "status": doc.status,
-                    "filename": doc.filename,
-                    "validation_message": doc.message
-                }
-                for doc in request.uploaded_documents_info
-            ]
-        # --- SFÂRȘIT NOUA LOGICĂ ---
+        context_chunks, query_embedding, conversation_context, conversation_history = _prepare_rag_inputs(request)
 
-        # 8. Get answer from AI using RAG with context and conversation history
-        ai_response = get_rag_answer(
-            request.question, 
+        # Get answer from AI using RAG with context and conversation history
+        # (frequent questions are served from the semantic answer cache)
+        ai_response = _get_cached_rag_answer(
+            request.question,
+            query_embedding,
             context_chunks, 
             conversation_context,
             conversation_history
         )
         
-        # 9. Save user message and AI response to database
-        if request.user_id:
-            try:
-                # Save user message
-                supabase.table("chat_messages").insert({
-                    "user_id": request.user_id,
-                    "role": "user",
-                    "content": request.question
-                }).execute()
-                
-                # Save AI response
-                supabase.table("chat_messages").insert({
-                    "user_id": request.user_id,
-                    "role": "assistant",
-                    "content": ai_response.get("answer", "")
-                }).execute()
-            except Exception as save_err:
-                print(f"Warning: Could not save chat messages: {save_err}")
-        
-        # Get list of available procedures (extended version with all domains)
-        procedures = list_all_extended_procedures()
-        
-        # Detect domain from question if not already detected by AI
-        detected_domain = ai_response.get("detected_domain")
-        if not detected_domain and request.question:
-            detected_domain = detect_domain_from_question(request.question)
-        
-        # If domain is detected, save it to conversation context for next message
-        if detected_domain and request.user_id:
-            try:
-                # Store detected domain as assistant message with [SYSTEM] prefix
-                supabase.table("chat_messages").insert({
-                    "user_id": request.user_id,
-                    "role": "assistant",
-                    "content": f"[SYSTEM] CONTEXT: Domain detected = {detected_domain}"
-                }).execute()
-            except Exception as domain_save_err:
-                print(f"Warning: Could not save domain context: {domain_save_err}")
-        
-        return ChatResponse(
-            answer=ai_response.get("answer", ""),
-            detected_procedure=ai_response.get("detected_procedure"),
-            detected_domain=detected_domain,
-            needs_documents=ai_response.get("needs_documents", False),
-            suggested_action=ai_response.get("suggested_action", ""),
-            available_procedures=procedures
-        )
+        return _finish_chat_turn(request, background_tasks, ai_response)
         
     except Exception as e:
-        return ChatResponse(
-            answer=f"Ne cerem scuze, dar a apărut o eroare: {str(e)}",
-            detected_procedure=None,
-            detected_domain=None,
-            needs_documents=False,
-            suggested_action="retry",
-            available_procedures=[]
-        )
+        return _chat_error_response(e)
+
+
+def _sse_event(event: str, data: dict) -> str:
+    return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
+
+
+def _chatbot_event_stream(request: ChatRequest, background_tasks: BackgroundTasks):
+    """SSE events for /chatbot/stream (see the endpoint docstring)."""
+    try:
+        streamed = False
+        response = _urban_info_chat_response(request, background_tasks)
+        if response is None:
+            context_chunks, query_embedding, conversation_context, conversation_history = _prepare_rag_inputs(request)
+            ai_response, cache_slot = _lookup_cached_rag_answer(
+                request.question, query_embedding, context_chunks, conversation_context, conversation_history
+            )
+            if ai_response is None:
+                for kind, value in stream_rag_answer(
+                    request.question, context_chunks, conversation_context, conversation_history
+                ):
+                    if kind == "answer_delta":
+                        streamed = True
+                        yield _sse_event("delta", {"text": value})
+                    else:
+                        ai_response = value
+                _store_rag_answer(cache_slot, ai_response)
+            response = _finish_chat_turn(request, background_tasks, ai_response)
+
+        # Cache hits and urban info answers arrive whole, as a single delta
+        if not streamed:
+            yield _sse_event("delta", {"text": response.answer})
+        yield _sse_event("done", jsonable_encoder(response))
+
+    except Exception as e:
+        yield _sse_event("done", jsonable_encoder(_chat_error_response(e)))
+
+
+@app.post("/chatbot/stream")
+def chatbot_stream(request: ChatRequest, background_tasks: BackgroundTasks):
+    """
+    Same as /chatbot, streamed as server-sent events while the model writes:
+
+        event: delta
+        data: {"text": "<next part of the answer>"}
+
+        event: done
+        data: {<ChatResponse: answer, detected_procedure, detected_domain, ...>}
+
+    The "done" event is always last and carries the full answer; if the
+    generation fails midway its answer is the error message (suggested_action
+    "retry") and replaces the text streamed so far.
+    """
+    return StreamingResponse(
+        _chatbot_event_stream(request, background_tasks),
+        media_type="text/event-stream",
+        # Fără buffering în proxy (nginx), ca bucățile să ajungă imediat
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+@app.get("/knowledge/stats")
+def get_knowledge_stats():
+    """
+    Statistics for the in-memory knowledge corpus (chunks, bytes, last reload),
+    the web/answer caches, the LLM1 requirements store and LLM call coalescing.
+    """
+    return {
+        **corpus.stats(),
+        "web_cache": web_cache.stats(),
+        "answer_cache": answer_cache.stats(),
+        "requirements_store": requirements_store.stats(),
+        "llm_single_flight": llm_flight.stats(),
+        "storage_writer": storage_writer.stats(),
+    }
 
 @app.get("/procedures")
 def get_procedures():
@@ -352,8 +628,76 @@ def get_procedure_details(procedure_key: str):
         raise HTTPException(status_code=404, detail=f"Procedura '{procedure_key}' nu există")
     return procedure
 
+# Câte fișiere dintr-un upload sunt analizate în paralel
+UPLOAD_FILE_CONCURRENCY = int(os.getenv("UPLOAD_FILE_CONCURRENCY", "4"))
+
+
+async def _analyze_uploaded_file(
+    filename: str, file_content: bytes, existing_doc_types: List[str]
+) -> Tuple[DocumentResult, dict]:
+    """
+    AI pipeline for one uploaded file: type, validity and metadata from
+    ai_processor.analyze_document_async.
+
+    Returns:
+        (DocumentResult, extracted_data) – extracted_data is {} when the file
+        was rejected before extraction
+    """
+    # One combined vision call (type + validity + fields), with per-step fallback
+    analysis = await analyze_document_async(file_content, filename)
+    doc_type = analysis["document_type"]
+    
+    if doc_type == "unknown":
+        # If AI can't determine, skip this file
+        return DocumentResult(
+            filename=filename,
+            document_type="unknown",
+            is_valid=False,
+            validation_message="Nu pot determina tipul documentului. Vă rugăm să încărcați un document valid (carte de identitate, plan cadastral, act de proprietate sau certificat de urbanism).",
+            extracted_data={}
+        ), {}
+    
+    # Check if this document type was already uploaded
+    if doc_type in existing_doc_types:
+        return DocumentResult(
+            filename=filename,
+            document_type=doc_type,
+            is_valid=False,
+            validation_message=f"⚠️ Ai încărcat deja un document de tip '{doc_type}'. Nu poți încărca același tip de document de două ori. Dacă vrei să înlocuiești documentul, te rugăm să ștergi cel vechi mai întâi.",
+            extracted_data={}
+        ), {}
+    
+    extracted_data = analysis["extracted_data"]
+    
+    # Validate if it's an ID card
+    if analysis["is_valid"] is not None:
+        is_valid = analysis["is_valid"]
+        validation_message = analysis["message"] or ""
+    elif doc_type == "certificat_urbanism":
+        # Urban certificate - we accept it as valid
+        is_valid = True
+        validation_message = "Certificat de urbanism acceptat"
+    else:
+        # For other document types (cadastral, property), we assume they're valid
+        is_valid = True
+        validation_message = f"Document de tip '{doc_type}' acceptat"
+    
+    if extracted_data is None:
+        # For certificat_urbanism or other types, we don't extract structured data yet
+        extracted_data = {"document_type": doc_type, "status": "acceptat"}
+    
+    return DocumentResult(
+        filename=filename,
+        document_type=doc_type,
+        is_valid=is_valid,
+        validation_message=validation_message,
+        extracted_data=extracted_data if "error" not in extracted_data else {}
+    ), extracted_data
+
+
 @app.post("/upload")
 async def upload_documents(
+    background_tasks: BackgroundTasks,
     files: List[UploadFile] = File(..., description="Upload one or more documents"),
     procedure: Optional[str] = None,
     user_id: Optional[str] = None
@@ -388,60 +732,37 @@ async def upload_documents(
             except Exception as existing_err:
                 print(f"Warning: Could not check existing documents: {existing_err}")
         
-        # Process each uploaded file
-        for file in files:
-            file_content = await file.read()
-            
-            # Use AI to automatically detect document type from image/PDF content
-            doc_type = detect_document_type(file_content, file.filename)
-            
-            if doc_type == "unknown":
-                # If AI can't determine, skip this file
-                documents_processed.append(DocumentResult(
-                    filename=file.filename,
-                    document_type="unknown",
-                    is_valid=False,
-                    validation_message="Nu pot determina tipul documentului. Vă rugăm să încărcați un document valid (carte de identitate, plan cadastral, act de proprietate sau certificat de urbanism).",
-                    extracted_data={}
-                ))
-                continue
+        # Each file is read once (chunked, hashed, size-capped); the same bytes
+        # go to the AI analysis and to storage
+        uploads = await read_uploads(files)
+
+        # Process all uploaded files concurrently (bounded), keeping their order
+        semaphore = asyncio.Semaphore(UPLOAD_FILE_CONCURRENCY)
+
+        async def analyze_bounded(upload):
+            async with semaphore:
+                return await _analyze_uploaded_file(upload.filename, upload.content, existing_doc_types)
+
+        # Fișierele identice (același SHA-256) sunt analizate o singură dată
+        analysis_tasks = {}
+        for upload in uploads:
+            if upload.sha256 not in analysis_tasks:
+                analysis_tasks[upload.sha256] = asyncio.ensure_future(analyze_bounded(upload))
+        await asyncio.gather(*analysis_tasks.values())
+
+        analyses = []
+        for upload in uploads:
+            doc_result, extracted_data = analysis_tasks[upload.sha256].result()
+            analyses.append((doc_result.model_copy(update={"filename": upload.filename}), extracted_data))
+
+        for doc_result, extracted_data in analyses:
+            doc_type = doc_result.document_type
+            is_valid = doc_result.is_valid
             
-            # Check if this document type was already uploaded
-            if doc_type in existing_doc_types:
-                documents_processed.append(DocumentResult(
-                    filename=file.filename,
-                    document_type=doc_type,
-                    is_valid=False,
-                    validation_message=f"⚠️ Ai încărcat deja un document de tip '{doc_type}'. Nu poți încărca același tip de document de două ori. Dacă vrei să înlocuiești documentul, te rugăm să ștergi cel vechi mai întâi.",
-                    extracted_data={}
-                ))
-                continue
+            if doc_type == "carte_identitate" and is_valid:
+                has_id_card = True
             
-            # Validate if it's an ID card
-            if doc_type == "carte_identitate":
-                validation_result = validate_id_card(file_content)
-                is_valid = validation_result.get("is_valid", False)
-                validation_message = validation_result.get("message", "")
-                
-                if is_valid:
-                    has_id_card = True
-            elif doc_type == "certificat_urbanism":
-                # Urban certificate - we accept it as valid
-                is_valid = True
-                validation_message = "Certificat de urbanism acceptat"
-            else:
-                # For other document types (cadastral, property), we assume they're valid
-                is_valid = True
-                validation_message = f"Document de tip '{doc_type}' acceptat"
-            
-            # Extract metadata only for document types we support
-            if doc_type in ["carte_identitate", "plan_cadastral", "act_proprietate"]:
-                extracted_data = extract_metadata(file_content, doc_type)
-            else:
-                # For certificat_urbanism or other types, we don't extract structured data yet
-                extracted_data = {"document_type": doc_type, "status": "acceptat"}
-            
-            if "error" not in extracted_data:
+            if extracted_data and "error" not in extracted_data:
                 all_extracted_data.update(extracted_data)
                 
                 # Update document type flags
@@ -454,13 +775,7 @@ async def upload_documents(
                     has_property_deed = True
             
             # Record result for this document
-            documents_processed.append(DocumentResult(
-                filename=file.filename,
-                document_type=doc_type,
-                is_valid=is_valid,
-                validation_message=validation_message,
-                extracted_data=extracted_data if "error" not in extracted_data else {}
-            ))
+            documents_processed.append(doc_result)
         
         # Check what's missing based on procedure (if specified)
         missing_documents = []
@@ -498,23 +813,22 @@ async def upload_documents(
         
         # Save files to Supabase storage temporarily (not to database yet)
         # User will review validation in chatbot and confirm before saving to DB
+        # Uploads run concurrently with retries; by default after the response
+        # is sent (the client can poll GET /upload/storage/{job_id})
+        storage_job = None
         if user_id:
-            for i, file in enumerate(files):
-                if documents_processed[i].is_valid:
-                    try:
-                        file_path = f"documents/{user_id}/{file.filename}"
-                        file.file.seek(0)  # Reset file pointer
-                        file_content = await file.read()
-                        
-                        # Upload to Supabase storage
-                        supabase.storage.from_("documents").upload(
-                            file_path,
-                            file_content,
-                            {"content-type": file.content_type or "application/octet-stream"}
-                        )
-                    except Exception as storage_err:
-                        print(f"Storage upload warning for {file.filename}: {storage_err}")
-                        # Continue anyway - storage is not critical for validation
+            storage_files = [
+                (f"documents/{user_id}/{upload.filename}", upload.content, upload.content_type)
+                for i, upload in enumerate(uploads)
+                if documents_processed[i].is_valid
+            ]
+            if storage_files:
+                storage_job = storage_writer.create_job(storage_files)
+                if STORAGE_UPLOAD_IN_BACKGROUND:
+                    background_tasks.add_task(storage_writer.run, storage_job)
+                else:
+                    # Continue anyway on failures - storage is not critical for validation
+                    await storage_writer.run(storage_job)
         
         # Prepare summary for chatbot review
         valid_docs = [doc for doc in documents_processed if doc.is_valid]
@@ -545,15 +859,31 @@ async def upload_documents(
             documents_processed=documents_processed,
             missing_documents=missing_documents if missing_documents else None,
             summary=summary,
-            procedure=detected_procedure  # Return detected or specified procedure
+            procedure=detected_procedure,  # Return detected or specified procedure
+            storage_job_id=storage_job.job_id if storage_job else None,
+            storage_status=storage_job.status if storage_job else None
         )
             
+    except HTTPException:
+        # 413: fișiere prea mari
+        raise
     except Exception as e:
         return UploadResponse(
             success=False,
             error=f"Eroare la procesarea documentelor: {str(e)}"
         )
 
+@app.get("/upload/storage/{job_id}")
+def get_storage_job(job_id: str):
+    """
+    Status of the storage uploads started by /upload (poll until "done",
+    "partial" or "failed").
+    """
+    job = storage_writer.get_job(job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Job-ul de upload nu există sau a expirat")
+    return job.to_dict()
+
 @app.post("/upload-single")
 async def upload_single_document(file: UploadFile = File(...)):
     """
@@ -561,14 +891,14 @@ async def upload_single_document(file: UploadFile = File(...)):
     AI automatically detects document type and validates it.
     """
     try:
-        file_content = await file.read()
+        file_content = (await read_upload(file)).content
         
         # Use AI to automatically detect document type from image/PDF content
-        doc_type = detect_document_type(file_content, file.filename)
+        doc_type = await detect_document_type_async(file_content, file.filename)
         
         # Validate if it's an ID card
         if doc_type == "carte_identitate":
-            validation_result = validate_id_card(file_content)
+            validation_result = await validate_id_card_async(file_content)
             is_valid = validation_result.get("is_valid", False)
             validation_message = validation_result.get("message", "")
         else:
@@ -576,7 +906,7 @@ async def upload_single_document(file: UploadFile = File(...)):
             validation_message = "Document acceptat"
         
         # Extract metadata
-        extracted_data = extract_metadata(file_content, doc_type)
+        extracted_data = await extract_metadata_async(file_content, doc_type)
         
         if "error" in extracted_data:
             return UploadResponse(
@@ -600,6 +930,8 @@ async def upload_single_document(file: UploadFile = File(...)):
             summary=f"Document procesat: {doc_type}"
         )
         
+    except HTTPException:
+        raise
     except Exception as e:
         return UploadResponse(
             success=False,
@@ -668,6 +1000,7 @@ async def confirm_documents(req: ConfirmDocumentsRequest):
             raise HTTPException(status_code=500, detail="Failed to create request - no data returned")
         
         request_id = request_response.data[0].get("id")
+        priority_queue.upsert(application_from_row(request_response.data[0]))
         
         # Save each document to database (metadata only, files already in storage from upload)
         for doc in req.documents:
@@ -743,150 +1076,139 @@ def get_dossier_by_id(dossier_id: str):
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error fetching dossier: {str(e)}")
 
+def _prioritized_request_item(item: dict, original: dict) -> dict:
+    """One /requests/prioritized entry: priority data + the original request row."""
+    return {
+        "id": item["id"],
+        "user_id": original["user_id"],
+        "citizen_name": original.get("profiles", {}).get("full_name", "N/A") if original.get("profiles") else "N/A",
+        "request_type": item["flow_type"],
+        "status": original["status"],
+        "priority": original.get("priority", 0),
+        "assigned_clerk_id": original.get("assigned_clerk_id"),
+        "created_at": original["created_at"],
+        "legal_deadline": item["legal_due_date"].isoformat() if item["legal_due_date"] else None,
+        "days_left": item["days_left"],
+        "backlog_in_category": item["backlog_in_category"],
+        "priority_score": item["priority_score"],
+    }
+
+
+def _json_list_response(items: List[dict]) -> Response:
+    """
+    Serialize a list of plain dicts with one json.dumps call (no
+    jsonable_encoder pass, no per-item threadpool hop as with a streamed body).
+    """
+    return Response(content=json.dumps(items, ensure_ascii=False, default=str), media_type="application/json")
+
+
+def _sync_priority_queue() -> None:
+    """Reload the priority queue from the requests table (only the columns it needs)."""
+    res = (
+        supabase.table("requests")
+        .select(PRIORITY_COLUMNS)
+        .in_("status", list(ACTIVE_STATUSES))
+        .execute()
+    )
+    priority_queue.sync_from_rows(res.data or [])
+
+
+def _fetch_top_rows(select: str, limit: int) -> Tuple[List[dict], List[dict]]:
+    """The `limit` most urgent queue items and their (still active) request rows."""
+    prioritized = priority_queue.top(limit)
+    if not prioritized:
+        return [], []
+    res = (
+        supabase.table("requests")
+        .select(select)
+        .in_("id", [item["id"] for item in prioritized])
+        .in_("status", list(ACTIVE_STATUSES))
+        .execute()
+    )
+    return prioritized, res.data or []
+
+
+def _fetch_queue_rows(select: str, limit: Optional[int]) -> Tuple[List[dict], List[dict]]:
+    """
+    Prioritized queue items plus the request rows needed to render them.
+
+    Without a limit every active request is loaded anyway, so they are
+    scored and sorted directly (prioritize_applications), without the queue.
+    With a limit, the queue answers from memory (resynced at most every
+    PRIORITY_QUEUE_SYNC_INTERVAL seconds) and only the top rows are fetched.
+    """
+    if limit is None:
+        res = supabase.table("requests").select(select).in_("status", list(ACTIVE_STATUSES)).execute()
+        rows = res.data or []
+        return prioritize_applications([application_from_row(r) for r in rows]), rows
+
+    if priority_queue.is_stale():
+        _sync_priority_queue()
+    prioritized, rows = _fetch_top_rows(select, limit)
+    if len(rows) < len(prioritized):
+        # Statusul cererilor e schimbat de frontend direct în baza de date:
+        # unele cereri din top au fost închise de la ultima sincronizare.
+        # Resincronizăm, ca răspunsul să aibă tot `limit` cereri
+        _sync_priority_queue()
+        prioritized, rows = _fetch_top_rows(select, limit)
+    return prioritized, rows
+
+
 @app.get("/requests/prioritized")
-def get_all_prioritized_requests():
+def get_all_prioritized_requests(limit: Optional[int] = Query(None, ge=1)):
     """
     Get all pending and in_review requests sorted by priority.
     Uses the prioritization algorithm to sort by:
     1. Days left until legal deadline (most urgent first)
     2. Backlog in category (more pending requests = higher priority)
     3. Submission date (older requests first)
+
+    With ?limit=k only the k most urgent requests are returned (top-k from
+    the in-memory priority queue, no full sort).
     """
     try:
-        # Get all requests that need processing (pending_validation or in_review)
-        res = (
-            supabase.table("requests")
-            .select("*, profiles!user_id(full_name)")
-            .in_("status", ["pending_validation", "in_review"])
-            .execute()
-        )
-
-        rows = res.data or []
-
-        # Map to Application objects for prioritization
-        apps: list[Application] = []
-        for r in rows:
-            # Parse dates safely
-            try:
-                submitted_at = _parse_iso(r["created_at"])
-            except:
-                from datetime import timezone
-                submitted_at = datetime.now(timezone.utc)
-            
-            legal_due = None
-            if r.get("legal_deadline"):
-                try:
-                    legal_due = _parse_iso(r["legal_deadline"])
-                except:
-                    pass
-            
-            apps.append(
-                Application(
-                    id=str(r["id"]),
-                    flow_type=r.get("request_type", "other"),
-                    submitted_at=submitted_at,
-                    legal_due_date=legal_due,
-                    status=r.get("status", "pending_validation"),
-                )
-            )
-
-        # Apply prioritization algorithm
-        prioritized = prioritize_applications(apps)
-
-        # Enrich with full request data
-        result = []
-        for item in prioritized:
-            # Find original request data
-            original = next((r for r in rows if str(r["id"]) == item["id"]), None)
-            if original:
-                result.append({
-                    "id": item["id"],
-                    "user_id": original["user_id"],
-                    "citizen_name": original.get("profiles", {}).get("full_name", "N/A") if original.get("profiles") else "N/A",
-                    "request_type": item["flow_type"],
-                    "status": original["status"],
-                    "priority": original.get("priority", 0),
-                    "assigned_clerk_id": original.get("assigned_clerk_id"),
-                    "created_at": original["created_at"],
-                    "legal_deadline": item["legal_due_date"].isoformat() if item["legal_due_date"] else None,
-                    "days_left": item["days_left"],
-                    "backlog_in_category": item["backlog_in_category"],
-                    "priority_score": item["priority_score"],
-                })
-
-        return result
+        # Requests that need processing (pending_validation or in_review), in priority order
+        prioritized, rows = _fetch_queue_rows("*, profiles!user_id(full_name)", limit)
+
+        # Enrich with full request data (dict-indexed join). Built eagerly, so a
+        # bad row ends up as a 500 below, not as a truncated body
+        items = [
+            _prioritized_request_item(item, original)
+            for item, original in join_with_rows(prioritized, rows)
+        ]
+        return _json_list_response(items)
     
     except Exception as e:
         print(f"Error in get_all_prioritized_requests: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
-def _parse_iso(dt_str: str) -> datetime:
-    """Mic helper pentru stringuri ISO de la Supabase (cu sau fără Z)."""
-    if dt_str is None:
-        return None
-    # Supabase trimite de obicei gen '2025-11-15T10:23:45.123456+00:00' sau cu 'Z'
-    from datetime import timezone
-    dt = datetime.fromisoformat(dt_str.replace("Z", "+00:00"))
-    # Ensure timezone-aware datetime (convert to UTC if needed)
-    if dt.tzinfo is None:
-        dt = dt.replace(tzinfo=timezone.utc)
-    return dt
 
 
 @app.get("/clerk/requests/status")
-def get_all_requests_status():
+def get_all_requests_status(limit: Optional[int] = Query(None, ge=1)):
     """
     Returnează pentru TOȚI utilizatorii:
-    - toate cererile
+    - toate cererile (sau doar primele `limit` după prioritate)
     - statusul + prioritatea (zile rămase, scor)
     - documentele aferente fiecărei cereri
     - INFORMAȚII PROFIL (NOU)
     """
     
-    # 1. Cererile TUTUROR userilor (filtrează doar cele active)
+    # 1. Cererile TUTUROR userilor (filtrează doar cele active), în ordinea priorității
     # NOU: Luăm și datele de profil (user_profile)
-    res_req = (
-        supabase.table("requests")
-        .select("*, user_profile:profiles(full_name, role)") 
-        .in_("status", ["pending_validation", "in_review"])
-        .execute()
+    # documents(count) = numărul documentelor per cerere, calculat de Postgres
+    # în același query (un singur round trip, indiferent câte cereri sunt)
+    # 2-3. Prioritatea vine din coada incrementală (priority_queue)
+    prioritized_list, req_rows = _fetch_queue_rows(
+        "*, user_profile:profiles(full_name, role), documents(count)", limit
     )
-    req_rows = res_req.data or []
-
-    # 2. Mapăm la Application pentru calcul de prioritate
-    apps: List[Application] = []
-    for r in req_rows:
-        submitted_at = _parse_iso(r["created_at"]) # Folosim created_at
-        legal_due = _parse_iso(r["legal_deadline"]) if r.get("legal_deadline") else None
-
-        apps.append(
-            Application(
-                id=str(r["id"]),
-                flow_type=r.get("request_type", "altele"),
-                submitted_at=submitted_at,
-                legal_due_date=legal_due,
-                status=r.get("status", "pending"),
-            )
-        )
-
-    # 3. Calculăm prioritatea pentru toate cererile folosind logica ta
-    prioritized_list = prioritize_applications(apps)
-    stats_by_id = {item["id"]: item for item in prioritized_list}
 
     result = []
 
-    # 4. Pentru fiecare cerere: adăugăm număr documente + date de prioritate
-    for r in req_rows:
-        request_id = str(r["id"])
-        stats = stats_by_id.get(request_id, {})
-
-        # 4a. Numărul documentelor atașate cererii
-        docs_res = (
-            supabase.table("documents")
-            .select("id", count='exact', head=True) # Optimizat: doar numărăm
-            .eq("request_id", request_id)
-            .execute()
-        )
-        docs_count = docs_res.count or 0
+    # 4. Pentru fiecare cerere (deja sortate): adăugăm număr documente + date de prioritate
+    for stats, r in join_with_rows(prioritized_list, req_rows):
+        # 4a. Numărul documentelor atașate cererii (venit deja cu cererea)
+        docs_agg = r.pop("documents", None) or [{}]
+        docs_count = docs_agg[0].get("count") or 0
         
         # 5. Formatăm datele pentru a se potrivi cu frontend-ul
         result.append(
@@ -899,15 +1221,6 @@ def get_all_requests_status():
             }
         )
 
-    # 6. Sortăm rezultatul final conform logicii tale din prioritization.py
-    result.sort(
-        key=lambda x: (
-            x["days_until_deadline"] if x["days_until_deadline"] is not None else 999, # 1. Zile rămase
-            -x.get("priority_score", 0), # 2. Scorul (desc)
-            _parse_iso(x["created_at"]) # 3. Data trimiterii
-        )
-    )
-
     return result
 
 
@@ -919,18 +1232,18 @@ async def ai_validate_documents(
     # NU citești nimic din DB aici, lucrezi DOAR cu fișierele primite
     results = []
 
-    for f in files:
-        content = await f.read()
+    for upload in await read_uploads(files):
+        content = upload.content
 
         # 1. clasifici tipul
-        doc_type = detect_document_type(content)
+        doc_type = await detect_document_type_async(content)
 
         # 2. dacă e buletin -> validate_id_card
         #    dacă e plan/act -> extract_metadata
-        meta = extract_metadata(content, doc_type)
+        meta = await extract_metadata_async(content, doc_type)
 
         results.append({
-            "filename": f.filename,
+            "filename": upload.filename,
             "doc_type": doc_type,
             "metadata": meta,
             "is_valid": "error" not in meta,  # poți rafina
@@ -967,7 +1280,7 @@ class ValidateDossierRequest(BaseModel):
 
 
 @app.post("/llm1/extract-requirements")
-def llm1_extract_requirements(request: ExtractRequirementsRequest):
+async def llm1_extract_requirements(request: ExtractRequirementsRequest):
     """
     LLM1 - Extrage cerințele de documentație dintr-un set de chunk-uri text.
     
@@ -996,7 +1309,7 @@ def llm1_extract_requirements(request: ExtractRequirementsRequest):
         # Convertim Pydantic models la dict-uri simple
         chunks_dict = [{"page_url": chunk.page_url, "text": chunk.text} for chunk in request.text_chunks]
         
-        result = extract_procedure_requirements(
+        result = await extract_procedure_requirements_async(
             procedure_description=request.procedure_description,
             text_chunks=chunks_dict
         )
@@ -1008,7 +1321,7 @@ def llm1_extract_requirements(request: ExtractRequirementsRequest):
 
 
 @app.post("/llm2/validate-dossier")
-def llm2_validate_dossier(request: ValidateDossierRequest):
+async def llm2_validate_dossier(request: ValidateDossierRequest):
     """
     LLM2 - Validează dosarul utilizatorului și oferă îndrumare.
     
@@ -1045,7 +1358,7 @@ def llm2_validate_dossier(request: ValidateDossierRequest):
                 for doc in request.existing_documents
             ]
         
-        result = validate_and_guide_dossier(
+        result = await validate_and_guide_dossier_async(
             user_message=request.user_message,
             llm1_requirements=request.llm1_requirements,
             existing_documents=existing_docs_dict
@@ -1120,7 +1433,7 @@ def get_urban_info_guide(request: UrbanInfoRequest):
 
 
 @app.post("/llm-workflow/complete")
-def complete_llm_workflow(
+async def complete_llm_workflow(
     procedure_description: str,
     text_chunks: List[TextChunk],
     user_message: str,
@@ -1147,7 +1460,7 @@ def complete_llm_workflow(
     try:
         # Step 1: LLM1 extrage cerințele
         chunks_dict = [{"page_url": chunk.page_url, "text": chunk.text} for chunk in text_chunks]
-        llm1_result = extract_procedure_requirements(
+        llm1_result = await extract_procedure_requirements_async(
             procedure_description=procedure_description,
             text_chunks=chunks_dict
         )
@@ -1164,7 +1477,7 @@ def complete_llm_workflow(
                 for doc in existing_documents
             ]
         
-        llm2_result = validate_and_guide_dossier(
+        llm2_result = await validate_and_guide_dossier_async(
             user_message=user_message,
             llm1_requirements=llm1_result,
             existing_documents=existing_docs_dict
@@ -1,9 +1,180 @@
-from fastapi import Header, HTTPException
-import requests
+"""
+Clerk Auth - Local verification of Clerk session JWTs
+
+Token-ul de sesiune Clerk este un JWT semnat RS256. Îl verificăm local cu
+cheile publice (JWKS) ținute în cache, în loc să apelăm API-ul Clerk la
+fiecare request:
+    - JWKS este reîncărcat după CLERK_JWKS_TTL sau când apare un `kid`
+      necunoscut (rotația cheilor),
+    - claims-urile verificate sunt păstrate câteva secunde, după hash-ul
+      token-ului, deci un request repetat nu mai decodează deloc JWT-ul.
+
+Configurare (în .env):
+    CLERK_PUBLISHABLE_KEY   – din ea se deduce URL-ul JWKS al instanței
+    CLERK_JWKS_URL          – (opțional) URL JWKS explicit
+    CLERK_JWKS              – (opțional) JWKS local, ca JSON (dev / teste)
+    CLERK_AUTHORIZED_PARTIES – (opțional) origini acceptate pentru `azp`, separate prin virgulă
+"""
+
+import base64
+import hashlib
+import json
 import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Callable, Dict, Optional
+
+import jwt
+import requests
+from fastapi import Header, HTTPException
 
 CLERK_PUBLISHABLE_KEY = os.getenv("CLERK_PUBLISHABLE_KEY")
 CLERK_SECRET_KEY = os.getenv("CLERK_SECRET_KEY")
+CLERK_JWKS_URL = os.getenv("CLERK_JWKS_URL")
+CLERK_AUTHORIZED_PARTIES = [p.strip() for p in os.getenv("CLERK_AUTHORIZED_PARTIES", "").split(",") if p.strip()]
+
+CLERK_JWKS_TTL = float(os.getenv("CLERK_JWKS_TTL", "3600"))
+# Pauza minimă între două reîncărcări JWKS forțate de un kid necunoscut
+CLERK_JWKS_MIN_REFRESH_INTERVAL = 30.0
+CLERK_CLAIMS_CACHE_TTL = float(os.getenv("CLERK_CLAIMS_CACHE_TTL", "60"))
+CLERK_CLAIMS_CACHE_MAX_ENTRIES = 10_000
+CLERK_CLOCK_SKEW = 5  # secunde
+CLERK_HTTP_TIMEOUT = 5
+
+
+def _jwks_url_from_publishable_key(publishable_key: str) -> Optional[str]:
+    """pk_test_<base64("instanta.clerk.accounts.dev$")> → URL-ul JWKS al instanței."""
+    try:
+        encoded = publishable_key.split("_", 2)[2]
+        frontend_api = base64.b64decode(encoded + "=" * (-len(encoded) % 4)).decode("utf-8").rstrip("$")
+    except (IndexError, ValueError):
+        return None
+    return f"https://{frontend_api}/.well-known/jwks.json" if frontend_api else None
+
+
+def fetch_remote_jwks() -> dict:
+    """Download the JWKS of the configured Clerk instance."""
+    url = CLERK_JWKS_URL or (CLERK_PUBLISHABLE_KEY and _jwks_url_from_publishable_key(CLERK_PUBLISHABLE_KEY))
+    headers = {}
+    if not url:
+        # Backend API – are nevoie de cheia secretă
+        url = "https://api.clerk.com/v1/jwks"
+        headers["Authorization"] = f"Bearer {CLERK_SECRET_KEY}"
+    resp = requests.get(url, headers=headers, timeout=CLERK_HTTP_TIMEOUT)
+    resp.raise_for_status()
+    return resp.json()
+
+
+class JWKSCache:
+    """Signing keys by `kid`, refreshed on TTL expiry or on an unknown kid."""
+
+    def __init__(self, fetch: Callable[[], dict], ttl: float = CLERK_JWKS_TTL):
+        self._fetch = fetch
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._keys: Dict[str, jwt.PyJWK] = {}
+        self._fetched_at: Optional[float] = None
+
+    def set_fetch(self, fetch: Callable[[], dict]) -> None:
+        with self._lock:
+            self._fetch = fetch
+            self._keys = {}
+            self._fetched_at = None
+
+    def _refresh(self) -> None:
+        # Apelat sub lock
+        jwks = self._fetch()
+        keys = {}
+        for jwk in jwks.get("keys", []):
+            try:
+                keys[jwk.get("kid")] = jwt.PyJWK(jwk)
+            except jwt.PyJWTError as e:
+                print(f"Warning: Skipping unusable JWKS key {jwk.get('kid')}: {e}")
+        self._keys = keys
+        self._fetched_at = time.monotonic()
+
+    def get_key(self, kid: Optional[str]) -> jwt.PyJWK:
+        """Signing key for kid (raises KeyError if Clerk does not know it)."""
+        with self._lock:
+            now = time.monotonic()
+            age = None if self._fetched_at is None else now - self._fetched_at
+            if age is None or age >= self.ttl:
+                try:
+                    self._refresh()
+                except requests.RequestException as e:
+                    if not self._keys:
+                        raise
+                    # Clerk indisponibil: continuăm cu cheile deja cunoscute
+                    print(f"Warning: JWKS refresh failed, using cached keys: {e}")
+            elif kid not in self._keys and age >= CLERK_JWKS_MIN_REFRESH_INTERVAL:
+                # Cheie nouă după o rotație
+                self._refresh()
+            return self._keys[kid]
+
+
+jwks_cache = JWKSCache(fetch_remote_jwks)
+
+_claims_lock = threading.Lock()
+_claims_cache: "OrderedDict[str, tuple[float, dict]]" = OrderedDict()
+
+
+def set_local_jwks(jwks: Optional[dict]) -> None:
+    """
+    Use a fixed key set instead of Clerk's (local development, tests).
+    Pass None to go back to the remote JWKS.
+    """
+    jwks_cache.set_fetch((lambda: jwks) if jwks is not None else fetch_remote_jwks)
+    clear_claims_cache()
+
+
+def clear_claims_cache() -> None:
+    with _claims_lock:
+        _claims_cache.clear()
+
+
+if os.getenv("CLERK_JWKS"):
+    set_local_jwks(json.loads(os.getenv("CLERK_JWKS")))
+
+
+def verify_token(token: str) -> dict:
+    """
+    Verify a Clerk session token and return its claims.
+
+    Raises:
+        jwt.PyJWTError: invalid signature, expired, wrong azp, unknown key...
+    """
+    token_hash = hashlib.sha256(token.encode("utf-8")).hexdigest()
+    now = time.time()
+    with _claims_lock:
+        cached = _claims_cache.get(token_hash)
+        if cached is not None and cached[0] > now:
+            _claims_cache.move_to_end(token_hash)
+            return cached[1]
+
+    header = jwt.get_unverified_header(token)
+    try:
+        key = jwks_cache.get_key(header.get("kid"))
+    except KeyError:
+        raise jwt.InvalidKeyError(f"Unknown signing key: {header.get('kid')}")
+
+    claims = jwt.decode(
+        token,
+        key=key,
+        algorithms=["RS256"],
+        leeway=CLERK_CLOCK_SKEW,
+        options={"require": ["exp", "sub"], "verify_aud": False},
+    )
+    if CLERK_AUTHORIZED_PARTIES and claims.get("azp") not in CLERK_AUTHORIZED_PARTIES:
+        raise jwt.InvalidTokenError(f"Unauthorized party: {claims.get('azp')}")
+
+    # Nu păstrăm claims-urile mai mult decât e valabil token-ul
+    expires_at = min(now + CLERK_CLAIMS_CACHE_TTL, claims["exp"])
+    with _claims_lock:
+        _claims_cache[token_hash] = (expires_at, claims)
+        while len(_claims_cache) > CLERK_CLAIMS_CACHE_MAX_ENTRIES:
+            _claims_cache.popitem(last=False)
+    return claims
 
 
 def get_current_user(authorization: str = Header(None)):
@@ -12,12 +183,14 @@ def get_current_user(authorization: str = Header(None)):
 
     token = authorization.replace("Bearer ", "")
 
-    resp = requests.get(
-        "https://api.clerk.dev/v1/me",
-        headers={"Authorization": f"Bearer {token}", "Content-Type": "application/json"},
-    )
-
-    if resp.status_code != 200:
+    try:
+        claims = verify_token(token)
+    except jwt.PyJWTError as e:
+        print(f"Clerk token rejected: {e}")
         raise HTTPException(status_code=401, detail="Invalid Clerk token")
+    except requests.RequestException as e:
+        print(f"Error fetching Clerk JWKS: {e}")
+        raise HTTPException(status_code=503, detail="Authentication service unavailable")
 
-    return resp.json()
+    # "id" = user id Clerk, ca în răspunsul vechi de la /v1/me
+    return {**claims, "id": claims["sub"]}
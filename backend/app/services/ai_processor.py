@@ -10,10 +10,23 @@ Contract: Livrează funcții pure pentru Persoana C (Arhitectul API)
 
 import os
 import json
-import base64
+import asyncio
 from openai import OpenAI
 from datetime import datetime
-from typing import Optional
+from typing import Any, Iterator, Optional
+
+from app.services.image_preprocessing import vision_image_content
+from app.services.json_stream import JsonStringFieldStreamer
+from app.services.llm_client import chat_completion
+from app.services.prompt_builder import build_messages
+from app.services.requirements_store import requirements_key, requirements_store
+from app.services.result_cache import make_key, result_cache
+from app.services.single_flight import create_completion
+from app.services.document_classifier import (
+    VALID_DOCUMENT_TYPES,
+    detect_document_type_async,
+    is_pdf_document,
+)
 
 
 # ========================================
@@ -33,27 +46,37 @@ client = OpenAI(
 )
 
 
+# Versiunile prompturilor fac parte din cheile result_cache: crește
+# versiunea când se schimbă promptul, ca rezultatele vechi să nu mai fie folosite
+ID_CARD_PROMPT_VERSION = "1"
+METADATA_PROMPT_VERSION = "1"
+ANALYSIS_PROMPT_VERSION = "1"
+# Idem pentru extragerile LLM1 păstrate în requirements_store
+LLM1_PROMPT_VERSION = "1"
+
+
+def _json_request(model: str, messages: list[dict]) -> dict:
+    """
+    Parametrii unui apel care cere un răspuns JSON, comuni variantei sync
+    (create_completion) și celei async (chat_completion).
+    """
+    return {"model": model, "response_format": {"type": "json_object"}, "messages": messages}
+
+
 # ========================================
 # Task 1: Validarea Documentelor (Buletin)
 # ========================================
-def validate_id_card(file_bytes: bytes) -> dict:
-    """
-    Validează un document de identitate (buletin) folosind OpenRouter
-    Vision API.
-    
-    Args:
-        file_bytes: Bytes-urile fișierului imagine (JPG/PNG)
-    
-    Returns:
-        dict: {"is_valid": bool, "message": str}
-    """
-    try:
-        data_curenta = datetime.now().strftime("%d.%m.%Y")
+ID_CARD_FORMAT_ERROR = {
+    "is_valid": False,
+    "message": "EROARE: Răspunsul AI nu este în formatul corect.",
+}
+
 
-        # Encodăm imaginea în base64
-        base64_image = base64.b64encode(file_bytes).decode("utf-8")
+def _id_card_messages(file_bytes: bytes) -> list[dict]:
+    """Construiește mesajele pentru validarea buletinului."""
+    data_curenta = datetime.now().strftime("%d.%m.%Y")
 
-        prompt_text = f"""Privește această imagine. Este o carte de identitate românească? 
+    prompt_text = f"""Privește această imagine. Este o carte de identitate românească? 
 
 Dacă da, identifică data expirării documentului (formatul: ZZ.LL.AAAA).
 
@@ -75,58 +98,170 @@ Răspunde cu:
 - "Document valid" dacă data expirării >= data curentă
 - "EROARE: Cartea de identitate a expirat la data [zi.lună.anul]" dacă data expirării < data curentă"""
 
-        # Folosim formatul de mesaje OpenAI compatibil cu OpenRouter
-        response = client.chat.completions.create(
-            model="gpt-4o-mini",  # Model de viziune prin OpenRouter
-            response_format={"type": "json_object"},
-            messages=[
-                {
-                    "role": "system",
-                    "content": f"Ești un funcționar de la serviciul de urbanism. Data curentă este {data_curenta}. Când compari date, compară anul mai întâi, apoi luna, apoi ziua. Răspunde doar în format JSON cu următoarea structură: {{\"is_valid\": boolean, \"message\": \"string\"}}.",
-                },
-                {
-                    "role": "user",
-                    "content": [
-                        {"type": "text", "text": prompt_text},
-                        {
-                            "type": "image_url",
-                            "image_url": {
-                                "url": f"data:image/jpeg;base64,{base64_image}"
-                            },
-                        },
-                    ],
-                },
+    # Folosim formatul de mesaje OpenAI compatibil cu OpenRouter
+    return [
+        {
+            "role": "system",
+            "content": f"Ești un funcționar de la serviciul de urbanism. Data curentă este {data_curenta}. Când compari date, compară anul mai întâi, apoi luna, apoi ziua. Răspunde doar în format JSON cu următoarea structură: {{\"is_valid\": boolean, \"message\": \"string\"}}.",
+        },
+        {
+            "role": "user",
+            "content": [
+                {"type": "text", "text": prompt_text},
+                vision_image_content(file_bytes, "id_card"),
             ],
-        )
+        },
+    ]
 
-        # Extragem răspunsul
-        result_text = response.choices[0].message.content
 
-        result = json.loads(result_text)
+def _id_card_request(file_bytes: bytes) -> dict:
+    # Model de viziune prin OpenRouter
+    return _json_request("gpt-4o-mini", _id_card_messages(file_bytes))
 
-        if "is_valid" not in result or "message" not in result:
-            return {
-                "is_valid": False,
-                "message": "EROARE: Răspunsul AI nu este în formatul corect.",
-            }
 
-        return result
+def _parse_id_card_result(result_text: str) -> Optional[dict]:
+    """
+    Verifică structura răspunsului pentru validarea buletinului.
+    Returnează None dacă răspunsul nu are formatul corect.
+    """
+    result = json.loads(result_text)
+
+    if "is_valid" not in result or "message" not in result:
+        return None
 
-    except json.JSONDecodeError:
+    return result
+
+
+def _id_card_error(e: Exception) -> dict:
+    if isinstance(e, json.JSONDecodeError):
         return {
             "is_valid": False,
             "message": "EROARE: Nu s-a putut procesa răspunsul AI.",
         }
+    return {
+        "is_valid": False,
+        "message": f"EROARE: Eroare la validarea documentului: {str(e)}",
+    }
+
+
+def _id_card_cache_key(file_bytes: bytes) -> str:
+    # Verdictul depinde de data curentă, deci intră și ea în cheie
+    return make_key("id_card", ID_CARD_PROMPT_VERSION, file_bytes, datetime.now().strftime("%Y-%m-%d"))
+
+
+def validate_id_card(file_bytes: bytes) -> dict:
+    """
+    Validează un document de identitate (buletin) folosind OpenRouter
+    Vision API.
+    
+    Args:
+        file_bytes: Bytes-urile fișierului imagine (JPG/PNG)
+    
+    Returns:
+        dict: {"is_valid": bool, "message": str}
+    """
+    cache_key = _id_card_cache_key(file_bytes)
+    cached = result_cache.get(cache_key)
+    if cached is not None:
+        return cached
+
+    try:
+        response = create_completion(client, **_id_card_request(file_bytes))
+
+        # Extragem răspunsul
+        result = _parse_id_card_result(response.choices[0].message.content)
+        if result is None:
+            return dict(ID_CARD_FORMAT_ERROR)
+        result_cache.set(cache_key, result)
+        return result
+
     except Exception as e:
-        return {
-            "is_valid": False,
-            "message": f"EROARE: Eroare la validarea documentului: {str(e)}",
-        }
+        return _id_card_error(e)
+
+
+async def validate_id_card_async(file_bytes: bytes) -> dict:
+    """Varianta async a validate_id_card (nu blochează event loop-ul)."""
+    cache_key = _id_card_cache_key(file_bytes)
+    cached = await result_cache.get_async(cache_key)
+    if cached is not None:
+        return cached
+
+    try:
+        # Pregătirea imaginii (decodare, micșorare) rulează în afara event loop-ului
+        request = await asyncio.to_thread(_id_card_request, file_bytes)
+        response = await chat_completion(**request)
+        result = _parse_id_card_result(response.choices[0].message.content)
+        if result is None:
+            return dict(ID_CARD_FORMAT_ERROR)
+        await result_cache.set_async(cache_key, result)
+        return result
+
+    except Exception as e:
+        return _id_card_error(e)
 
 
 # ========================================
 # Task 2: Extragerea Datelor (AI-OCR)
 # ========================================
+METADATA_FIELDS = {
+    "carte_identitate": [
+        "nume",
+        "prenume",
+        "cnp",
+        "adresa_domiciliu",
+    ],
+    "plan_cadastral": ["nr_cadastral", "suprafata_masurata_mp"],
+    "act_proprietate": ["nume_proprietar", "adresa_imobil"],
+}
+
+
+def _metadata_messages(file_bytes: bytes, file_type: str) -> list[dict]:
+    """Construiește mesajele pentru extragerea datelor (AI-OCR)."""
+    prompt_text = f"""Ești un operator de date ultra-precis. Extrage datele relevante din imaginea următoare, în funcție de tipul documentului. Tipul documentului este {file_type}.
+
+* Dacă tipul este 'carte_identitate', caută: nume, prenume, cnp, adresa_domiciliu.
+* Dacă tipul este 'plan_cadastral', caută: nr_cadastral, suprafata_masurata_mp.
+* Dacă tipul este 'act_proprietate', caută: nume_proprietar, adresa_imobil.
+
+Ignoră câmpurile pe care nu le găsești. Răspunde doar în format JSON, folosind cheile specificate."""
+
+    # Folosim formatul de mesaje OpenAI compatibil cu OpenRouter
+    return [
+        {
+            "role": "system",
+            "content": "Ești un operator de date ultra-precis. Răspunde doar în format JSON.",
+        },
+        {
+            "role": "user",
+            "content": [
+                {"type": "text", "text": prompt_text},
+                vision_image_content(file_bytes, "metadata", file_type),
+            ],
+        },
+    ]
+
+
+def _metadata_request(file_bytes: bytes, file_type: str) -> dict:
+    return _json_request("openai/gpt-4o", _metadata_messages(file_bytes, file_type))
+
+
+def _metadata_precheck(file_type: str) -> Optional[dict]:
+    """Eroarea pentru un tip de document fără câmpuri de extras, altfel None."""
+    if not METADATA_FIELDS.get(file_type):
+        return {"error": f"Tip de document necunoscut: {file_type}"}
+    return None
+
+
+def _metadata_cache_key(file_bytes: bytes, file_type: str) -> str:
+    return make_key("metadata", METADATA_PROMPT_VERSION, file_bytes, file_type)
+
+
+def _metadata_error(e: Exception) -> dict:
+    if isinstance(e, json.JSONDecodeError):
+        return {"error": "Nu s-a putut procesa răspunsul AI."}
+    return {"error": f"Eroare la extragerea datelor: {str(e)}"}
+
+
 def extract_metadata(file_bytes: bytes, file_type: str) -> dict:
     """
     Extrage date cheie din documente folosind AI-OCR (OpenRouter Vision).
@@ -139,66 +274,214 @@ def extract_metadata(file_bytes: bytes, file_type: str) -> dict:
     Returns:
         dict: Datele extrase sau {"error": str} în caz de eroare
     """
+    error = _metadata_precheck(file_type)
+    if error:
+        return error
+
+    cache_key = _metadata_cache_key(file_bytes, file_type)
+    cached = result_cache.get(cache_key)
+    if cached is not None:
+        return cached
+
     try:
-        # Encodăm imaginea în base64
-        base64_image = base64.b64encode(file_bytes).decode("utf-8")
-
-        fields_map = {
-            "carte_identitate": [
-                "nume",
-                "prenume",
-                "cnp",
-                "adresa_domiciliu",
-            ],
-            "plan_cadastral": ["nr_cadastral", "suprafata_masurata_mp"],
-            "act_proprietate": ["nume_proprietar", "adresa_imobil"],
-        }
+        response = create_completion(client, **_metadata_request(file_bytes, file_type))
+
+        result = json.loads(response.choices[0].message.content)
+        result_cache.set(cache_key, result)
+        return result
 
-        fields = fields_map.get(file_type, [])
-        if not fields:
-            return {"error": f"Tip de document necunoscut: {file_type}"}
+    except Exception as e:
+        return _metadata_error(e)
 
-        prompt_text = f"""Ești un operator de date ultra-precis. Extrage datele relevante din imaginea următoare, în funcție de tipul documentului. Tipul documentului este {file_type}.
 
-* Dacă tipul este 'carte_identitate', caută: nume, prenume, cnp, adresa_domiciliu.
-* Dacă tipul este 'plan_cadastral', caută: nr_cadastral, suprafata_masurata_mp.
-* Dacă tipul este 'act_proprietate', caută: nume_proprietar, adresa_imobil.
+async def extract_metadata_async(file_bytes: bytes, file_type: str) -> dict:
+    """Varianta async a extract_metadata (nu blochează event loop-ul)."""
+    error = _metadata_precheck(file_type)
+    if error:
+        return error
 
-Ignoră câmpurile pe care nu le găsești. Răspunde doar în format JSON, folosind cheile specificate."""
+    cache_key = _metadata_cache_key(file_bytes, file_type)
+    cached = await result_cache.get_async(cache_key)
+    if cached is not None:
+        return cached
+
+    try:
+        request = await asyncio.to_thread(_metadata_request, file_bytes, file_type)
+        response = await chat_completion(**request)
+        result = json.loads(response.choices[0].message.content)
+        await result_cache.set_async(cache_key, result)
+        return result
 
-        # Folosim formatul de mesaje OpenAI compatibil cu OpenRouter
-        response = client.chat.completions.create(
-            model="openai/gpt-4o",
-            response_format={"type": "json_object"},
-            messages=[
-                {
-                    "role": "system",
-                    "content": "Ești un operator de date ultra-precis. Răspunde doar în format JSON.",
-                },
-                {
-                    "role": "user",
-                    "content": [
-                        {"type": "text", "text": prompt_text},
-                        {
-                            "type": "image_url",
-                            "image_url": {
-                                "url": f"data:image/jpeg;base64,{base64_image}"
-                            },
-                        },
-                    ],
-                },
+    except Exception as e:
+        return _metadata_error(e)
+
+
+# ========================================
+# Task 2b: Analiză completă într-un singur apel (tip + validare + date)
+# ========================================
+# Sub acest prag de încredere refacem analiza pas cu pas
+# (detect_document_type → validate_id_card → extract_metadata)
+ANALYSIS_CONFIDENCE_THRESHOLD = float(os.getenv("ANALYSIS_CONFIDENCE_THRESHOLD", "0.75"))
+
+
+def _analysis_messages(file_bytes: bytes) -> list[dict]:
+    """Construiește mesajele pentru analiza completă a unui document imagine."""
+    data_curenta = datetime.now().strftime("%d.%m.%Y")
+
+    prompt_text = f"""Analizează imaginea documentului și fă, într-un singur răspuns, trei lucruri:
+
+1. CLASIFICARE – ce tip de document este:
+- "carte_identitate": Carte de identitate românească
+- "plan_cadastral": Plan cadastral, plan de situație, schiță cadastrală
+- "act_proprietate": Act de proprietate, extras CF (carte funciară), titlu de proprietate
+- "certificat_urbanism": Certificat de urbanism, autorizație de construire
+- "unknown": Nu pot determina sau alt tip de document
+Estimează și cât de sigur ești de tip, ca număr între 0 și 1.
+
+2. VALIDARE – doar pentru "carte_identitate": identifică data expirării (ZZ.LL.AAAA) și compar-o cu data curentă, {data_curenta}.
+Compară anul mai întâi, apoi luna, apoi ziua. Documentul este valid dacă data expirării >= data curentă.
+Mesaj: "Document valid" sau "EROARE: Cartea de identitate a expirat la data [zi.lună.anul]".
+Pentru celelalte tipuri, is_valid este true și message este "".
+
+3. EXTRAGERE DATE – în funcție de tip:
+* 'carte_identitate': nume, prenume, cnp, adresa_domiciliu
+* 'plan_cadastral': nr_cadastral, suprafata_masurata_mp
+* 'act_proprietate': nume_proprietar, adresa_imobil
+Ignoră câmpurile pe care nu le găsești. Pentru alte tipuri, extracted_data este {{}}.
+
+Răspunde doar în format JSON:
+{{"document_type": "tip", "confidence": 0.0-1.0, "is_valid": boolean, "message": "string", "extracted_data": {{...}}}}"""
+
+    return [
+        {
+            "role": "system",
+            "content": f"Ești un funcționar de la serviciul de urbanism și un operator de date ultra-precis. Data curentă este {data_curenta}. Răspunde doar în format JSON.",
+        },
+        {
+            "role": "user",
+            "content": [
+                {"type": "text", "text": prompt_text},
+                vision_image_content(file_bytes, "analysis"),
             ],
-        )
+        },
+    ]
 
-        result_text = response.choices[0].message.content
 
-        result = json.loads(result_text)
-        return result
+def _parse_analysis_result(result_text: str) -> dict:
+    """
+    Normalizează răspunsul analizei complete la structura
+    {"document_type", "confidence", "is_valid", "message", "extracted_data"}.
+    """
+    result = json.loads(result_text)
 
-    except json.JSONDecodeError:
-        return {"error": "Nu s-a putut procesa răspunsul AI."}
+    doc_type = result.get("document_type", "unknown")
+    if doc_type not in VALID_DOCUMENT_TYPES:
+        doc_type = "unknown"
+
+    try:
+        confidence = max(0.0, min(1.0, float(result.get("confidence", 0))))
+    except (TypeError, ValueError):
+        confidence = 0.0
+
+    is_valid = None
+    message = None
+    if doc_type == "carte_identitate":
+        if not isinstance(result.get("is_valid"), bool) or "message" not in result:
+            # Verdict lipsă → tratăm ca analiză nesigură
+            confidence = 0.0
+        is_valid = bool(result.get("is_valid", False))
+        message = result.get("message", "")
+
+    extracted_data = None
+    fields = METADATA_FIELDS.get(doc_type)
+    if fields:
+        raw = result.get("extracted_data") or {}
+        extracted_data = {k: v for k, v in raw.items() if k in fields} if isinstance(raw, dict) else {}
+
+    return {
+        "document_type": doc_type,
+        "confidence": confidence,
+        "is_valid": is_valid,
+        "message": message,
+        "extracted_data": extracted_data,
+        "mode": "combined",
+    }
+
+
+async def _analyze_document_per_step_async(file_bytes: bytes, filename: str = "") -> dict:
+    """Analiza clasică: clasificare, apoi validare + extragere în paralel."""
+    doc_type = await detect_document_type_async(file_bytes, filename)
+
+    validation_call = validate_id_card_async(file_bytes) if doc_type == "carte_identitate" else None
+    extraction_call = extract_metadata_async(file_bytes, doc_type) if METADATA_FIELDS.get(doc_type) else None
+
+    if validation_call and extraction_call:
+        validation_result, extracted_data = await asyncio.gather(validation_call, extraction_call)
+    elif extraction_call:
+        validation_result, extracted_data = None, await extraction_call
+    else:
+        validation_result, extracted_data = None, None
+
+    return {
+        "document_type": doc_type,
+        "confidence": None,
+        "is_valid": validation_result.get("is_valid", False) if validation_result else None,
+        "message": validation_result.get("message", "") if validation_result else None,
+        "extracted_data": extracted_data,
+        "mode": "per_step",
+    }
+
+
+async def analyze_document_async(file_bytes: bytes, filename: str = "") -> dict:
+    """
+    Clasifică, validează și extrage datele dintr-un document printr-un singur
+    apel vision, în loc de trei apeluri separate cu aceeași imagine.
+
+    PDF-urile și răspunsurile cu încredere sub ANALYSIS_CONFIDENCE_THRESHOLD
+    (sau invalide) trec prin pașii separați (detect_document_type_async,
+    validate_id_card_async, extract_metadata_async).
+
+    Args:
+        file_bytes: Bytes-urile fișierului
+        filename: Numele fișierului (pentru detectarea PDF-urilor)
+
+    Returns:
+        dict: {
+            "document_type": str,
+            "confidence": float | None,
+            "is_valid": bool | None,       # doar pentru carte_identitate
+            "message": str | None,         # doar pentru carte_identitate
+            "extracted_data": dict | None, # None pentru tipuri fără extragere
+            "mode": "combined" | "per_step"
+        }
+    """
+    if is_pdf_document(file_bytes, filename):
+        return await _analyze_document_per_step_async(file_bytes, filename)
+
+    # Conține și verdictul de valabilitate, deci cheia include data curentă
+    cache_key = make_key(
+        "analysis", ANALYSIS_PROMPT_VERSION, file_bytes, datetime.now().strftime("%Y-%m-%d")
+    )
+    cached = await result_cache.get_async(cache_key)
+    if cached is not None:
+        return cached
+
+    try:
+        messages = await asyncio.to_thread(_analysis_messages, file_bytes)
+        response = await chat_completion(**_json_request("openai/gpt-4o", messages))
+        analysis = _parse_analysis_result(response.choices[0].message.content)
+        if analysis["confidence"] >= ANALYSIS_CONFIDENCE_THRESHOLD:
+            if analysis["document_type"] != "unknown":
+                await result_cache.set_async(cache_key, analysis)
+            return analysis
+        print(
+            f"Document analysis confidence {analysis['confidence']:.2f} below "
+            f"{ANALYSIS_CONFIDENCE_THRESHOLD}, falling back to per-step analysis"
+        )
     except Exception as e:
-        return {"error": f"Eroare la extragerea datelor: {str(e)}"}
+        print(f"Combined document analysis failed, falling back to per-step analysis: {e}")
+
+    return await _analyze_document_per_step_async(file_bytes, filename)
 
 
 # ========================================
@@ -228,63 +511,70 @@ def create_embedding(text_chunk: str) -> list[float]:
         )
 
 
+def create_embeddings_batch(text_chunks: list[str]) -> list[list[float]]:
+    """
+    Creează vectorii de embedding pentru mai multe fragmente într-un singur
+    apel API (folosit la construirea offline a indexului vectorial).
+
+    Args:
+        text_chunks: Fragmentele de text
+
+    Returns:
+        list[list[float]]: Vectorii, în aceeași ordine ca fragmentele
+    """
+    try:
+        response = client.embeddings.create(
+            model="openai/text-embedding-3-small",
+            input=text_chunks,
+        )
+        return [item.embedding for item in sorted(response.data, key=lambda d: d.index)]
+
+    except Exception as e:
+        raise Exception(
+            f"Eroare la crearea vectorilor de embedding: {str(e)}"
+        )
+
+
 # ========================================
 # Task 4: Funcția Chatbot (RAG)
 # ========================================
-def get_rag_answer(
-    question: str, 
-    context_chunks: list[str], 
+def _rag_messages(
+    question: str,
+    context_chunks: list[str],
     conversation_context: Optional[dict] = None,
     conversation_history: Optional[list[dict]] = None
-) -> dict:
+) -> tuple[list[dict], dict]:
     """
-    Generează un răspuns la întrebarea utilizatorului folosind RAG
-    (Retrieval-Augmented Generation) prin OpenRouter.
-    
-    Args:
-        question: Întrebarea utilizatorului
-        context_chunks: Lista de fragmente de text relevante din
-                        documentele legale
-        conversation_context: Context despre procedura selectată și documente încărcate
-        conversation_history: Istoricul conversației (lista de mesaje anterioare)
-    
+    Construiește mesajele (prompt sistem + istoric + întrebare) pentru RAG.
+
     Returns:
-        dict: {
-            "answer": str,
-            "detected_procedure": str | None,
-            "detected_domain": str | None,
-            "needs_documents": bool,
-            "suggested_action": str
-        }
+        (messages, usage) – usage: token-urile folosite pe fiecare parte
     """
-    try:
-        context_text = "\n\n".join(context_chunks)
+    # Contextul conversației (dacă există)
+    context_info = ""
+    if conversation_context:
+        # Add detected domain to context
+        if conversation_context.get("detected_domain"):
+            context_info += f"\n\nDOMENIU DETECTAT ANTERIOR: {conversation_context['detected_domain']}"
+        
+        if conversation_context.get("procedure"):
+            context_info += f"\n\nPROCEDURĂ SELECTATĂ: {conversation_context['procedure']}"
+        if conversation_context.get("uploaded_documents"):
+            docs = ", ".join(conversation_context["uploaded_documents"])
+            context_info += f"\nDOCUMENTE ÎNCĂRCATE: {docs}"
         
-        # Contextul conversației (dacă există)
-        context_info = ""
-        if conversation_context:
-            # Add detected domain to context
-            if conversation_context.get("detected_domain"):
-                context_info += f"\n\nDOMENIU DETECTAT ANTERIOR: {conversation_context['detected_domain']}"
-            
-            if conversation_context.get("procedure"):
-                context_info += f"\n\nPROCEDURĂ SELECTATĂ: {conversation_context['procedure']}"
-            if conversation_context.get("uploaded_documents"):
-                docs = ", ".join(conversation_context["uploaded_documents"])
-                context_info += f"\nDOCUMENTE ÎNCĂRCATE: {docs}"
-            
-            # Add detailed document validation information
-            if conversation_context.get("documents_details"):
-                context_info += "\n\nDETALII DOCUMENTE ÎNCĂRCATE:"
-                for doc in conversation_context["documents_details"]:
-                    status_emoji = "✅" if doc["status"] == "approved" else "⏳" if doc["status"] == "pending" else "❌"
-                    context_info += f"\n  {status_emoji} {doc['filename']}"
-                    context_info += f"\n     Tip: {doc['type']}"
-                    context_info += f"\n     Status validare: {doc['status']}"
-                    if doc.get("validation_message"):
-                        context_info += f"\n     Mesaj: {doc['validation_message']}"
-
-        system_prompt = f"""Tu ești ADU (Asistentul Digital Universal) - un ghid prietenos și informat care ajută cetățenii din Timișoara să acceseze serviciile Primăriei.
+        # Add detailed document validation information
+        if conversation_context.get("documents_details"):
+            context_info += "\n\nDETALII DOCUMENTE ÎNCĂRCATE:"
+            for doc in conversation_context["documents_details"]:
+                status_emoji = "✅" if doc["status"] == "approved" else "⏳" if doc["status"] == "pending" else "❌"
+                context_info += f"\n  {status_emoji} {doc['filename']}"
+                context_info += f"\n     Tip: {doc['type']}"
+                context_info += f"\n     Status validare: {doc['status']}"
+                if doc.get("validation_message"):
+                    context_info += f"\n     Mesaj: {doc['validation_message']}"
+
+    system_prompt = f"""Tu ești ADU (Asistentul Digital Universal) - un ghid prietenos și informat care ajută cetățenii din Timișoara să acceseze serviciile Primăriei.
 
 🏛️ DOMENII DE SERVICII DISPONIBILE:
 
@@ -359,7 +649,8 @@ Răspunde ÎNTOTDEAUNA în format JSON valid:
     "suggested_action": "upload_documents" sau "answer_questions" sau "clarify_intent" sau "provide_info" sau "show_procedures"
 }}"""
 
-        user_prompt = f"""*Context Legal:*
+    def render_user_prompt(context_text: str) -> str:
+        return f"""*Context Legal:*
 ---
 {context_text}
 ---
@@ -368,47 +659,162 @@ Răspunde ÎNTOTDEAUNA în format JSON valid:
 *Întrebarea Utilizatorului:*
 {question}"""
 
-        # Construim lista de mesaje cu istoricul conversației
-        messages = [{"role": "system", "content": system_prompt}]
-        
-        # Adăugăm istoricul conversației (dacă există)
-        if conversation_history:
-            # Limităm la ultimele 10 mesaje pentru a nu depăși limita de token-uri
-            recent_history = conversation_history[-10:]
-            messages.extend(recent_history)
+    # Prompt sistem + istoric + întrebare, în limita de token-uri:
+    # chunk-urile duplicate și mesajele [SYSTEM] sunt eliminate, iar
+    # mesajele vechi care nu mai încap sunt rezumate
+    return build_messages(
+        system_prompt,
+        render_user_prompt,
+        context_chunks,
+        conversation_history,
+    )
+
+
+def _rag_request(
+    question: str,
+    context_chunks: list[str],
+    conversation_context: Optional[dict],
+    conversation_history: Optional[list[dict]],
+) -> dict:
+    """Apelul RAG (prompt construit în bugetul de token-uri), comun celor trei variante."""
+    messages, usage = _rag_messages(question, context_chunks, conversation_context, conversation_history)
+    _log_prompt_usage(usage)
+    # Folosim formatul de mesaje OpenAI compatibil cu OpenRouter
+    return _json_request("openai/gpt-4o", messages)
+
+
+def _log_prompt_usage(usage: dict) -> None:
+    # Doar când bugetul a tăiat ceva; altfel ar fi o linie la fiecare mesaj
+    if not usage["truncated"]:
+        return
+    print(
+        f"RAG prompt: {usage['total']}/{usage['budget']} tokens ({usage['tokenizer']}) - "
+        f"system {usage['system']}, question {usage['question']}, "
+        f"chunks {usage['chunks']} ({usage['chunks_used']} used, {usage['chunks_dropped']} dropped), "
+        f"history {usage['history']} ({usage['history_messages']} kept, {usage['history_dropped']} dropped), "
+        f"summary {usage['summary']}"
+    )
+
+
+def _parse_rag_result(result_text: str) -> dict:
+    """Parsează răspunsul RAG și completează câmpurile lipsă."""
+    result = json.loads(result_text)
+    
+    # Ensure all required fields are present
+    if "detected_domain" not in result:
+        result["detected_domain"] = None
+    if "detected_procedure" not in result:
+        result["detected_procedure"] = None
+    if "needs_documents" not in result:
+        result["needs_documents"] = False
+    if "suggested_action" not in result:
+        result["suggested_action"] = "answer_questions"
         
-        # Adăugăm mesajul curent
-        messages.append({"role": "user", "content": user_prompt})
-
-        # Folosim formatul de mesaje OpenAI compatibil cu OpenRouter
-        response = client.chat.completions.create(
-            model="openai/gpt-4o",
-            response_format={"type": "json_object"},
-            messages=messages,
+    return result
+
+
+def _rag_error(e: Exception) -> dict:
+    return {
+        "answer": f"Ne cerem scuze, dar a apărut o eroare tehnică: {str(e)}. Vă rugăm să încercați din nou.",
+        "detected_procedure": None,
+        "detected_domain": None,
+        "needs_documents": False,
+        "suggested_action": "retry"
+    }
+
+
+def get_rag_answer(
+    question: str, 
+    context_chunks: list[str], 
+    conversation_context: Optional[dict] = None,
+    conversation_history: Optional[list[dict]] = None
+) -> dict:
+    """
+    Generează un răspuns la întrebarea utilizatorului folosind RAG
+    (Retrieval-Augmented Generation) prin OpenRouter.
+    
+    Args:
+        question: Întrebarea utilizatorului
+        context_chunks: Lista de fragmente de text relevante din
+                        documentele legale
+        conversation_context: Context despre procedura selectată și documente încărcate
+        conversation_history: Istoricul conversației (lista de mesaje anterioare)
+    
+    Returns:
+        dict: {
+            "answer": str,
+            "detected_procedure": str | None,
+            "detected_domain": str | None,
+            "needs_documents": bool,
+            "suggested_action": str
+        }
+    """
+    try:
+        response = create_completion(
+            client, **_rag_request(question, context_chunks, conversation_context, conversation_history)
         )
 
-        result = json.loads(response.choices[0].message.content)
-        
-        # Ensure all required fields are present
-        if "detected_domain" not in result:
-            result["detected_domain"] = None
-        if "detected_procedure" not in result:
-            result["detected_procedure"] = None
-        if "needs_documents" not in result:
-            result["needs_documents"] = False
-        if "suggested_action" not in result:
-            result["suggested_action"] = "answer_questions"
-            
-        return result
+        return _parse_rag_result(response.choices[0].message.content)
 
     except Exception as e:
-        return {
-            "answer": f"Ne cerem scuze, dar a apărut o eroare tehnică: {str(e)}. Vă rugăm să încercați din nou.",
-            "detected_procedure": None,
-            "detected_domain": None,
-            "needs_documents": False,
-            "suggested_action": "retry"
-        }
+        return _rag_error(e)
+
+
+async def get_rag_answer_async(
+    question: str, 
+    context_chunks: list[str], 
+    conversation_context: Optional[dict] = None,
+    conversation_history: Optional[list[dict]] = None
+) -> dict:
+    """Varianta async a get_rag_answer (nu blochează event loop-ul)."""
+    try:
+        response = await chat_completion(
+            **_rag_request(question, context_chunks, conversation_context, conversation_history)
+        )
+        return _parse_rag_result(response.choices[0].message.content)
+
+    except Exception as e:
+        return _rag_error(e)
+
+
+def stream_rag_answer(
+    question: str,
+    context_chunks: list[str],
+    conversation_context: Optional[dict] = None,
+    conversation_history: Optional[list[dict]] = None
+) -> Iterator[tuple[str, Any]]:
+    """
+    Varianta în stream a get_rag_answer: textul câmpului "answer" este
+    trimis pe măsură ce îl generează modelul.
+
+    Yields:
+        ("answer_delta", str) – bucăți noi din răspuns, în ordine
+        ("result", dict)      – la final, ca get_rag_answer (answer complet,
+                                detected_procedure, detected_domain, ...)
+    """
+    try:
+        stream = client.chat.completions.create(
+            **_rag_request(question, context_chunks, conversation_context, conversation_history),
+            stream=True,
+        )
+
+        answer = JsonStringFieldStreamer("answer")
+        parts = []
+        for chunk in stream:
+            if not chunk.choices:
+                continue
+            text = chunk.choices[0].delta.content
+            if not text:
+                continue
+            parts.append(text)
+            delta = answer.feed(text)
+            if delta:
+                yield "answer_delta", delta
+
+        yield "result", _parse_rag_result("".join(parts))
+
+    except Exception as e:
+        yield "result", _rag_error(e)
 
 
 # ========================================
@@ -442,28 +848,15 @@ def create_query_embedding(query_text: str) -> list[float]:
 # ========================================
 # LLM1: Extractor de Reguli și Documente (Regulation Fetcher)
 # ========================================
-def extract_procedure_requirements(procedure_description: str, text_chunks: list[dict]) -> dict:
-    """
-    LLM1 - Extrage informații exacte despre cerințele documentelor dintr-un set de chunk-uri text.
+def _requirements_messages(procedure_description: str, text_chunks: list[dict]) -> list[dict]:
+    """Construiește mesajele pentru LLM1 (extragerea cerințelor)."""
+    # Construim contextul din chunk-uri
+    context_text = "\n\n".join([
+        f"[Sursa: {chunk.get('page_url', 'unknown')}]\n{chunk.get('text', '')}"
+        for chunk in text_chunks
+    ])
     
-    Acest model NU interacționează cu utilizatorul. Doar extrage date structurate.
-    
-    Args:
-        procedure_description: Descrierea procedurii (ex: "certificat de urbanism")
-        text_chunks: Lista de chunk-uri de text cu structura:
-                    [{"page_url": "...", "text": "..."}, ...]
-    
-    Returns:
-        dict: Structură JSON cu cerințele complete extrase
-    """
-    try:
-        # Construim contextul din chunk-uri
-        context_text = "\n\n".join([
-            f"[Sursa: {chunk.get('page_url', 'unknown')}]\n{chunk.get('text', '')}"
-            for chunk in text_chunks
-        ])
-        
-        system_prompt = """Titlu: LLM1 – Extractor de reguli și documente necesare
+    system_prompt = """Titlu: LLM1 – Extractor de reguli și documente necesare
 
 Rol:
 Ești un asistent specializat în extragerea de informații exacte din pagini web oficiale.
@@ -517,7 +910,7 @@ Reguli importante:
 - Păstrează informația structurată și concisă
 - Extrage EXACT ce scrie în text, fără interpretări"""
 
-        user_prompt = f"""Procedura căutată: {procedure_description}
+    user_prompt = f"""Procedura căutată: {procedure_description}
 
 Context din surse oficiale:
 ---
@@ -526,70 +919,100 @@ Context din surse oficiale:
 
 Extrage toate informațiile relevante despre cerințele documentelor pentru această procedură și returnează JSON structurat."""
 
-        response = client.chat.completions.create(
-            model="openai/gpt-4o",
-            response_format={"type": "json_object"},
-            messages=[
-                {"role": "system", "content": system_prompt},
-                {"role": "user", "content": user_prompt},
-            ],
-        )
+    return [
+        {"role": "system", "content": system_prompt},
+        {"role": "user", "content": user_prompt},
+    ]
+
+
+def _requirements_request(procedure_description: str, text_chunks: list[dict]) -> dict:
+    return _json_request("openai/gpt-4o", _requirements_messages(procedure_description, text_chunks))
 
-        result = json.loads(response.choices[0].message.content)
-        return result
 
-    except json.JSONDecodeError as e:
+def _requirements_store_key(procedure_description: str, text_chunks: list[dict]) -> str:
+    # Aceeași procedură cu aceleași surse → rezultatul salvat, fără apel LLM
+    return requirements_key(procedure_description, text_chunks, LLM1_PROMPT_VERSION)
+
+
+def _requirements_error(procedure_description: str, e: Exception) -> dict:
+    if isinstance(e, json.JSONDecodeError):
         return {
             "error": f"Eroare la parsarea răspunsului JSON: {str(e)}",
             "procedure_name": procedure_description,
             "required_documents": [],
             "uncertainties": ["Nu s-au putut extrage informații structurate"]
         }
+    return {
+        "error": f"Eroare la extragerea cerințelor: {str(e)}",
+        "procedure_name": procedure_description,
+        "required_documents": [],
+        "uncertainties": [str(e)]
+    }
+
+
+def extract_procedure_requirements(procedure_description: str, text_chunks: list[dict]) -> dict:
+    """
+    LLM1 - Extrage informații exacte despre cerințele documentelor dintr-un set de chunk-uri text.
+    
+    Acest model NU interacționează cu utilizatorul. Doar extrage date structurate.
+    
+    Args:
+        procedure_description: Descrierea procedurii (ex: "certificat de urbanism")
+        text_chunks: Lista de chunk-uri de text cu structura:
+                    [{"page_url": "...", "text": "..."}, ...]
+    
+    Returns:
+        dict: Structură JSON cu cerințele complete extrase
+    """
+    store_key = _requirements_store_key(procedure_description, text_chunks)
+    stored = requirements_store.get(store_key)
+    if stored is not None:
+        return stored
+
+    try:
+        response = create_completion(client, **_requirements_request(procedure_description, text_chunks))
+
+        result = json.loads(response.choices[0].message.content)
+        requirements_store.put(store_key, procedure_description, result)
+        return result
+
     except Exception as e:
-        return {
-            "error": f"Eroare la extragerea cerințelor: {str(e)}",
-            "procedure_name": procedure_description,
-            "required_documents": [],
-            "uncertainties": [str(e)]
-        }
+        return _requirements_error(procedure_description, e)
+
+
+async def extract_procedure_requirements_async(procedure_description: str, text_chunks: list[dict]) -> dict:
+    """Varianta async a extract_procedure_requirements (LLM1)."""
+    store_key = _requirements_store_key(procedure_description, text_chunks)
+    stored = await requirements_store.get_async(store_key)
+    if stored is not None:
+        return stored
+
+    try:
+        response = await chat_completion(**_requirements_request(procedure_description, text_chunks))
+        result = json.loads(response.choices[0].message.content)
+        await requirements_store.put_async(store_key, procedure_description, result)
+        return result
+
+    except Exception as e:
+        return _requirements_error(procedure_description, e)
 
 
 # ========================================
 # LLM2: Asistent Depunere și Validare Dosar (Dossier Assistant)
 # ========================================
-def validate_and_guide_dossier(
+def _dossier_messages(
     user_message: str,
     llm1_requirements: dict,
     existing_documents: list[dict] = None
-) -> dict:
-    """
-    LLM2 - Interacționează cu utilizatorul și îl ghidează în completarea dosarului.
-    
-    Args:
-        user_message: Mesajul utilizatorului
-        llm1_requirements: Structura JSON returnată de LLM1 cu cerințele
-        existing_documents: Lista documentelor deja încărcate:
-                          [{"doc_id": "...", "file_id": "...", "file_name": "..."}, ...]
+) -> list[dict]:
+    """Construiește mesajele pentru LLM2 (validarea dosarului)."""
+    existing_docs_text = ""
+    if existing_documents:
+        existing_docs_text = "\n\nDocumente deja încărcate de utilizator:\n"
+        for doc in existing_documents:
+            existing_docs_text += f"- {doc.get('doc_id')}: {doc.get('file_name')}\n"
     
-    Returns:
-        dict: {
-            "assistant_reply": str,  # Mesaj către utilizator
-            "action": {
-                "type": "ask_user_for_more_info | validate_documents | save_dossier",
-                "missing_documents": [],
-                "extra_documents": [],
-                "dossier": {} or null
-            }
-        }
-    """
-    try:
-        existing_docs_text = ""
-        if existing_documents:
-            existing_docs_text = "\n\nDocumente deja încărcate de utilizator:\n"
-            for doc in existing_documents:
-                existing_docs_text += f"- {doc.get('doc_id')}: {doc.get('file_name')}\n"
-        
-        system_prompt = """Titlu: LLM2 – Asistent depunere și validare dosar
+    system_prompt = """Titlu: LLM2 – Asistent depunere și validare dosar
 
 Rol:
 Ești un asistent care interacționează cu utilizatorul și îl ajută să își depună dosarul pentru o procedură specifică.
@@ -641,9 +1064,9 @@ Reguli importante:
 - Când toate documentele sunt complete și valide, setează action.type = "save_dossier"
 - Folosește timestamp-uri ISO 8601 pentru submitted_at"""
 
-        requirements_text = json.dumps(llm1_requirements, indent=2, ensure_ascii=False)
-        
-        user_prompt = f"""Cerințe oficiale pentru procedură (extrase de sistem):
+    requirements_text = json.dumps(llm1_requirements, indent=2, ensure_ascii=False)
+    
+    user_prompt = f"""Cerințe oficiale pentru procedură (extrase de sistem):
 ---
 {requirements_text}
 ---
@@ -654,49 +1077,44 @@ Mesajul utilizatorului:
 
 Analizează situația și răspunde utilizatorului în format JSON."""
 
-        response = client.chat.completions.create(
-            model="openai/gpt-4o",
-            response_format={"type": "json_object"},
-            messages=[
-                {"role": "system", "content": system_prompt},
-                {"role": "user", "content": user_prompt},
-            ],
-        )
+    return [
+        {"role": "system", "content": system_prompt},
+        {"role": "user", "content": user_prompt},
+    ]
 
-        result = json.loads(response.choices[0].message.content)
-        
-        # Validăm că răspunsul are structura corectă
-        if "assistant_reply" not in result or "action" not in result:
-            return {
-                "assistant_reply": "Ne cerem scuze, dar a apărut o eroare tehnică. Vă rugăm să încercați din nou.",
-                "action": {
-                    "type": "ask_user_for_more_info",
-                    "missing_documents": [],
-                    "extra_documents": [],
-                    "dossier": None
-                }
-            }
-        
-        # Asigurăm că action are câmpurile necesare
-        if "type" not in result["action"]:
-            result["action"]["type"] = "ask_user_for_more_info"
-        if "missing_documents" not in result["action"]:
-            result["action"]["missing_documents"] = []
-        if "extra_documents" not in result["action"]:
-            result["action"]["extra_documents"] = []
-        if "dossier" not in result["action"]:
-            result["action"]["dossier"] = None
-            
-        # Adăugăm timestamp dacă lipsește și action este save_dossier
-        if result["action"]["type"] == "save_dossier" and result["action"]["dossier"]:
-            if "submitted_at" not in result["action"]["dossier"]:
-                result["action"]["dossier"]["submitted_at"] = datetime.now().isoformat()
-        
-        return result
 
-    except json.JSONDecodeError as e:
+def _dossier_request(
+    user_message: str,
+    llm1_requirements: dict,
+    existing_documents: list[dict] = None
+) -> dict:
+    return _json_request("openai/gpt-4o", _dossier_messages(user_message, llm1_requirements, existing_documents))
+
+
+def _dossier_error(e: Exception) -> dict:
+    if isinstance(e, json.JSONDecodeError):
+        reply = f"Ne cerem scuze, dar a apărut o eroare la procesarea răspunsului: {str(e)}"
+    else:
+        reply = f"Ne cerem scuze, dar a apărut o eroare tehnică: {str(e)}. Vă rugăm să încercați din nou."
+    return {
+        "assistant_reply": reply,
+        "action": {
+            "type": "ask_user_for_more_info",
+            "missing_documents": [],
+            "extra_documents": [],
+            "dossier": None
+        }
+    }
+
+
+def _parse_dossier_result(result_text: str) -> dict:
+    """Parsează răspunsul LLM2 și completează câmpurile lipsă din action."""
+    result = json.loads(result_text)
+    
+    # Validăm că răspunsul are structura corectă
+    if "assistant_reply" not in result or "action" not in result:
         return {
-            "assistant_reply": f"Ne cerem scuze, dar a apărut o eroare la procesarea răspunsului: {str(e)}",
+            "assistant_reply": "Ne cerem scuze, dar a apărut o eroare tehnică. Vă rugăm să încercați din nou.",
             "action": {
                 "type": "ask_user_for_more_info",
                 "missing_documents": [],
@@ -704,13 +1122,72 @@ Analizează situația și răspunde utilizatorului în format JSON."""
                 "dossier": None
             }
         }
-    except Exception as e:
-        return {
-            "assistant_reply": f"Ne cerem scuze, dar a apărut o eroare tehnică: {str(e)}. Vă rugăm să încercați din nou.",
+    
+    # Asigurăm că action are câmpurile necesare
+    if "type" not in result["action"]:
+        result["action"]["type"] = "ask_user_for_more_info"
+    if "missing_documents" not in result["action"]:
+        result["action"]["missing_documents"] = []
+    if "extra_documents" not in result["action"]:
+        result["action"]["extra_documents"] = []
+    if "dossier" not in result["action"]:
+        result["action"]["dossier"] = None
+        
+    # Adăugăm timestamp dacă lipsește și action este save_dossier
+    if result["action"]["type"] == "save_dossier" and result["action"]["dossier"]:
+        if "submitted_at" not in result["action"]["dossier"]:
+            result["action"]["dossier"]["submitted_at"] = datetime.now().isoformat()
+    
+    return result
+
+
+def validate_and_guide_dossier(
+    user_message: str,
+    llm1_requirements: dict,
+    existing_documents: list[dict] = None
+) -> dict:
+    """
+    LLM2 - Interacționează cu utilizatorul și îl ghidează în completarea dosarului.
+    
+    Args:
+        user_message: Mesajul utilizatorului
+        llm1_requirements: Structura JSON returnată de LLM1 cu cerințele
+        existing_documents: Lista documentelor deja încărcate:
+                          [{"doc_id": "...", "file_id": "...", "file_name": "..."}, ...]
+    
+    Returns:
+        dict: {
+            "assistant_reply": str,  # Mesaj către utilizator
             "action": {
-                "type": "ask_user_for_more_info",
+                "type": "ask_user_for_more_info | validate_documents | save_dossier",
                 "missing_documents": [],
                 "extra_documents": [],
-                "dossier": None
+                "dossier": {} or null
             }
-        }
\ No newline at end of file
+        }
+    """
+    try:
+        response = create_completion(
+            client, **_dossier_request(user_message, llm1_requirements, existing_documents)
+        )
+
+        return _parse_dossier_result(response.choices[0].message.content)
+
+    except Exception as e:
+        return _dossier_error(e)
+
+
+async def validate_and_guide_dossier_async(
+    user_message: str,
+    llm1_requirements: dict,
+    existing_documents: list[dict] = None
+) -> dict:
+    """Varianta async a validate_and_guide_dossier (LLM2)."""
+    try:
+        response = await chat_completion(
+            **_dossier_request(user_message, llm1_requirements, existing_documents)
+        )
+        return _parse_dossier_result(response.choices[0].message.content)
+
+    except Exception as e:
+        return _dossier_error(e)
@@ -0,0 +1,206 @@
+"""
+Answer Cache - Semantic cache for RAG chatbot answers
+
+Majoritatea cetățenilor pun aceleași câteva întrebări ("Cum obțin un
+certificat de urbanism?"). Un răspuns este refolosit dacă:
+    1. chunk-urile găsite la căutare sunt exact aceleași,
+    2. contextul conversației (procedură, documente, ultimele mesaje) e identic,
+    3. embedding-ul întrebării are similaritate cosinus >= ANSWER_CACHE_THRESHOLD
+       cu întrebarea din cache.
+
+Cache-ul se golește automat când corpus-ul local este reîncărcat
+(knowledge_corpus.corpus.version se schimbă).
+
+Practic, cache-ul servește doar prima întrebare dintr-o conversație: după
+primul mesaj, ultimele mesaje din istoric (parte din cheie) diferă de la un
+utilizator la altul. /chatbot îl folosește deci doar pentru prima tură
+(is_first_turn) și doar când există deja embedding-ul întrebării, calculat
+pentru căutarea în indexul vectorial (fără un apel de embedding în plus).
+
+Configurare (opțional, în .env):
+    ANSWER_CACHE_THRESHOLD=0.95
+    ANSWER_CACHE_TTL=3600
+    ANSWER_CACHE_MAX_ENTRIES=1024
+"""
+
+import hashlib
+import itertools
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Sequence
+
+import numpy as np
+
+
+ANSWER_CACHE_THRESHOLD = float(os.getenv("ANSWER_CACHE_THRESHOLD", "0.95"))
+ANSWER_CACHE_TTL = float(os.getenv("ANSWER_CACHE_TTL", "3600"))
+ANSWER_CACHE_MAX_ENTRIES = int(os.getenv("ANSWER_CACHE_MAX_ENTRIES", "1024"))
+
+# Câte mesaje din istoric intră în cheie (răspunsul depinde de ele)
+ANSWER_CACHE_HISTORY_MESSAGES = 2
+
+
+def normalize_embedding(embedding: Sequence[float]) -> np.ndarray:
+    """L2-normalized float32 copy of an embedding."""
+    vector = np.asarray(embedding, dtype=np.float32)
+    norm = np.linalg.norm(vector)
+    return vector / norm if norm else vector
+
+
+def _dialogue(conversation_history: Optional[List[dict]]) -> List[dict]:
+    return [
+        {"role": msg.get("role"), "content": msg.get("content")}
+        for msg in (conversation_history or [])
+        if not msg.get("content", "").startswith("[SYSTEM]")
+    ]
+
+
+def is_first_turn(conversation_history: Optional[List[dict]]) -> bool:
+    """True when the conversation has no earlier user/assistant messages."""
+    return not _dialogue(conversation_history)
+
+
+def context_key(
+    context_chunks: Sequence[str],
+    conversation_context: Optional[dict] = None,
+    conversation_history: Optional[List[dict]] = None,
+) -> str:
+    """
+    Hash of everything besides the question that the answer depends on:
+    the retrieved chunks, the procedure/documents context and the last
+    ANSWER_CACHE_HISTORY_MESSAGES messages of the conversation.
+    """
+    history = _dialogue(conversation_history)[-ANSWER_CACHE_HISTORY_MESSAGES:]
+    payload = json.dumps(
+        {
+            "chunks": [hashlib.sha1(c.encode("utf-8")).hexdigest() for c in context_chunks],
+            "context": conversation_context or {},
+            "history": history,
+        },
+        sort_keys=True,
+        ensure_ascii=False,
+        default=str,
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+@dataclass
+class _Entry:
+    embedding: np.ndarray
+    answer: dict
+    expires_at: float
+
+
+class SemanticAnswerCache:
+    """
+    Answers grouped by context_key; inside a group the closest question
+    embedding above the threshold wins. Oldest entries are evicted first.
+    """
+
+    def __init__(
+        self,
+        threshold: float = ANSWER_CACHE_THRESHOLD,
+        ttl: float = ANSWER_CACHE_TTL,
+        max_entries: int = ANSWER_CACHE_MAX_ENTRIES,
+    ):
+        self.threshold = threshold
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._groups: Dict[str, Dict[int, _Entry]] = {}
+        self._order: "OrderedDict[int, str]" = OrderedDict()
+        self._ids = itertools.count()
+        self._corpus_version: Optional[int] = None
+        self.hits = 0
+        self.misses = 0
+
+    def _check_version(self, corpus_version: Optional[int]) -> None:
+        # Apelat sub lock: corpus reîncărcat → răspunsurile vechi nu mai sunt valabile
+        if corpus_version != self._corpus_version:
+            self._groups.clear()
+            self._order.clear()
+            self._corpus_version = corpus_version
+
+    def _remove(self, entry_id: int) -> None:
+        key = self._order.pop(entry_id)
+        group = self._groups[key]
+        del group[entry_id]
+        if not group:
+            del self._groups[key]
+
+    def get(
+        self,
+        query_embedding: Sequence[float],
+        key: str,
+        corpus_version: Optional[int] = None,
+    ) -> Optional[dict]:
+        """
+        Cached answer for a question similar to this one asked in the same
+        context, or None.
+        """
+        query = normalize_embedding(query_embedding)
+        now = time.monotonic()
+        with self._lock:
+            self._check_version(corpus_version)
+            best_id, best_sim = None, self.threshold
+            for entry_id, entry in list(self._groups.get(key, {}).items()):
+                if entry.expires_at <= now:
+                    self._remove(entry_id)
+                    continue
+                if entry.embedding.shape != query.shape:
+                    continue
+                sim = float(entry.embedding @ query)
+                if sim >= best_sim:
+                    best_id, best_sim = entry_id, sim
+
+            if best_id is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            return dict(self._groups[key][best_id].answer)
+
+    def put(
+        self,
+        query_embedding: Sequence[float],
+        key: str,
+        answer: dict,
+        corpus_version: Optional[int] = None,
+    ) -> None:
+        """Store an answer (error/retry answers are not cached)."""
+        if not answer.get("answer") or answer.get("suggested_action") == "retry":
+            return
+        entry = _Entry(
+            embedding=normalize_embedding(query_embedding),
+            answer=dict(answer),
+            expires_at=time.monotonic() + self.ttl,
+        )
+        with self._lock:
+            self._check_version(corpus_version)
+            entry_id = next(self._ids)
+            self._groups.setdefault(key, {})[entry_id] = entry
+            self._order[entry_id] = key
+            while len(self._order) > self.max_entries:
+                self._remove(next(iter(self._order)))
+
+    def clear(self) -> None:
+        with self._lock:
+            self._groups.clear()
+            self._order.clear()
+
+    def stats(self) -> dict:
+        return {
+            "entries": len(self._order),
+            "max_entries": self.max_entries,
+            "threshold": self.threshold,
+            "ttl": self.ttl,
+            "hits": self.hits,
+            "misses": self.misses,
+        }
+
+
+# Instanța partajată de toată aplicația
+answer_cache = SemanticAnswerCache()
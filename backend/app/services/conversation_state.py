@@ -0,0 +1,248 @@
+"""
+Conversation State - Per-user chatbot state kept server-side
+
+Pentru fiecare utilizator păstrăm ultimele mesaje, domeniul detectat și
+procedura selectată, ca /chatbot să nu mai citească chat_messages la fiecare
+mesaj. Starea este actualizată write-through: întâi în cache, apoi mesajele
+sunt scrise în baza de date (în fundal). Baza de date rămâne sursa de
+adevăr; o citim doar când utilizatorul nu e în cache.
+
+Mesajele scrise direct în chat_messages de frontend (ChatService.saveMessage
+dublează turele pe care /chatbot le înregistrează deja) nu trec prin cache:
+o modificare făcută doar acolo devine vizibilă după cel mult
+CONVERSATION_CACHE_TTL.
+
+Două niveluri, ca result_cache:
+    1. LRU în proces (CONVERSATION_CACHE_MAX_USERS, CONVERSATION_CACHE_TTL)
+    2. Redis (opțional, REDIS_URL), partajat între workeri
+"""
+
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import asdict, dataclass, field
+from typing import Callable, Dict, List, Optional
+
+import redis
+
+
+CONVERSATION_CACHE_MAX_USERS = int(os.getenv("CONVERSATION_CACHE_MAX_USERS", "5000"))
+CONVERSATION_CACHE_TTL = float(os.getenv("CONVERSATION_CACHE_TTL", "1800"))
+REDIS_URL = os.getenv("REDIS_URL")
+
+# Câte mesaje din istoric păstrăm (la fel ca limita query-ului vechi)
+CONVERSATION_HISTORY_LIMIT = 20
+
+# Markerul vechi, salvat ca mesaj separat înainte de coloana metadata
+LEGACY_DOMAIN_MARKER = "[SYSTEM] CONTEXT: Domain detected"
+
+_KEY_PREFIX = "cityfix:conv"
+
+
+@dataclass
+class ConversationState:
+    history: List[Dict[str, str]] = field(default_factory=list)
+    detected_domain: Optional[str] = None
+    procedure: Optional[str] = None
+
+
+def state_from_rows(rows: List[dict]) -> ConversationState:
+    """
+    Build the state from chat_messages rows (oldest first).
+
+    The domain comes from the `metadata` column; rows written before it
+    existed still carry the "[SYSTEM] CONTEXT: Domain detected = X" marker.
+    """
+    state = ConversationState()
+    for row in rows:
+        content = row.get("content") or ""
+        metadata = row.get("metadata") or {}
+        if content.startswith(LEGACY_DOMAIN_MARKER):
+            state.detected_domain = content.split("=")[-1].strip() or state.detected_domain
+            continue
+        if metadata.get("detected_domain"):
+            state.detected_domain = metadata["detected_domain"]
+        if metadata.get("procedure"):
+            state.procedure = metadata["procedure"]
+        state.history.append({"role": row["role"], "content": content})
+    state.history = state.history[-CONVERSATION_HISTORY_LIMIT:]
+    return state
+
+
+def _append_turn(
+    current: ConversationState,
+    messages: List[Dict[str, str]],
+    detected_domain: Optional[str],
+    procedure: Optional[str],
+) -> ConversationState:
+    return ConversationState(
+        history=(current.history + list(messages))[-CONVERSATION_HISTORY_LIMIT:],
+        detected_domain=detected_domain or current.detected_domain,
+        procedure=procedure or current.procedure,
+    )
+
+
+class ConversationStateStore:
+    """LRU of ConversationState by user_id, with an optional Redis tier."""
+
+    def __init__(
+        self,
+        max_users: int = CONVERSATION_CACHE_MAX_USERS,
+        ttl: float = CONVERSATION_CACHE_TTL,
+        redis_url: Optional[str] = REDIS_URL,
+    ):
+        self.max_users = max_users
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._states: "OrderedDict[str, tuple[float, ConversationState]]" = OrderedDict()
+        self._redis = redis.Redis.from_url(redis_url, socket_timeout=0.5) if redis_url else None
+        self.hits = 0
+        self.misses = 0
+
+    def _redis_key(self, user_id: str) -> str:
+        return f"{_KEY_PREFIX}:{user_id}"
+
+    def _memory_set(self, user_id: str, state: ConversationState) -> None:
+        # Apelat sub lock
+        self._states[user_id] = (time.monotonic() + self.ttl, state)
+        self._states.move_to_end(user_id)
+        while len(self._states) > self.max_users:
+            self._states.popitem(last=False)
+
+    def _memory_put(self, user_id: str, state: ConversationState) -> None:
+        with self._lock:
+            self._memory_set(user_id, state)
+
+    def _memory_get(self, user_id: str) -> Optional[ConversationState]:
+        # Apelat sub lock
+        entry = self._states.get(user_id)
+        return entry[1] if entry is not None and entry[0] > time.monotonic() else None
+
+    def get(self, user_id: str) -> Optional[ConversationState]:
+        with self._lock:
+            state = self._memory_get(user_id)
+            if state is not None:
+                self._states.move_to_end(user_id)
+                self.hits += 1
+                return state
+
+        if self._redis is not None:
+            try:
+                raw = self._redis.get(self._redis_key(user_id))
+            except redis.RedisError as e:
+                print(f"Warning: Conversation state Redis unavailable: {e}")
+                raw = None
+            if raw is not None:
+                state = ConversationState(**json.loads(raw))
+                self._memory_put(user_id, state)
+                self.hits += 1
+                return state
+
+        self.misses += 1
+        return None
+
+    def _redis_value(self, state: ConversationState) -> str:
+        return json.dumps(asdict(state), ensure_ascii=False)
+
+    def put(self, user_id: str, state: ConversationState) -> None:
+        self._memory_put(user_id, state)
+        if self._redis is not None:
+            try:
+                self._redis.set(self._redis_key(user_id), self._redis_value(state), ex=max(1, int(self.ttl)))
+            except redis.RedisError as e:
+                print(f"Warning: Conversation state Redis unavailable: {e}")
+
+    def load(self, user_id: str, fetch_rows: Callable[[], List[dict]]) -> ConversationState:
+        """Cached state, or the state rebuilt from the database rows on a miss."""
+        state = self.get(user_id)
+        if state is None:
+            state = state_from_rows(fetch_rows())
+            self.put(user_id, state)
+        return state
+
+    def record_turn(
+        self,
+        user_id: str,
+        messages: List[Dict[str, str]],
+        fetch_rows: Callable[[], List[dict]],
+        detected_domain: Optional[str] = None,
+        procedure: Optional[str] = None,
+    ) -> ConversationState:
+        """
+        Append a turn to the cached state (the database write is done by the caller).
+
+        On a miss the state is first rebuilt from the database rows, as in
+        load(): starting from an empty state would cache only this turn and
+        hide the user's earlier history until the entry expires.
+
+        The read-modify-write is atomic: under the lock in process and with
+        WATCH/MULTI in Redis, so two concurrent turns of the same user
+        (/chatbot and /chatbot/stream) don't overwrite each other.
+        """
+        if self._redis is not None:
+            try:
+                return self._record_turn_redis(user_id, messages, fetch_rows, detected_domain, procedure)
+            except redis.RedisError as e:
+                print(f"Warning: Conversation state Redis unavailable: {e}")
+
+        with self._lock:
+            cached = self._memory_get(user_id)
+        # Baza de date e citită în afara lock-ului
+        stored = state_from_rows(fetch_rows()) if cached is None else None
+
+        with self._lock:
+            current = self._memory_get(user_id) or stored or cached
+            state = _append_turn(current, messages, detected_domain, procedure)
+            self._memory_set(user_id, state)
+        return state
+
+    def _record_turn_redis(
+        self,
+        user_id: str,
+        messages: List[Dict[str, str]],
+        fetch_rows: Callable[[], List[dict]],
+        detected_domain: Optional[str],
+        procedure: Optional[str],
+    ) -> ConversationState:
+        key = self._redis_key(user_id)
+        stored = None
+        with self._redis.pipeline() as pipe:
+            while True:
+                try:
+                    pipe.watch(key)
+                    raw = pipe.get(key)
+                    if raw is not None:
+                        current = ConversationState(**json.loads(raw))
+                    else:
+                        with self._lock:
+                            current = self._memory_get(user_id)
+                        if current is None:
+                            if stored is None:
+                                stored = state_from_rows(fetch_rows())
+                            current = stored
+                    state = _append_turn(current, messages, detected_domain, procedure)
+                    pipe.multi()
+                    pipe.set(key, self._redis_value(state), ex=max(1, int(self.ttl)))
+                    pipe.execute()
+                    break
+                except redis.WatchError:
+                    # Alt worker a scris între timp: recitim și reaplicăm
+                    continue
+        self._memory_put(user_id, state)
+        return state
+
+    def stats(self) -> dict:
+        return {
+            "users": len(self._states),
+            "max_users": self.max_users,
+            "ttl": self.ttl,
+            "hits": self.hits,
+            "misses": self.misses,
+            "redis": self._redis is not None,
+        }
+
+
+# Instanța partajată de toată aplicația
+conversation_store = ConversationStateStore()
@@ -2,13 +2,18 @@
 Document Classifier - Uses AI to detect document types
 """
 
-import base64
+import asyncio
 from openai import OpenAI
 import os
 import json
 import io
 from PyPDF2 import PdfReader
 
+from app.services.image_preprocessing import vision_image_content
+from app.services.llm_client import chat_completion
+from app.services.result_cache import make_key, result_cache
+from app.services.single_flight import create_completion
+
 
 OPENROUTER_API_KEY = os.getenv("OPENROUTER_API_KEY")
 client = OpenAI(
@@ -31,6 +36,82 @@ def extract_text_from_pdf(file_bytes: bytes) -> str:
         return ""
 
 
+CLASSIFIER_SYSTEM_PROMPT_PDF = """Ești un clasificator de documente pentru urbanism în România. 
+Analizează textul extras din document și determină ce tip de document este.
+
+Tipuri posibile:
+- "carte_identitate": Carte de identitate românească (ID card)
+- "plan_cadastral": Plan cadastral, plan de situație, schiță cadastrală
+- "act_proprietate": Act de proprietate, extras CF (carte funciară), titlu de proprietate
+- "certificat_urbanism": Certificat de urbanism, autorizație de construire
+- "unknown": Nu pot determina sau alt tip de document
+
+Răspunde DOAR în format JSON: {"document_type": "tip"}"""
+
+CLASSIFIER_SYSTEM_PROMPT_IMAGE = """Ești un clasificator de documente pentru urbanism în România. 
+Analizează imaginea și determină ce tip de document este.
+
+Tipuri posibile:
+- "carte_identitate": Carte de identitate românească (ID card)
+- "plan_cadastral": Plan cadastral, plan de situație, schiță cadastrală
+- "act_proprietate": Act de proprietate, extras CF (carte funciară), titlu de proprietate
+- "certificat_urbanism": Certificat de urbanism, autorizație de construire
+- "unknown": Nu pot determina sau alt tip de document
+
+Răspunde DOAR în format JSON: {"document_type": "tip"}"""
+
+# Crește versiunea când se schimbă prompturile de mai sus (invalidează cache-ul)
+CLASSIFIER_PROMPT_VERSION = "1"
+
+VALID_DOCUMENT_TYPES = ["carte_identitate", "plan_cadastral", "act_proprietate", "certificat_urbanism"]
+
+
+def is_pdf_document(file_bytes: bytes, filename: str = "") -> bool:
+    """Check if a file is a PDF based on filename or magic bytes."""
+    return (filename or "").lower().endswith('.pdf') or file_bytes[:4] == b'%PDF'
+
+
+def _pdf_classification_messages(text_content: str) -> list:
+    return [
+        {
+            "role": "system",
+            "content": CLASSIFIER_SYSTEM_PROMPT_PDF
+        },
+        {
+            "role": "user",
+            "content": f"Ce tip de document este acesta?\n\nConținut:\n{text_content[:3000]}"  # Limit to first 3000 chars
+        },
+    ]
+
+
+def _image_classification_messages(file_bytes: bytes) -> list:
+    return [
+        {
+            "role": "system",
+            "content": CLASSIFIER_SYSTEM_PROMPT_IMAGE
+        },
+        {
+            "role": "user",
+            "content": [
+                {"type": "text", "text": "Ce tip de document este acesta?"},
+                vision_image_content(file_bytes, "classify"),
+            ],
+        },
+    ]
+
+
+def _parse_document_type(result_text: str) -> str:
+    result = json.loads(result_text)
+    
+    doc_type = result.get("document_type", "unknown")
+    
+    # Normalize to expected values
+    if doc_type in VALID_DOCUMENT_TYPES:
+        return doc_type
+    else:
+        return "unknown"
+
+
 def detect_document_type(file_bytes: bytes, filename: str = "") -> str:
     """
     Uses AI to detect what type of document this is.
@@ -42,90 +123,76 @@ def detect_document_type(file_bytes: bytes, filename: str = "") -> str:
     - "act_proprietate" (Property deed)
     - "certificat_urbanism" (Urban planning certificate)
     - "unknown" (Cannot determine)
+    
+    Results for the same file content are served from result_cache.
     """
+    cache_key = make_key("document_type", CLASSIFIER_PROMPT_VERSION, file_bytes)
+    cached = result_cache.get(cache_key)
+    if cached is not None:
+        return cached
+    
     try:
-        # Check if it's a PDF based on filename or magic bytes
-        is_pdf = filename.lower().endswith('.pdf') or file_bytes[:4] == b'%PDF'
-        
-        if is_pdf:
+        if is_pdf_document(file_bytes, filename):
             # For PDFs, extract text and use text-based classification
             text_content = extract_text_from_pdf(file_bytes)
             
             if not text_content:
                 return "unknown"
             
-            response = client.chat.completions.create(
-                model="gpt-4o-mini",
-                response_format={"type": "json_object"},
-                messages=[
-                    {
-                        "role": "system",
-                        "content": """Ești un clasificator de documente pentru urbanism în România. 
-Analizează textul extras din document și determină ce tip de document este.
-
-Tipuri posibile:
-- "carte_identitate": Carte de identitate românească (ID card)
-- "plan_cadastral": Plan cadastral, plan de situație, schiță cadastrală
-- "act_proprietate": Act de proprietate, extras CF (carte funciară), titlu de proprietate
-- "certificat_urbanism": Certificat de urbanism, autorizație de construire
-- "unknown": Nu pot determina sau alt tip de document
-
-Răspunde DOAR în format JSON: {"document_type": "tip"}"""
-                    },
-                    {
-                        "role": "user",
-                        "content": f"Ce tip de document este acesta?\n\nConținut:\n{text_content[:3000]}"  # Limit to first 3000 chars
-                    },
-                ],
-            )
+            messages = _pdf_classification_messages(text_content)
         else:
             # For images, use vision API
-            base64_image = base64.b64encode(file_bytes).decode("utf-8")
+            messages = _image_classification_messages(file_bytes)
+        
+        response = create_completion(
+            client,
+            model="gpt-4o-mini",
+            response_format={"type": "json_object"},
+            messages=messages,
+        )
+        
+        doc_type = _parse_document_type(response.choices[0].message.content)
+        if doc_type != "unknown":
+            result_cache.set(cache_key, doc_type)
+        return doc_type
             
-            response = client.chat.completions.create(
-                model="gpt-4o-mini",
-                response_format={"type": "json_object"},
-                messages=[
-                    {
-                        "role": "system",
-                        "content": """Ești un clasificator de documente pentru urbanism în România. 
-Analizează imaginea și determină ce tip de document este.
+    except Exception as e:
+        print(f"Error detecting document type: {e}")
+        return "unknown"
 
-Tipuri posibile:
-- "carte_identitate": Carte de identitate românească (ID card)
-- "plan_cadastral": Plan cadastral, plan de situație, schiță cadastrală
-- "act_proprietate": Act de proprietate, extras CF (carte funciară), titlu de proprietate
-- "certificat_urbanism": Certificat de urbanism, autorizație de construire
-- "unknown": Nu pot determina sau alt tip de document
 
-Răspunde DOAR în format JSON: {"document_type": "tip"}"""
-                    },
-                    {
-                        "role": "user",
-                        "content": [
-                            {"type": "text", "text": "Ce tip de document este acesta?"},
-                            {
-                                "type": "image_url",
-                                "image_url": {
-                                    "url": f"data:image/jpeg;base64,{base64_image}"
-                                },
-                            },
-                        ],
-                    },
-                ],
-            )
-        
-        result_text = response.choices[0].message.content
-        result = json.loads(result_text)
+async def detect_document_type_async(file_bytes: bytes, filename: str = "") -> str:
+    """
+    Async version of detect_document_type, for the async upload endpoints.
+    PDF text extraction runs in a worker thread; the LLM call goes through
+    the shared async client (llm_client).
+    """
+    cache_key = make_key("document_type", CLASSIFIER_PROMPT_VERSION, file_bytes)
+    cached = await result_cache.get_async(cache_key)
+    if cached is not None:
+        return cached
+    
+    try:
+        if is_pdf_document(file_bytes, filename):
+            text_content = await asyncio.to_thread(extract_text_from_pdf, file_bytes)
+            
+            if not text_content:
+                return "unknown"
+            
+            messages = _pdf_classification_messages(text_content)
+        else:
+            messages = await asyncio.to_thread(_image_classification_messages, file_bytes)
         
-        doc_type = result.get("document_type", "unknown")
+        response = await chat_completion(
+            model="gpt-4o-mini",
+            response_format={"type": "json_object"},
+            messages=messages,
+        )
         
-        # Normalize to expected values
-        valid_types = ["carte_identitate", "plan_cadastral", "act_proprietate", "certificat_urbanism"]
-        if doc_type in valid_types:
-            return doc_type
-        else:
-            return "unknown"
+        doc_type = _parse_document_type(response.choices[0].message.content)
+        if doc_type != "unknown":
+            await result_cache.set_async(cache_key, doc_type)
+        return doc_type
             
     except Exception as e:
         print(f"Error detecting document type: {e}")
@@ -0,0 +1,220 @@
+"""
+Image Preprocessing - Shrink document photos before vision calls
+
+Pozele făcute cu telefonul (12 MP, 3-6 MB) și scanările PNG erau trimise
+întregi, în base64, mereu etichetate image/jpeg. Modelul oricum le
+redimensionează: cu detail="high" la cel mult 2048 px pe latura lungă și
+768 px pe cea scurtă, cu detail="low" la 512 x 512. Le pregătim noi, înainte
+de apel:
+    1. detectăm formatul real (Pillow),
+    2. rotim după EXIF (pozele de pe telefon),
+    3. tăiem marginile uniforme (fundalul scanerului / al mesei),
+    4. micșorăm la rezoluția folosită de model pentru sarcina respectivă,
+    5. re-encodăm compact (JPEG sau WebP).
+
+Fiecare sarcină are un profil (detail + rezoluție), iar extragerea datelor
+poate avea o rezoluție specifică tipului de document.
+
+Configurare (opțional, în .env):
+    VISION_IMAGE_FORMAT=jpeg   (sau webp)
+    VISION_IMAGE_QUALITY=85
+"""
+
+import base64
+import io
+import math
+import os
+from dataclasses import dataclass
+from typing import Optional
+
+from PIL import Image, ImageChops, ImageOps, UnidentifiedImageError
+
+
+VISION_IMAGE_FORMAT = os.getenv("VISION_IMAGE_FORMAT", "jpeg").lower()
+VISION_IMAGE_QUALITY = int(os.getenv("VISION_IMAGE_QUALITY", "85"))
+
+# Pixeli mai apropiați de culoarea colțului decât pragul sunt considerați fundal
+CROP_BACKGROUND_THRESHOLD = 24
+# Nu tăiem dacă ar rămâne sub această fracțiune din imagine (probabil o greșeală)
+CROP_MIN_AREA_FRACTION = 0.25
+CROP_PADDING_FRACTION = 0.02
+# Marginile sunt căutate pe o copie micșorată (latura lungă ≈ atâția pixeli)
+CROP_PROBE_SIZE = 512
+
+# Cu detail="high", modelul taxează imaginea pe plăci de 512 px; o latură care
+# depășește un multiplu de 512 cu cel mult atâția pixeli este micșorată la el
+VISION_TILE_SIZE = 512
+VISION_TILE_SLACK = 64
+
+EXIF_ORIENTATION_TAG = 0x0112
+
+_FORMAT_MIME_TYPES = {
+    "JPEG": "image/jpeg",
+    "PNG": "image/png",
+    "WEBP": "image/webp",
+    "GIF": "image/gif",
+}
+
+
+@dataclass(frozen=True)
+class VisionProfile:
+    detail: str
+    max_long_side: int
+    max_short_side: int
+
+
+# Profilul fiecărei sarcini vision
+VISION_TASK_PROFILES = {
+    # Tipul documentului se recunoaște și la rezoluție mică
+    "classify": VisionProfile(detail="low", max_long_side=512, max_short_side=512),
+    # Data expirării de pe buletin trebuie citită exact
+    "id_card": VisionProfile(detail="high", max_long_side=1536, max_short_side=768),
+    "metadata": VisionProfile(detail="high", max_long_side=2048, max_short_side=768),
+    "analysis": VisionProfile(detail="high", max_long_side=2048, max_short_side=768),
+}
+
+# Rezoluția pentru extragerea datelor, după tipul documentului
+DOCUMENT_TYPE_PROFILES = {
+    # Buletinul e mic: 768 px pe latura scurtă e deja peste rezoluția lui utilă
+    "carte_identitate": VisionProfile(detail="high", max_long_side=1536, max_short_side=768),
+    # Planurile au cifre mici (nr. cadastral, suprafețe): rezoluția maximă a modelului
+    "plan_cadastral": VisionProfile(detail="high", max_long_side=2048, max_short_side=768),
+    "act_proprietate": VisionProfile(detail="high", max_long_side=2048, max_short_side=768),
+}
+
+
+@dataclass(frozen=True)
+class PreparedImage:
+    data: bytes
+    mime_type: str
+    width: int
+    height: int
+    detail: str
+
+    @property
+    def data_url(self) -> str:
+        return f"data:{self.mime_type};base64,{base64.b64encode(self.data).decode('utf-8')}"
+
+
+def vision_profile(task: str, document_type: Optional[str] = None) -> VisionProfile:
+    if document_type in DOCUMENT_TYPE_PROFILES and task in ("metadata", "analysis"):
+        return DOCUMENT_TYPE_PROFILES[document_type]
+    return VISION_TASK_PROFILES[task]
+
+
+def sniff_mime_type(file_bytes: bytes) -> str:
+    """Mime type from the file signature (image/jpeg when unknown, as before)."""
+    if file_bytes.startswith(b"\x89PNG\r\n\x1a\n"):
+        return "image/png"
+    if file_bytes[:4] == b"RIFF" and file_bytes[8:12] == b"WEBP":
+        return "image/webp"
+    if file_bytes[:6] in (b"GIF87a", b"GIF89a"):
+        return "image/gif"
+    return "image/jpeg"
+
+
+def _scale_for(width: int, height: int, profile: VisionProfile) -> float:
+    long_side, short_side = max(width, height), min(width, height)
+    return min(1.0, profile.max_long_side / long_side, profile.max_short_side / short_side)
+
+
+def _snap_to_tiles(width: int, height: int) -> float:
+    """Scale that brings sides just above a tile multiple down to it (one tile fewer)."""
+    scale = 1.0
+    for side in (width, height):
+        over = side % VISION_TILE_SIZE
+        if side > VISION_TILE_SIZE and 0 < over <= VISION_TILE_SLACK:
+            scale = min(scale, (side - over) / side)
+    return scale
+
+
+def _crop_background(img: Image.Image) -> Image.Image:
+    """Trim uniform margins whose color matches the top-left corner."""
+    factor = max(1, max(img.size) // CROP_PROBE_SIZE)
+    probe = (img.reduce(factor) if factor > 1 else img).convert("RGB")
+    background = Image.new("RGB", probe.size, probe.getpixel((0, 0)))
+    diff = ImageChops.difference(probe, background).convert("L")
+    bbox = diff.point(lambda p: 255 if p > CROP_BACKGROUND_THRESHOLD else 0).getbbox()
+    if bbox is None:
+        return img
+
+    left, top, right, bottom = (
+        min(v * factor, limit) for v, limit in zip(bbox, (img.width, img.height, img.width, img.height))
+    )
+    if (right - left) * (bottom - top) < CROP_MIN_AREA_FRACTION * img.width * img.height:
+        return img
+
+    pad_x = int(img.width * CROP_PADDING_FRACTION)
+    pad_y = int(img.height * CROP_PADDING_FRACTION)
+    box = (max(0, left - pad_x), max(0, top - pad_y), min(img.width, right + pad_x), min(img.height, bottom + pad_y))
+    return img if box == (0, 0, img.width, img.height) else img.crop(box)
+
+
+def _encode(img: Image.Image) -> tuple[bytes, str]:
+    if img.mode not in ("RGB", "L"):
+        # Transparența (PNG) devine fundal alb
+        rgba = img.convert("RGBA")
+        flattened = Image.new("RGB", rgba.size, (255, 255, 255))
+        flattened.paste(rgba, mask=rgba.getchannel("A"))
+        img = flattened
+
+    out = io.BytesIO()
+    if VISION_IMAGE_FORMAT == "webp":
+        img.save(out, format="WEBP", quality=VISION_IMAGE_QUALITY, method=4)
+        return out.getvalue(), "image/webp"
+    img.save(out, format="JPEG", quality=VISION_IMAGE_QUALITY, optimize=True)
+    return out.getvalue(), "image/jpeg"
+
+
+def prepare_image(file_bytes: bytes, task: str, document_type: Optional[str] = None) -> PreparedImage:
+    """
+    Rotate, crop, downscale and re-encode an uploaded image for a vision task.
+
+    Args:
+        file_bytes: Fișierul încărcat
+        task: "classify", "id_card", "metadata" sau "analysis"
+        document_type: Tipul documentului, dacă e cunoscut (rezoluția pentru extragere)
+
+    Returns:
+        PreparedImage – dacă fișierul nu poate fi citit ca imagine, bytes-urile
+        originale, cu tipul detectat din semnătura fișierului
+    """
+    profile = vision_profile(task, document_type)
+    try:
+        with Image.open(io.BytesIO(file_bytes)) as img:
+            source_format, source_size = img.format, img.size
+            rotated = img.getexif().get(EXIF_ORIENTATION_TAG, 1) != 1
+            # JPEG: decodăm direct la o rezoluție redusă (mult mai rapid pentru 12 MP)
+            scale = _scale_for(img.width, img.height, profile)
+            if scale < 1.0:
+                img.draft(img.mode, (math.ceil(img.width * scale), math.ceil(img.height * scale)))
+
+            upright = ImageOps.exif_transpose(img)
+            prepared = _crop_background(upright)
+            scale = _scale_for(prepared.width, prepared.height, profile)
+            if profile.detail == "high":
+                scale *= _snap_to_tiles(round(prepared.width * scale), round(prepared.height * scale))
+            if scale < 1.0:
+                size = (max(1, round(prepared.width * scale)), max(1, round(prepared.height * scale)))
+                prepared = prepared.resize(size, Image.LANCZOS, reducing_gap=3.0)
+
+            data, mime_type = _encode(prepared)
+            width, height = prepared.size
+    except (UnidentifiedImageError, Image.DecompressionBombError, OSError, ValueError) as e:
+        print(f"Warning: Image preprocessing skipped, sending original file: {e}")
+        return PreparedImage(file_bytes, sniff_mime_type(file_bytes), 0, 0, profile.detail)
+
+    # Imagine deja mică și dreaptă, în format acceptat: nu o re-encodăm degeaba
+    unchanged = not rotated and (width, height) == source_size
+    if unchanged and source_format in _FORMAT_MIME_TYPES and len(data) >= len(file_bytes):
+        return PreparedImage(file_bytes, _FORMAT_MIME_TYPES[source_format], width, height, profile.detail)
+    return PreparedImage(data, mime_type, width, height, profile.detail)
+
+
+def vision_image_content(file_bytes: bytes, task: str, document_type: Optional[str] = None) -> dict:
+    """OpenAI "image_url" message part for an uploaded image, preprocessed for the task."""
+    image = prepare_image(file_bytes, task, document_type)
+    return {
+        "type": "image_url",
+        "image_url": {"url": image.data_url, "detail": image.detail},
+    }
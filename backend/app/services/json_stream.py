@@ -0,0 +1,99 @@
+"""
+JSON Stream - Incremental extraction of one string field from streamed JSON
+
+Modelul răspunde la chatbot cu un obiect JSON ({"answer": "...", ...}).
+Când răspunsul vine în stream, bucată cu bucată, JsonStringFieldStreamer
+decodează valoarea câmpului "answer" pe măsură ce sosește, ca textul să
+poată fi trimis utilizatorului înainte să fie complet obiectul JSON.
+Obiectul întreg este parsat normal (json.loads) la final.
+"""
+
+import re
+
+_SIMPLE_ESCAPES = {
+    '"': '"',
+    "\\": "\\",
+    "/": "/",
+    "b": "\b",
+    "f": "\f",
+    "n": "\n",
+    "r": "\r",
+    "t": "\t",
+}
+
+
+class JsonStringFieldStreamer:
+    """
+    Feed raw JSON text as it arrives; get back the newly decoded characters
+    of one top-level string field.
+
+    Exemplu:
+        streamer = JsonStringFieldStreamer("answer")
+        streamer.feed('{"answer": "Bun')   → "Bun"
+        streamer.feed('ă ziua\\n", "x": 1}') → "ă ziua\\n"
+    """
+
+    def __init__(self, field: str):
+        self.field = field
+        self._start = re.compile(r'"%s"\s*:\s*"' % re.escape(field))
+        self._buffer = ""
+        self._pos = 0
+        self._in_value = False
+        self.done = False
+        self.value = ""
+
+    def feed(self, text: str) -> str:
+        """Add raw text and return the field characters decoded from it."""
+        if self.done or not text:
+            return ""
+        self._buffer += text
+
+        if not self._in_value:
+            match = self._start.search(self._buffer)
+            if match is None:
+                return ""
+            self._in_value = True
+            self._pos = match.end()
+
+        decoded = []
+        buf = self._buffer
+        i = self._pos
+        while i < len(buf):
+            char = buf[i]
+            if char == '"':
+                self.done = True
+                i += 1
+                break
+            if char != "\\":
+                decoded.append(char)
+                i += 1
+                continue
+
+            # Secvență escape: dacă nu a sosit întreagă, așteptăm următoarea bucată
+            if i + 1 >= len(buf):
+                break
+            kind = buf[i + 1]
+            if kind != "u":
+                decoded.append(_SIMPLE_ESCAPES.get(kind, kind))
+                i += 2
+                continue
+            if i + 6 > len(buf):
+                break
+            code = int(buf[i + 2:i + 6], 16)
+            if 0xD800 <= code < 0xDC00:
+                # Emoji etc.: perechea surogat vine ca două escape-uri \uXXXX
+                if i + 12 > len(buf):
+                    break
+                if buf[i + 6:i + 8] == "\\u":
+                    low = int(buf[i + 8:i + 12], 16)
+                    if 0xDC00 <= low < 0xE000:
+                        decoded.append(chr(0x10000 + ((code - 0xD800) << 10) + (low - 0xDC00)))
+                        i += 12
+                        continue
+            decoded.append(chr(code))
+            i += 6
+
+        self._pos = i
+        chunk = "".join(decoded)
+        self.value += chunk
+        return chunk
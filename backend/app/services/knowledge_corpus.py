@@ -0,0 +1,181 @@
+"""
+Knowledge Corpus - Shared in-memory copy of the knowledge base
+
+Fișierele din knowledge_base/ și knowledge/*.jsonl sunt citite o singură
+dată, la pornirea aplicației. La fiecare acces verificăm (cel mult o dată la
+CORPUS_CHECK_INTERVAL secunde) mtime/size pentru fiecare fișier și reîncărcăm
+doar fișierele care s-au schimbat.
+"""
+
+import os
+import threading
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from app.services.knowledge_loader import list_source_files, load_file_chunks
+
+
+# Cât de des (secunde) verificăm dacă fișierele de pe disc s-au modificat
+CORPUS_CHECK_INTERVAL = float(os.getenv("CORPUS_CHECK_INTERVAL", "30"))
+
+
+@dataclass
+class _FileEntry:
+    mtime_ns: int
+    size: int
+    ids: Tuple[str, ...]
+    texts: Tuple[str, ...]
+    text_bytes: int
+
+
+class KnowledgeCorpus:
+    """
+    Thread-safe, lazily hot-reloaded corpus of knowledge chunks.
+
+    Chunks are kept as immutable tuples: get_chunks() returns the same tuple
+    object until something on disk changes, so callers (e.g. the search
+    index) can cache derived structures on it by identity.
+    """
+
+    def __init__(self, check_interval: float = CORPUS_CHECK_INTERVAL):
+        self.check_interval = check_interval
+        self._lock = threading.Lock()
+        self._files: Dict[Path, _FileEntry] = {}
+        self._ids: Tuple[str, ...] = ()
+        self._texts: Tuple[str, ...] = ()
+        self._bytes = 0
+        self._version = 0
+        self._last_check = 0.0
+        self._last_reload: Optional[float] = None
+        self._loaded = False
+        self._text_by_id: Optional[Dict[str, str]] = None
+
+    # ----------------------------------------
+    # Încărcare / reîncărcare
+    # ----------------------------------------
+    def load(self) -> None:
+        """Load (or refresh) the corpus now, ignoring the check interval."""
+        with self._lock:
+            self._refresh_locked()
+
+    def refresh_if_stale(self) -> None:
+        """Refresh the corpus if the check interval has elapsed."""
+        if self._loaded and time.monotonic() - self._last_check < self.check_interval:
+            return
+        with self._lock:
+            if self._loaded and time.monotonic() - self._last_check < self.check_interval:
+                return
+            self._refresh_locked()
+
+    def _refresh_locked(self) -> None:
+        changed = False
+        current: Dict[Path, _FileEntry] = {}
+
+        for path in list_source_files():
+            try:
+                st = path.stat()
+            except OSError as e:
+                print(f"Error reading {path}: {e}")
+                continue
+
+            entry = self._files.get(path)
+            if entry is None or entry.mtime_ns != st.st_mtime_ns or entry.size != st.st_size:
+                pairs = load_file_chunks(path)
+                entry = _FileEntry(
+                    mtime_ns=st.st_mtime_ns,
+                    size=st.st_size,
+                    ids=tuple(chunk_id for chunk_id, _ in pairs),
+                    texts=tuple(text for _, text in pairs),
+                    text_bytes=sum(len(text.encode("utf-8")) for _, text in pairs),
+                )
+                changed = True
+            current[path] = entry
+
+        # Fișiere șterse de pe disc
+        if set(current) != set(self._files):
+            changed = True
+
+        if changed or not self._loaded:
+            self._files = current
+            self._ids = tuple(i for e in current.values() for i in e.ids)
+            self._texts = tuple(t for e in current.values() for t in e.texts)
+            self._bytes = sum(e.text_bytes for e in current.values())
+            self._text_by_id = None
+            self._version += 1
+            self._last_reload = time.time()
+
+        self._loaded = True
+        self._last_check = time.monotonic()
+
+    # ----------------------------------------
+    # Acces
+    # ----------------------------------------
+    def get_chunks(self) -> Tuple[str, ...]:
+        """Return all chunk texts (same tuple object until the next reload)."""
+        self.refresh_if_stale()
+        return self._texts
+
+    def get_chunk_ids(self) -> Tuple[str, ...]:
+        """Return the chunk ids, aligned with get_chunks()."""
+        self.refresh_if_stale()
+        return self._ids
+
+    def texts_for_ids(self, chunk_ids: Iterable[str]) -> List[str]:
+        """Map chunk ids (e.g. vector search hits) to texts, skipping unknown ids."""
+        self.refresh_if_stale()
+        text_by_id = self._text_by_id
+        if text_by_id is None:
+            text_by_id = dict(zip(self._ids, self._texts))
+            self._text_by_id = text_by_id
+        return [text_by_id[i] for i in chunk_ids if i in text_by_id]
+
+    @property
+    def version(self) -> int:
+        """Incremented every time the chunk set changes."""
+        return self._version
+
+    def stats(self) -> dict:
+        """Corpus statistics for monitoring."""
+        return {
+            "files": len(self._files),
+            "chunk_count": len(self._texts),
+            "bytes": self._bytes,
+            "version": self._version,
+            "last_reload": (
+                time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime(self._last_reload))
+                if self._last_reload
+                else None
+            ),
+        }
+
+
+# Instanța partajată de toată aplicația
+corpus = KnowledgeCorpus()
+
+
+_combine_lock = threading.Lock()
+_combined_sources: Tuple[Tuple[str, ...], ...] = ()
+_combined_chunks: Tuple[str, ...] = ()
+
+
+def combine_chunk_sources(*sources: Tuple[str, ...]) -> Tuple[str, ...]:
+    """
+    Concatenate chunk tuples (e.g. corpus + cached web pages), returning the
+    same tuple object while every source is unchanged, so the search index
+    cached on it is reused.
+
+    Called from request threads and from the web cache refresher; the lock
+    keeps the sources and the combined tuple consistent with each other.
+    """
+    global _combined_sources, _combined_chunks
+    with _combine_lock:
+        if len(sources) == len(_combined_sources) and all(
+            a is b for a, b in zip(sources, _combined_sources)
+        ):
+            return _combined_chunks
+        non_empty = [s for s in sources if s]
+        combined = non_empty[0] if len(non_empty) == 1 else tuple(c for s in non_empty for c in s)
+        _combined_sources, _combined_chunks = sources, combined
+        return combined
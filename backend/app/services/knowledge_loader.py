@@ -5,7 +5,9 @@ Knowledge Loader - Loads and searches through local legal documents
 import os
 import json
 from pathlib import Path
-from typing import List
+from typing import List, Sequence, Tuple
+
+from app.services.search_index import get_index
 
 
 # Directorul cu .txt (ce aveai deja)
@@ -15,6 +17,91 @@ KNOWLEDGE_BASE_DIR = Path(__file__).parent.parent.parent / "knowledge_base"
 JSON_KNOWLEDGE_DIR = Path(__file__).parent.parent.parent / "knowledge"
 
 
+# Fișierele JSONL produse de script-urile de ingestie
+JSONL_FILES = [
+    "timisoara_hcl_chunks.jsonl",
+    "primariatm_constructii_chunks.jsonl",
+]
+
+TXT_CHUNK_SIZE = 1000
+
+
+def list_source_files() -> List[Path]:
+    """
+    Return every file that feeds the knowledge corpus (.txt + JSONL chunks),
+    in the same order load_all_documents() reads them.
+    """
+    files: List[Path] = []
+    if KNOWLEDGE_BASE_DIR.exists():
+        files.extend(KNOWLEDGE_BASE_DIR.rglob("*.txt"))
+
+    for fname in JSONL_FILES:
+        path = JSON_KNOWLEDGE_DIR / fname
+        if path.exists():
+            files.append(path)
+    return files
+
+
+def load_txt_chunks(file_path: Path) -> List[Tuple[str, str]]:
+    """
+    Read a .txt file and split it into ~1000 character chunks.
+
+    Returns:
+        List[Tuple[str, str]]: (chunk_id, text) pairs
+    """
+    chunks: List[Tuple[str, str]] = []
+    try:
+        source = file_path.relative_to(KNOWLEDGE_BASE_DIR).as_posix()
+    except ValueError:
+        source = file_path.name
+    try:
+        with open(file_path, "r", encoding="utf-8") as f:
+            content = f.read()
+        # Split into chunks of ~1000 characters for better context
+        for i in range(0, len(content), TXT_CHUNK_SIZE):
+            chunk = content[i : i + TXT_CHUNK_SIZE]
+            if chunk.strip():
+                chunks.append((f"{source}#{i // TXT_CHUNK_SIZE}", chunk))
+    except Exception as e:
+        print(f"Error reading {file_path}: {e}")
+    return chunks
+
+
+def load_jsonl_chunks(path: Path) -> List[Tuple[str, str]]:
+    """
+    Read a JSONL chunk file written by the ingest scripts.
+
+    Returns:
+        List[Tuple[str, str]]: (chunk_id, text) pairs; the id comes from the
+        record's "id" field, or falls back to file name + line number
+    """
+    chunks: List[Tuple[str, str]] = []
+    try:
+        with path.open("r", encoding="utf-8") as f:
+            for line_no, line in enumerate(f):
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    obj = json.loads(line)
+                    text = obj.get("text")
+                    if text and text.strip():
+                        chunk_id = obj.get("id") or f"{path.name}#{line_no}"
+                        chunks.append((str(chunk_id), text))
+                except Exception as e:
+                    print(f"Error parsing line in {path}: {e}")
+    except Exception as e:
+        print(f"Error reading {path}: {e}")
+    return chunks
+
+
+def load_file_chunks(path: Path) -> List[Tuple[str, str]]:
+    """Load (chunk_id, text) pairs from a single corpus file, by extension."""
+    if path.suffix == ".jsonl":
+        return load_jsonl_chunks(path)
+    return load_txt_chunks(path)
+
+
 def load_all_documents() -> List[str]:
     """
     Load all text content from documents in the knowledge_base directory
@@ -23,63 +110,28 @@ def load_all_documents() -> List[str]:
     - .txt din knowledge_base/
     - timisoara_hcl_chunks.jsonl din knowledge/
     - primariatm_constructii_chunks.jsonl din knowledge/
+
+    Note: /chatbot uses the shared, hot-reloaded copy from
+    knowledge_corpus.corpus instead of calling this on every request.
     
     Returns:
         List[str]: List of text chunks from all documents
     """
     chunks: List[str] = []
-
-    # 1) .txt din knowledge_base (ce aveai deja)
-    if KNOWLEDGE_BASE_DIR.exists():
-        for file_path in KNOWLEDGE_BASE_DIR.rglob("*.txt"):
-            try:
-                with open(file_path, "r", encoding="utf-8") as f:
-                    content = f.read()
-                    # Split into chunks of ~1000 characters for better context
-                    chunk_size = 1000
-                    for i in range(0, len(content), chunk_size):
-                        chunk = content[i : i + chunk_size]
-                        if chunk.strip():
-                            chunks.append(chunk)
-            except Exception as e:
-                print(f"Error reading {file_path}: {e}")
-
-    # 2) JSONL din knowledge/ (HCL + Construcții)
-    jsonl_files = [
-        "timisoara_hcl_chunks.jsonl",
-        "primariatm_constructii_chunks.jsonl",
-    ]
-
-    for fname in jsonl_files:
-        path = JSON_KNOWLEDGE_DIR / fname
-        if not path.exists():
-            continue
-
-        try:
-            with path.open("r", encoding="utf-8") as f:
-                for line in f:
-                    line = line.strip()
-                    if not line:
-                        continue
-                    try:
-                        obj = json.loads(line)
-                        text = obj.get("text")
-                        if text and text.strip():
-                            chunks.append(text)
-                    except Exception as e:
-                        print(f"Error parsing line in {path}: {e}")
-        except Exception as e:
-            print(f"Error reading {path}: {e}")
-
+    for path in list_source_files():
+        chunks.extend(text for _, text in load_file_chunks(path))
     return chunks
 
 
 def search_relevant_chunks(
-    question: str, all_chunks: List[str], max_results: int = 3
+    question: str, all_chunks: Sequence[str], max_results: int = 3
 ) -> List[str]:
     """
-    Simple keyword-based search for relevant chunks.
-    For better results, you could use embeddings and cosine similarity.
+    BM25 search for relevant chunks, with Romanian diacritic folding.
+
+    The inverted index is built once per chunk sequence (see
+    search_index.get_index), so repeated queries against the same corpus
+    tuple only touch the postings of the question's terms.
     
     Args:
         question: User's question
@@ -89,18 +141,5 @@ def search_relevant_chunks(
     Returns:
         List[str]: Most relevant chunks
     """
-    # Simple keyword matching - convert to lowercase for case-insensitive search
-    question_lower = question.lower()
-    keywords = set(question_lower.split())
-
-    # Score each chunk based on keyword matches
-    scored_chunks = []
-    for chunk in all_chunks:
-        chunk_lower = chunk.lower()
-        score = sum(1 for keyword in keywords if keyword in chunk_lower)
-        if score > 0:
-            scored_chunks.append((score, chunk))
-
-    # Sort by score and return top results
-    scored_chunks.sort(reverse=True, key=lambda x: x[0])
-    return [chunk for _, chunk in scored_chunks[:max_results]]
+    index = get_index(all_chunks)
+    return [all_chunks[doc_id] for _, doc_id in index.search(question, max_results)]
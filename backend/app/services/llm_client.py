@@ -0,0 +1,119 @@
+"""
+LLM Client - Async OpenRouter client shared by the async endpoints
+
+Un singur AsyncOpenAI cu un pool de conexiuni HTTP comun, plus limite de
+concurență și timeout-uri configurabile per model, ca un val de upload-uri
+să nu ocupe toate conexiunile pentru gpt-4o și nici să blocheze event loop-ul.
+
+Configurare (opțional, în .env):
+    LLM_MODEL_CONCURRENCY=openai/gpt-4o=4,gpt-4o-mini=16
+    LLM_MODEL_TIMEOUTS=openai/gpt-4o=90,gpt-4o-mini=30
+"""
+
+import asyncio
+import os
+from typing import Dict, Optional
+
+import httpx
+from openai import AsyncOpenAI
+
+from app.services.single_flight import completion_key, llm_flight
+
+
+OPENROUTER_BASE_URL = "https://openrouter.ai/api/v1"
+OPENROUTER_API_KEY = os.getenv("OPENROUTER_API_KEY")
+
+LLM_DEFAULT_CONCURRENCY = int(os.getenv("LLM_DEFAULT_CONCURRENCY", "8"))
+LLM_DEFAULT_TIMEOUT = float(os.getenv("LLM_DEFAULT_TIMEOUT", "60"))
+LLM_MAX_CONNECTIONS = int(os.getenv("LLM_MAX_CONNECTIONS", "32"))
+LLM_MAX_RETRIES = int(os.getenv("LLM_MAX_RETRIES", "2"))
+
+
+def _parse_model_map(value: Optional[str], cast) -> Dict[str, float]:
+    """Parse "model=value,model2=value2" from an env variable."""
+    result = {}
+    for item in (value or "").split(","):
+        if "=" not in item:
+            continue
+        model, _, raw = item.rpartition("=")
+        try:
+            result[model.strip()] = cast(raw.strip())
+        except ValueError:
+            print(f"Warning: Ignoring invalid LLM setting '{item}'")
+    return result
+
+
+LLM_MODEL_CONCURRENCY: Dict[str, int] = _parse_model_map(os.getenv("LLM_MODEL_CONCURRENCY"), int)
+LLM_MODEL_TIMEOUTS: Dict[str, float] = _parse_model_map(os.getenv("LLM_MODEL_TIMEOUTS"), float)
+
+
+_client: Optional[AsyncOpenAI] = None
+_semaphores: Dict[str, asyncio.Semaphore] = {}
+
+
+def get_async_client() -> AsyncOpenAI:
+    """Shared AsyncOpenAI client over one pooled httpx.AsyncClient."""
+    global _client
+    if _client is None:
+        _client = AsyncOpenAI(
+            base_url=OPENROUTER_BASE_URL,
+            api_key=OPENROUTER_API_KEY,
+            max_retries=LLM_MAX_RETRIES,
+            http_client=httpx.AsyncClient(
+                limits=httpx.Limits(
+                    max_connections=LLM_MAX_CONNECTIONS,
+                    max_keepalive_connections=LLM_MAX_CONNECTIONS,
+                ),
+                timeout=LLM_DEFAULT_TIMEOUT,
+            ),
+        )
+    return _client
+
+
+def _model_semaphore(model: str) -> asyncio.Semaphore:
+    semaphore = _semaphores.get(model)
+    if semaphore is None:
+        semaphore = asyncio.Semaphore(LLM_MODEL_CONCURRENCY.get(model, LLM_DEFAULT_CONCURRENCY))
+        _semaphores[model] = semaphore
+    return semaphore
+
+
+def model_timeout(model: str) -> float:
+    """Request timeout (seconds) configured for a model."""
+    return LLM_MODEL_TIMEOUTS.get(model, LLM_DEFAULT_TIMEOUT)
+
+
+async def chat_completion(model: str, messages: list, **kwargs):
+    """
+    Async chat completion through OpenRouter, respecting the model's
+    concurrency limit and timeout. Identical requests already in flight
+    are not sent again: the callers share the same response.
+
+    Args:
+        model: Model name (ex: "openai/gpt-4o")
+        messages: OpenAI-style messages
+        **kwargs: Extra arguments for chat.completions.create
+                  (response_format, temperature, ...)
+
+    Returns:
+        The ChatCompletion response object
+    """
+    async def create():
+        async with _model_semaphore(model):
+            return await get_async_client().chat.completions.create(
+                model=model,
+                messages=messages,
+                timeout=model_timeout(model),
+                **kwargs,
+            )
+
+    return await llm_flight.do_async(completion_key(model=model, messages=messages, **kwargs), create)
+
+
+async def close_async_client() -> None:
+    """Close the shared client and its connection pool (app shutdown)."""
+    global _client
+    if _client is not None:
+        await _client.close()
+        _client = None
+    _semaphores.clear()
@@ -1,6 +1,8 @@
 from dataclasses import dataclass
 from datetime import datetime, timedelta, timezone
-from typing import List, Dict, Optional
+from typing import Any, List, Dict, Optional, Sequence
+
+import numpy as np
 
 
 # Termene legale (în zile) – completează cu valorile reale
@@ -21,6 +23,57 @@ class Application:
     status: str = "pending"
 
 
+def parse_iso(dt_str: Optional[str]) -> Optional[datetime]:
+    """Mic helper pentru stringuri ISO de la Supabase (cu sau fără Z)."""
+    if dt_str is None:
+        return None
+    # Supabase trimite de obicei gen '2025-11-15T10:23:45.123456+00:00' sau cu 'Z'
+    dt = datetime.fromisoformat(dt_str.replace("Z", "+00:00"))
+    # Ensure timezone-aware datetime (convert to UTC if needed)
+    if dt.tzinfo is None:
+        dt = dt.replace(tzinfo=timezone.utc)
+    return dt
+
+
+def application_from_row(row: Dict[str, Any], default_flow_type: str = "other") -> Application:
+    """
+    Construiește un Application dintr-un rând din tabela requests.
+    Datele invalide nu opresc prioritizarea: created_at invalid → acum,
+    legal_deadline invalid → calculat din tipul cererii.
+    """
+    try:
+        submitted_at = parse_iso(row["created_at"])
+    except (KeyError, TypeError, ValueError):
+        submitted_at = datetime.now(timezone.utc)
+
+    legal_due = None
+    if row.get("legal_deadline"):
+        try:
+            legal_due = parse_iso(row["legal_deadline"])
+        except (TypeError, ValueError):
+            pass
+
+    return Application(
+        id=str(row["id"]),
+        flow_type=row.get("request_type", default_flow_type),
+        submitted_at=submitted_at,
+        legal_due_date=legal_due,
+        status=row.get("status", "pending_validation"),
+    )
+
+
+def join_with_rows(prioritized: List[Dict], rows: List[Dict[str, Any]]):
+    """
+    Perechi (item prioritizat, rândul original), în ordinea priorității.
+    Rândurile sunt indexate după id o singură dată, deci join-ul este O(n).
+    """
+    rows_by_id = {str(r["id"]): r for r in rows}
+    for item in prioritized:
+        original = rows_by_id.get(item["id"])
+        if original is not None:
+            yield item, original
+
+
 def compute_legal_due_date(app: Application) -> datetime:
     """Calculează data limită legală pentru o cerere."""
     days = FLOW_LEGAL_DEADLINES_DAYS.get(app.flow_type, 30)
@@ -89,3 +142,105 @@ def prioritize_applications(applications: List[Application]) -> List[Dict]:
     )
 
     return enriched
+
+
+# ========================================
+# Scor vectorizat (NumPy) pentru backlog-uri mari
+# ========================================
+# Timpii sunt int64 în microsecunde de la epoch (UTC)
+_EPOCH = datetime(1970, 1, 1, tzinfo=timezone.utc)
+_US = timedelta(microseconds=1)
+DAY_US = 86_400 * 1_000_000
+
+# Valoare pentru "fără termen legal explicit" în coloana legal_due_us
+NO_DEADLINE = np.iinfo(np.int64).min
+
+
+def to_us(dt: datetime) -> int:
+    """Datetime (timezone-aware) → microsecunde de la epoch, exact."""
+    return (dt - _EPOCH) // _US
+
+
+def applications_to_columns(applications: Sequence[Application]) -> Dict[str, Any]:
+    """
+    Transformă lista de cereri în coloane pentru score_priorities_batch.
+
+    Returns:
+        dict: {
+            "ids": list[str],
+            "submitted_us": int64[n],
+            "legal_due_us": int64[n] (NO_DEADLINE dacă lipsește),
+            "flow_codes": int64[n],
+            "flow_types": list[str]   # flow_types[cod] = numele categoriei
+        }
+    """
+    codes: Dict[str, int] = {}
+    n = len(applications)
+    submitted_us = np.empty(n, dtype=np.int64)
+    legal_due_us = np.empty(n, dtype=np.int64)
+    flow_codes = np.empty(n, dtype=np.int64)
+    for i, app in enumerate(applications):
+        submitted_us[i] = to_us(app.submitted_at)
+        legal_due_us[i] = to_us(app.legal_due_date) if app.legal_due_date is not None else NO_DEADLINE
+        flow_codes[i] = codes.setdefault(app.flow_type, len(codes))
+
+    return {
+        "ids": [app.id for app in applications],
+        "submitted_us": submitted_us,
+        "legal_due_us": legal_due_us,
+        "flow_codes": flow_codes,
+        "flow_types": list(codes),
+    }
+
+
+def score_priorities_batch(
+    submitted_us: np.ndarray,
+    legal_due_us: np.ndarray,
+    flow_codes: np.ndarray,
+    flow_types: Sequence[str],
+    now: Optional[datetime] = None,
+) -> Dict[str, np.ndarray]:
+    """
+    Aceleași calcule ca compute_priority + prioritize_applications, pe coloane.
+
+    Args:
+        submitted_us: Data depunerii (µs de la epoch)
+        legal_due_us: Termenul legal explicit (µs) sau NO_DEADLINE
+        flow_codes: Codul categoriei fiecărei cereri (index în flow_types)
+        flow_types: Numele categoriilor
+        now: Momentul de referință (implicit acum, UTC)
+
+    Returns:
+        dict: {
+            "legal_due_us", "days_left", "backlog_in_category",
+            "priority_score": int64[n],
+            "order": indicii cererilor, de la cea mai urgentă
+        }
+    """
+    now_us = to_us(now or datetime.now(timezone.utc))
+    deadline_days = np.array(
+        [FLOW_LEGAL_DEADLINES_DAYS.get(flow, 30) for flow in flow_types], dtype=np.int64
+    )
+
+    legal_due = np.where(
+        legal_due_us == NO_DEADLINE,
+        submitted_us + deadline_days[flow_codes] * DAY_US,
+        legal_due_us,
+    )
+    # floor_divide = timedelta.days (rotunjire în jos și pentru termene depășite)
+    days_left = np.floor_divide(legal_due - now_us, DAY_US)
+
+    urgency_score = np.maximum(0, 90 - np.maximum(days_left, 0))
+    backlog = np.bincount(flow_codes, minlength=len(flow_types))[flow_codes]
+    total_score = urgency_score * 2 + backlog
+
+    # lexsort: ultima cheie e cea principală → (days_left, -scor, submitted_at)
+    order = np.lexsort((submitted_us, -total_score, days_left))
+
+    return {
+        "legal_due_us": legal_due,
+        "days_left": days_left,
+        "backlog_in_category": backlog,
+        "priority_score": total_score,
+        "order": order,
+    }
@@ -0,0 +1,193 @@
+"""
+Priority Queue - Incremental clerk queue over the active requests
+
+În loc să recalculăm backlog-ul și să sortăm toate cererile la fiecare
+citire, păstrăm în memorie:
+    - un heap cu cererile active, ordonat după termenul legal,
+    - câte cereri active sunt pe fiecare categorie (flow_type).
+
+O cerere nouă creată de backend (/confirm-documents) intră în coadă în
+O(log n). Statusul cererilor e schimbat de frontend direct în tabela
+requests, deci schimbările de status și cererile închise ajung în coadă la
+resincronizare (PRIORITY_QUEUE_SYNC_INTERVAL, sau mai devreme când o cerere
+din top nu mai e activă – vezi main._fetch_queue_rows).
+Citirea primelor k cereri scoate din heap doar candidații necesari
+(vezi top()), deci nu mai sortăm toată coada.
+
+Ordinea este aceeași ca în prioritization.prioritize_applications:
+    1) zile rămase până la termen, 2) scor (desc), 3) data depunerii.
+"""
+
+import dataclasses
+import heapq
+import itertools
+import os
+import threading
+import time
+from datetime import datetime, timezone
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from app.services.prioritization import (
+    Application,
+    application_from_row,
+    compute_legal_due_date,
+    compute_priority,
+)
+
+
+# Statusurile pentru care o cerere stă în coada funcționarilor
+ACTIVE_STATUSES = ("pending_validation", "in_review")
+
+# Cât de des (secunde) se resincronizează coada cu tabela requests
+PRIORITY_QUEUE_SYNC_INTERVAL = float(os.getenv("PRIORITY_QUEUE_SYNC_INTERVAL", "60"))
+
+# Coloanele necesare pentru prioritizare (sync_from_rows)
+PRIORITY_COLUMNS = "id, request_type, status, created_at, legal_deadline"
+
+
+class PriorityQueue:
+    """
+    Heap of active applications keyed by legal due date, with lazy deletion:
+    an update pushes a new heap entry and the old one is skipped when popped.
+    """
+
+    def __init__(self):
+        self._lock = threading.RLock()
+        self._heap: List[Tuple[datetime, int, str]] = []
+        self._entries: Dict[str, Tuple[int, Application, datetime]] = {}
+        self._backlog: Dict[str, int] = {}
+        self._seq = itertools.count()
+        self.last_sync: Optional[float] = None
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __contains__(self, app_id: str) -> bool:
+        return app_id in self._entries
+
+    def backlog(self, flow_type: str) -> int:
+        """Number of active applications in a category."""
+        return self._backlog.get(flow_type, 0)
+
+    def upsert(self, app: Application) -> None:
+        """
+        Insert or update an application. Applications whose status is not
+        in ACTIVE_STATUSES are removed from the queue.
+        """
+        if app.status not in ACTIVE_STATUSES:
+            self.remove(app.id)
+            return
+        with self._lock:
+            self._discard(app.id)
+            # Copie: dacă apelantul modifică obiectul, backlog-ul rămâne corect
+            app = dataclasses.replace(app)
+            due = compute_legal_due_date(app)
+            seq = next(self._seq)
+            self._entries[app.id] = (seq, app, due)
+            self._backlog[app.flow_type] = self._backlog.get(app.flow_type, 0) + 1
+            heapq.heappush(self._heap, (due, seq, app.id))
+
+    def remove(self, app_id: str) -> None:
+        """Drop an application (closed, rejected, deleted)."""
+        with self._lock:
+            self._discard(app_id)
+            self._maybe_compact()
+
+    def _discard(self, app_id: str) -> None:
+        old = self._entries.pop(app_id, None)
+        if old is None:
+            return
+        flow_type = old[1].flow_type
+        self._backlog[flow_type] -= 1
+        if not self._backlog[flow_type]:
+            del self._backlog[flow_type]
+
+    def _maybe_compact(self) -> None:
+        # Heap-ul nu crește la nesfârșit din cauza intrărilor învechite
+        if len(self._heap) > 2 * len(self._entries) + 64:
+            self._heap = [
+                (due, seq, app_id)
+                for app_id, (seq, _, due) in self._entries.items()
+            ]
+            heapq.heapify(self._heap)
+
+    def _pop_live(self) -> Optional[Tuple[datetime, int, str]]:
+        while self._heap:
+            entry = heapq.heappop(self._heap)
+            current = self._entries.get(entry[2])
+            if current is not None and current[0] == entry[1]:
+                return entry
+        return None
+
+    def top(self, k: Optional[int] = None, now: Optional[datetime] = None) -> List[Dict]:
+        """
+        The k most urgent applications, as compute_priority() dicts.
+
+        Only the heap entries needed for an exact answer are popped: the
+        first k by due date, plus every further entry with the same
+        days_left as the k-th (their order depends on backlog and
+        submission date). Those candidates are sorted and pushed back.
+        """
+        now = now or datetime.now(timezone.utc)
+        with self._lock:
+            if k is None or k >= len(self._entries):
+                k = len(self._entries)
+            if k <= 0:
+                return []
+
+            popped = []
+            cutoff_days = None
+            while True:
+                entry = self._pop_live()
+                if entry is None:
+                    break
+                days_left = (entry[0] - now).days
+                if cutoff_days is not None and days_left > cutoff_days:
+                    heapq.heappush(self._heap, entry)
+                    break
+                popped.append(entry)
+                if len(popped) == k:
+                    cutoff_days = days_left
+
+            for entry in popped:
+                heapq.heappush(self._heap, entry)
+
+            candidates = []
+            for _, _, app_id in popped:
+                app = self._entries[app_id][1]
+                info = compute_priority(app, backlog_in_category=self.backlog(app.flow_type), now=now)
+                info["application"] = app
+                candidates.append(info)
+
+        candidates.sort(
+            key=lambda x: (
+                x["days_left"],          # 1. cât mai aproape de termen
+                -x["priority_score"],    # 2. scor mare
+                x["submitted_at"],       # 3. cele mai vechi primele
+            )
+        )
+        return candidates[:k]
+
+    def sync_from_rows(self, rows: Iterable[Dict[str, Any]], default_flow_type: str = "other") -> None:
+        """Replace the whole queue with the given requests rows."""
+        with self._lock:
+            self._heap = []
+            self._entries = {}
+            self._backlog = {}
+            for row in rows:
+                self.upsert(application_from_row(row, default_flow_type))
+            self.last_sync = time.monotonic()
+
+    def is_stale(self, interval: float = PRIORITY_QUEUE_SYNC_INTERVAL) -> bool:
+        return self.last_sync is None or time.monotonic() - self.last_sync >= interval
+
+    def stats(self) -> dict:
+        return {
+            "active": len(self._entries),
+            "heap_size": len(self._heap),
+            "backlog": dict(self._backlog),
+        }
+
+
+# Instanța partajată de toată aplicația
+priority_queue = PriorityQueue()
@@ -0,0 +1,244 @@
+"""
+Prompt Builder - Token-budgeted prompt assembly for the RAG chatbot
+
+Mesajele trimise la gpt-4o încap într-un buget de token-uri
+(RAG_PROMPT_TOKEN_BUDGET), numărate local:
+    - promptul sistem și întrebarea intră mereu,
+    - chunk-urile de context sunt deduplicate și adăugate în ordinea
+      relevanței cât timp mai e loc,
+    - istoricul: mesajele [SYSTEM] sunt eliminate, cele mai noi mesaje
+      intră întregi, iar cele mai vechi sunt comprimate într-un rezumat
+      scurt (întrebările utilizatorului) sau renunțăm la ele.
+
+Token-urile sunt numărate cu tiktoken (o200k_base, tokenizer-ul gpt-4o)
+când e disponibil, altfel cu o estimare după numărul de caractere.
+"""
+
+import math
+import os
+import re
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+
+RAG_PROMPT_TOKEN_BUDGET = int(os.getenv("RAG_PROMPT_TOKEN_BUDGET", "6000"))
+RAG_HISTORY_MAX_MESSAGES = int(os.getenv("RAG_HISTORY_MAX_MESSAGES", "10"))
+# Partea din buget rezervată istoricului (contextul nu o poate folosi)
+RAG_HISTORY_BUDGET_SHARE = float(os.getenv("RAG_HISTORY_BUDGET_SHARE", "0.25"))
+
+# Estimare fără tiktoken: text românesc ≈ 3.5 caractere / token
+CHARS_PER_TOKEN = 3.5
+# Cost fix per mesaj în formatul chat (rol + separatori)
+MESSAGE_OVERHEAD_TOKENS = 4
+
+# Cât păstrăm din fiecare întrebare veche în rezumat
+SUMMARY_QUESTION_CHARS = 120
+
+SYSTEM_MARKER_PREFIX = "[SYSTEM]"
+
+
+def _load_encoding():
+    try:
+        import tiktoken
+
+        return tiktoken.get_encoding("o200k_base")
+    except Exception:
+        # tiktoken lipsește sau nu își poate descărca tabelele (offline)
+        return None
+
+
+_encoding = _load_encoding()
+TOKENIZER = "tiktoken" if _encoding is not None else "heuristic"
+
+
+def count_tokens(text: str) -> int:
+    """Number of tokens in text (exact with tiktoken, estimated otherwise)."""
+    if not text:
+        return 0
+    if _encoding is not None:
+        return len(_encoding.encode(text, disallowed_special=()))
+    return math.ceil(len(text) / CHARS_PER_TOKEN)
+
+
+def count_message_tokens(messages: Sequence[dict]) -> int:
+    """Tokens of a chat message list, including the per-message overhead."""
+    total = 0
+    for msg in messages:
+        content = msg.get("content")
+        if isinstance(content, str):
+            total += count_tokens(content)
+        total += MESSAGE_OVERHEAD_TOKENS
+    return total
+
+
+def _normalize(text: str) -> str:
+    return re.sub(r"\s+", " ", text).strip().lower()
+
+
+def dedupe_chunks(chunks: Sequence[str]) -> List[str]:
+    """
+    Drop duplicate chunks and chunks fully contained in another one,
+    keeping the relevance order of the first occurrence.
+    """
+    kept: List[Tuple[str, str]] = []
+    for chunk in chunks:
+        norm = _normalize(chunk)
+        if not norm or any(norm in other for _, other in kept):
+            continue
+        # Un chunk mai lung le înlocuiește pe cele deja păstrate pe care le
+        # include, pe poziția celui mai relevant dintre ele
+        contained = [i for i, (_, other) in enumerate(kept) if other in norm]
+        if contained:
+            kept[contained[0]] = (chunk, norm)
+            for i in reversed(contained[1:]):
+                del kept[i]
+        else:
+            kept.append((chunk, norm))
+    return [chunk for chunk, _ in kept]
+
+
+def clean_history(history: Optional[Sequence[dict]]) -> List[Dict[str, str]]:
+    """Only real user/assistant messages: no [SYSTEM] markers, no empty content."""
+    return [
+        {"role": msg["role"], "content": msg["content"]}
+        for msg in (history or [])
+        if msg.get("role") in ("user", "assistant")
+        and msg.get("content")
+        and not msg["content"].startswith(SYSTEM_MARKER_PREFIX)
+    ]
+
+
+def summarize_turns(messages: Sequence[dict]) -> str:
+    """Short extractive summary of older turns: the questions the user asked."""
+    questions = []
+    for msg in messages:
+        if msg["role"] == "user":
+            text = " ".join(msg["content"].split())
+            if len(text) > SUMMARY_QUESTION_CHARS:
+                text = text[:SUMMARY_QUESTION_CHARS].rstrip() + "…"
+            questions.append(f"- {text}")
+    if not questions:
+        return ""
+    return "Rezumatul conversației anterioare – utilizatorul a întrebat:\n" + "\n".join(questions)
+
+
+def _truncate_to_tokens(text: str, max_tokens: int) -> str:
+    if max_tokens <= 0:
+        return ""
+    if _encoding is not None:
+        tokens = _encoding.encode(text, disallowed_special=())
+        return text if len(tokens) <= max_tokens else _encoding.decode(tokens[:max_tokens])
+    return text[: int(max_tokens * CHARS_PER_TOKEN)]
+
+
+def build_messages(
+    system_prompt: str,
+    render_user_prompt: Callable[[str], str],
+    context_chunks: Sequence[str],
+    conversation_history: Optional[Sequence[dict]] = None,
+    budget: int = RAG_PROMPT_TOKEN_BUDGET,
+    max_history_messages: int = RAG_HISTORY_MAX_MESSAGES,
+) -> Tuple[List[dict], dict]:
+    """
+    Assemble system prompt + history + user prompt within a token budget.
+
+    Args:
+        system_prompt: Promptul sistem (intră mereu)
+        render_user_prompt: Primește textul de context (chunk-urile alese,
+                            separate prin linie goală) și întoarce mesajul user
+        context_chunks: Chunk-urile, cele mai relevante primele
+        conversation_history: Mesajele anterioare (cele mai vechi primele)
+        budget: Numărul maxim de token-uri pentru mesaje
+
+    Returns:
+        (messages, usage) – usage are numărul de token-uri pe fiecare parte
+        și câte chunk-uri / mesaje au fost păstrate sau eliminate
+    """
+    chunks = dedupe_chunks(context_chunks)
+    history = clean_history(conversation_history)[-max_history_messages:] if max_history_messages > 0 else []
+
+    system_tokens = count_message_tokens([{"content": system_prompt}])
+    base_user_tokens = count_message_tokens([{"content": render_user_prompt("")}])
+    remaining = budget - system_tokens - base_user_tokens
+    history_reserve = min(count_message_tokens(history), int(budget * RAG_HISTORY_BUDGET_SHARE))
+
+    # 1. Context: chunk-urile în ordinea relevanței; primul intră mereu
+    # (trunchiat dacă e nevoie), ca modelul să aibă măcar o sursă
+    selected: List[str] = []
+    chunk_tokens = 0
+    chunk_budget = remaining - history_reserve
+    first_chunk_truncated = False
+    for chunk in chunks:
+        separator = count_tokens("\n\n") if selected else 0
+        tokens = count_tokens(chunk) + separator
+        if tokens > chunk_budget - chunk_tokens:
+            if not selected:
+                chunk = _truncate_to_tokens(chunk, chunk_budget)
+                first_chunk_truncated = True
+                if chunk:
+                    selected.append(chunk)
+                    chunk_tokens = count_tokens(chunk)
+            break
+        selected.append(chunk)
+        chunk_tokens += tokens
+    remaining -= chunk_tokens
+
+    # 2. Istoric: cele mai noi mesaje, cât încap
+    kept_history: List[dict] = []
+    history_tokens = 0
+    for msg in reversed(history):
+        tokens = count_message_tokens([msg])
+        if tokens > remaining:
+            break
+        kept_history.insert(0, msg)
+        history_tokens += tokens
+        remaining -= tokens
+
+    # 3. Mesajele vechi care nu au încăput → rezumat; dacă nu e loc de el,
+    # renunțăm și la cel mai vechi mesaj păstrat (intră în rezumat)
+    summary_messages: List[dict] = []
+    summary_tokens = 0
+    while len(kept_history) < len(history):
+        dropped = history[: len(history) - len(kept_history)]
+        summary = summarize_turns(dropped)
+        if not summary:
+            break
+        tokens = count_message_tokens([{"content": summary}])
+        if tokens <= remaining:
+            summary_messages = [{"role": "system", "content": summary}]
+            summary_tokens = tokens
+            remaining -= tokens
+            break
+        if not kept_history:
+            break
+        freed = kept_history.pop(0)
+        freed_tokens = count_message_tokens([freed])
+        history_tokens -= freed_tokens
+        remaining += freed_tokens
+    dropped = history[: len(history) - len(kept_history)]
+
+    user_prompt = render_user_prompt("\n\n".join(selected))
+    messages = (
+        [{"role": "system", "content": system_prompt}]
+        + summary_messages
+        + kept_history
+        + [{"role": "user", "content": user_prompt}]
+    )
+
+    total = count_message_tokens(messages)
+    usage = {
+        "tokenizer": TOKENIZER,
+        "budget": budget,
+        "total": total,
+        "system": system_tokens,
+        "question": base_user_tokens,
+        "chunks": chunk_tokens,
+        "chunks_used": len(selected),
+        "chunks_dropped": len(context_chunks) - len(selected),
+        "history": history_tokens,
+        "history_messages": len(kept_history),
+        "history_dropped": len(dropped),
+        "summary": summary_tokens,
+        # Bugetul a tăiat ceva (chunk-uri, istoric), nu doar duplicatele
+        "truncated": first_chunk_truncated or len(selected) < len(chunks) or bool(dropped),
+    }
+    return messages, usage
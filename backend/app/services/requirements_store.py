@@ -0,0 +1,190 @@
+"""
+Requirements Store - Persistent memo of LLM1 requirement extractions
+
+LLM1 (extract_procedure_requirements) este un apel gpt-4o mare, dar rezultatul
+depinde doar de procedură și de textele primite. Îl păstrăm după cheia:
+    procedura normalizată + amprenta setului de chunk-uri (page_url, text)
+    + versiunea promptului LLM1,
+așa că /llm-workflow/complete repetat cu aceleași surse rulează doar LLM2.
+Dacă se schimbă textul unei pagini, se schimbă amprenta și LLM1 rulează din nou.
+
+Două niveluri, ca result_cache:
+    1. LRU în proces (REQUIREMENTS_STORE_MAX_ENTRIES)
+    2. SQLite pe disc (REQUIREMENTS_DB_PATH), păstrat între reporniri
+
+Configurare (opțional, în .env):
+    REQUIREMENTS_DB_PATH=knowledge/requirements.sqlite3
+    REQUIREMENTS_STORE_MAX_ENTRIES=256
+    REQUIREMENTS_STORE_TTL=2592000
+"""
+
+import asyncio
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Optional, Sequence
+
+from app.services.knowledge_loader import JSON_KNOWLEDGE_DIR
+
+
+REQUIREMENTS_DB_PATH = Path(os.getenv("REQUIREMENTS_DB_PATH", str(JSON_KNOWLEDGE_DIR / "requirements.sqlite3")))
+REQUIREMENTS_STORE_MAX_ENTRIES = int(os.getenv("REQUIREMENTS_STORE_MAX_ENTRIES", "256"))
+REQUIREMENTS_STORE_TTL = float(os.getenv("REQUIREMENTS_STORE_TTL", str(30 * 24 * 3600)))
+
+
+def normalize_procedure(procedure_description: str) -> str:
+    return " ".join(procedure_description.lower().split())
+
+
+def chunks_fingerprint(text_chunks: Sequence[dict]) -> str:
+    """
+    Order-independent hash of the (page_url, text) chunk set.
+    Duplicate chunks count once.
+    """
+    items = sorted({
+        (chunk.get("page_url") or "", hashlib.sha256((chunk.get("text") or "").encode("utf-8")).hexdigest())
+        for chunk in text_chunks
+    })
+    return hashlib.sha256(json.dumps(items).encode("utf-8")).hexdigest()
+
+
+def requirements_key(procedure_description: str, text_chunks: Sequence[dict], prompt_version: str) -> str:
+    procedure_hash = hashlib.sha256(normalize_procedure(procedure_description).encode("utf-8")).hexdigest()
+    return f"llm1:v{prompt_version}:{procedure_hash[:16]}:{chunks_fingerprint(text_chunks)}"
+
+
+class RequirementsStore:
+    """In-process LRU in front of an on-disk SQLite table (values stored as JSON)."""
+
+    def __init__(
+        self,
+        path: Optional[Path] = REQUIREMENTS_DB_PATH,
+        max_entries: int = REQUIREMENTS_STORE_MAX_ENTRIES,
+        ttl: float = REQUIREMENTS_STORE_TTL,
+    ):
+        self.path = path
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[str, tuple[float, str]]" = OrderedDict()
+        self._db: Optional[sqlite3.Connection] = None
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+
+    # ---------- nivelul 2: SQLite ----------
+
+    def _connection(self) -> Optional[sqlite3.Connection]:
+        # Apelat sub lock; conexiunea e deschisă la prima folosire
+        if self._db is None and self.path is not None:
+            try:
+                self.path.parent.mkdir(parents=True, exist_ok=True)
+                db = sqlite3.connect(str(self.path), check_same_thread=False)
+                db.execute("PRAGMA journal_mode=WAL")
+                db.execute(
+                    "CREATE TABLE IF NOT EXISTS llm1_requirements ("
+                    " key TEXT PRIMARY KEY,"
+                    " procedure TEXT NOT NULL,"
+                    " result TEXT NOT NULL,"
+                    " created_at REAL NOT NULL)"
+                )
+                db.commit()
+                self._db = db
+            except (sqlite3.Error, OSError) as e:
+                print(f"Warning: Requirements store on disk unavailable, using memory only: {e}")
+                self.path = None
+        return self._db
+
+    def _disk_get(self, key: str) -> Optional[tuple[float, str]]:
+        db = self._connection()
+        if db is None:
+            return None
+        try:
+            row = db.execute("SELECT created_at, result FROM llm1_requirements WHERE key = ?", (key,)).fetchone()
+        except sqlite3.Error as e:
+            print(f"Warning: Requirements store read failed: {e}")
+            return None
+        return (row[0] + self.ttl, row[1]) if row else None
+
+    def _disk_set(self, key: str, procedure: str, raw: str, created_at: float) -> None:
+        db = self._connection()
+        if db is None:
+            return
+        try:
+            db.execute(
+                "INSERT OR REPLACE INTO llm1_requirements (key, procedure, result, created_at) VALUES (?, ?, ?, ?)",
+                (key, procedure, raw, created_at),
+            )
+            db.commit()
+        except sqlite3.Error as e:
+            print(f"Warning: Requirements store write failed: {e}")
+
+    # ---------- API ----------
+
+    def _memory_set(self, key: str, expires_at: float, raw: str) -> None:
+        # Apelat sub lock
+        self._entries[key] = (expires_at, raw)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def get(self, key: str) -> Optional[Any]:
+        """Stored LLM1 result for key, or None (memory first, then SQLite)."""
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] > now:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return json.loads(entry[1])
+
+            entry = self._disk_get(key)
+            if entry is None or entry[0] <= now:
+                self.misses += 1
+                return None
+            self._memory_set(key, *entry)
+            self.disk_hits += 1
+            return json.loads(entry[1])
+
+    def put(self, key: str, procedure_description: str, result: Any) -> None:
+        raw = json.dumps(result, ensure_ascii=False)
+        now = time.time()
+        with self._lock:
+            self._memory_set(key, now + self.ttl, raw)
+            self._disk_set(key, procedure_description, raw, now)
+
+    async def get_async(self, key: str) -> Optional[Any]:
+        """Like get(), but runs in a worker thread (the SQLite read may hit the disk)."""
+        return await asyncio.to_thread(self.get, key)
+
+    async def put_async(self, key: str, procedure_description: str, result: Any) -> None:
+        await asyncio.to_thread(self.put, key, procedure_description, result)
+
+    def clear(self) -> None:
+        """Drop every stored extraction (memory and disk)."""
+        with self._lock:
+            self._entries.clear()
+            db = self._connection()
+            if db is not None:
+                db.execute("DELETE FROM llm1_requirements")
+                db.commit()
+
+    def stats(self) -> dict:
+        return {
+            "entries": len(self._entries),
+            "max_entries": self.max_entries,
+            "ttl": self.ttl,
+            "hits": self.hits,
+            "disk_hits": self.disk_hits,
+            "misses": self.misses,
+            "path": str(self.path) if self.path is not None else None,
+        }
+
+
+# Instanța partajată de toată aplicația
+requirements_store = RequirementsStore()
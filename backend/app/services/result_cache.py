@@ -0,0 +1,206 @@
+"""
+Result Cache - Content-addressed cache for document AI results
+
+Același scan încărcat din nou (/upload, apoi /upload-single, apoi
+/clerk/documents/ai-validate) nu mai plătește încă o dată apelurile vision:
+cheia este SHA-256 al fișierului + sarcina + versiunea promptului (+ tipul
+documentului / data curentă, unde rezultatul depinde de ele).
+
+Două niveluri:
+    1. LRU în proces, cu TTL, număr maxim de intrări și dimensiune maximă
+       (bytes JSON) – rezultatele cu text extras pot fi de mii de ori mai
+       mari decât un simplu tip de document
+    2. Redis (opțional, dacă REDIS_URL e setat), partajat între workeri
+
+Configurare (opțional, în .env):
+    RESULT_CACHE_MAX_ENTRIES=2048
+    RESULT_CACHE_MAX_BYTES=67108864
+    RESULT_CACHE_TTL=604800
+    REDIS_URL=redis://localhost:6379/0
+"""
+
+import asyncio
+import hashlib
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Optional
+
+import redis
+
+
+RESULT_CACHE_MAX_ENTRIES = int(os.getenv("RESULT_CACHE_MAX_ENTRIES", "2048"))
+RESULT_CACHE_MAX_BYTES = int(os.getenv("RESULT_CACHE_MAX_BYTES", str(64 * 1024 * 1024)))
+RESULT_CACHE_TTL = float(os.getenv("RESULT_CACHE_TTL", str(7 * 24 * 3600)))
+REDIS_URL = os.getenv("REDIS_URL")
+
+# După o eroare Redis, nivelul 2 e ignorat atâtea secunde
+REDIS_RETRY_AFTER = 60.0
+
+_KEY_PREFIX = "cityfix:doc"
+
+
+def content_hash(file_bytes: bytes) -> str:
+    """SHA-256 hex digest of the file content."""
+    return hashlib.sha256(file_bytes).hexdigest()
+
+
+def make_key(task: str, prompt_version: str, file_bytes: bytes, *parts: str) -> str:
+    """
+    Build a cache key for one AI task on one file.
+
+    Args:
+        task: Task name (ex: "document_type", "metadata")
+        prompt_version: Bump when the task's prompt changes
+        file_bytes: File content (hashed)
+        *parts: Extra inputs the result depends on (doc type, date, ...)
+    """
+    return ":".join([_KEY_PREFIX, task, f"v{prompt_version}", content_hash(file_bytes), *parts])
+
+
+class ResultCache:
+    """
+    In-process LRU with TTL, backed by an optional Redis tier.
+
+    Values are stored as JSON, so every get() returns a fresh copy that the
+    caller may modify.
+    """
+
+    def __init__(
+        self,
+        max_entries: int = RESULT_CACHE_MAX_ENTRIES,
+        ttl: float = RESULT_CACHE_TTL,
+        redis_url: Optional[str] = REDIS_URL,
+        max_bytes: int = RESULT_CACHE_MAX_BYTES,
+    ):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        # key -> (expires_at, JSON, dimensiunea JSON-ului în bytes)
+        self._entries: "OrderedDict[str, tuple[float, str, int]]" = OrderedDict()
+        self._bytes = 0
+        self._redis = redis.Redis.from_url(redis_url, socket_timeout=0.5) if redis_url else None
+        self._redis_down_until = 0.0
+        self.hits = 0
+        self.misses = 0
+
+    # ---------- nivelul 1: memorie ----------
+
+    def _memory_get(self, key: str) -> Optional[str]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            expires_at, value, size = entry
+            if expires_at <= time.monotonic():
+                del self._entries[key]
+                self._bytes -= size
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def _memory_set(self, key: str, value: str, ttl: float) -> None:
+        size = len(value.encode("utf-8"))
+        with self._lock:
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self._bytes -= previous[2]
+            if size > self.max_bytes:
+                # Nu golim tot cache-ul pentru o singură valoare uriașă
+                return
+            self._entries[key] = (time.monotonic() + ttl, value, size)
+            self._bytes += size
+            while len(self._entries) > self.max_entries or self._bytes > self.max_bytes:
+                _, (_, _, evicted_size) = self._entries.popitem(last=False)
+                self._bytes -= evicted_size
+
+    # ---------- nivelul 2: Redis ----------
+
+    def _redis_available(self) -> bool:
+        return self._redis is not None and time.monotonic() >= self._redis_down_until
+
+    def _redis_failed(self, e: Exception) -> None:
+        print(f"Warning: Result cache Redis unavailable, using memory only: {e}")
+        self._redis_down_until = time.monotonic() + REDIS_RETRY_AFTER
+
+    def _redis_get(self, key: str) -> Optional[str]:
+        try:
+            raw = self._redis.get(key)
+        except redis.RedisError as e:
+            self._redis_failed(e)
+            return None
+        return raw.decode("utf-8") if raw is not None else None
+
+    def _redis_set(self, key: str, value: str, ttl: float) -> None:
+        try:
+            self._redis.set(key, value, ex=max(1, int(ttl)))
+        except redis.RedisError as e:
+            self._redis_failed(e)
+
+    # ---------- API ----------
+
+    def get(self, key: str) -> Optional[Any]:
+        """Cached value for key, or None (memory first, then Redis)."""
+        value = self._memory_get(key)
+        if value is None and self._redis_available():
+            value = self._redis_get(key)
+            if value is not None:
+                self._memory_set(key, value, self.ttl)
+        return self._decode(value)
+
+    def set(self, key: str, value: Any, ttl: Optional[float] = None) -> None:
+        """Store a JSON-serializable value in both tiers."""
+        ttl = self.ttl if ttl is None else ttl
+        raw = json.dumps(value, ensure_ascii=False)
+        self._memory_set(key, raw, ttl)
+        if self._redis_available():
+            self._redis_set(key, raw, ttl)
+
+    async def get_async(self, key: str) -> Optional[Any]:
+        """Like get(), but the Redis lookup runs in a worker thread."""
+        value = self._memory_get(key)
+        if value is None and self._redis_available():
+            value = await asyncio.to_thread(self._redis_get, key)
+            if value is not None:
+                self._memory_set(key, value, self.ttl)
+        return self._decode(value)
+
+    async def set_async(self, key: str, value: Any, ttl: Optional[float] = None) -> None:
+        """Like set(), but the Redis write runs in a worker thread."""
+        ttl = self.ttl if ttl is None else ttl
+        raw = json.dumps(value, ensure_ascii=False)
+        self._memory_set(key, raw, ttl)
+        if self._redis_available():
+            await asyncio.to_thread(self._redis_set, key, raw, ttl)
+
+    def _decode(self, raw: Optional[str]) -> Optional[Any]:
+        if raw is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        return json.loads(raw)
+
+    def clear(self) -> None:
+        """Drop the in-process tier (Redis entries expire by TTL)."""
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def stats(self) -> dict:
+        return {
+            "entries": len(self._entries),
+            "max_entries": self.max_entries,
+            "bytes": self._bytes,
+            "max_bytes": self.max_bytes,
+            "ttl": self.ttl,
+            "hits": self.hits,
+            "misses": self.misses,
+            "redis": self._redis is not None,
+        }
+
+
+# Instanța partajată de toată aplicația
+result_cache = ResultCache()
@@ -0,0 +1,142 @@
+"""
+Search Index - BM25 inverted index over the knowledge chunks
+
+Indexul se construiește o singură dată pentru un set de chunk-uri și apoi
+răspunde la întrebări fără să mai parcurgă textul chunk-urilor. Diacriticele
+românești (ă/â/î/ș/ț, inclusiv variantele cu sedilă ş/ţ) sunt eliminate atât
+la indexare cât și la căutare, ca "autorizație" să găsească "autorizatie".
+"""
+
+import heapq
+import math
+import re
+import threading
+from collections import Counter
+from typing import Dict, List, Sequence, Tuple
+
+
+_DIACRITICS = str.maketrans({
+    "ă": "a", "â": "a", "î": "i", "ș": "s", "ş": "s", "ț": "t", "ţ": "t",
+    "Ă": "a", "Â": "a", "Î": "i", "Ș": "s", "Ş": "s", "Ț": "t", "Ţ": "t",
+})
+
+_TOKEN_RE = re.compile(r"\w+", re.UNICODE)
+
+# Parametrii standard BM25
+BM25_K1 = 1.2
+BM25_B = 0.75
+
+
+def fold_diacritics(text: str) -> str:
+    """Lowercase text and strip Romanian diacritics."""
+    return text.lower().translate(_DIACRITICS)
+
+
+def tokenize(text: str) -> List[str]:
+    """Split text into diacritic-folded word tokens."""
+    return _TOKEN_RE.findall(fold_diacritics(text))
+
+
+class BM25Index:
+    """
+    Inverted index with BM25 scoring.
+
+    Postings are stored per term as two parallel tuples (chunk indices and
+    term frequencies), so a query only touches the chunks that contain at
+    least one of its terms.
+    """
+
+    def __init__(self, chunks: Sequence[str], k1: float = BM25_K1, b: float = BM25_B):
+        self.chunks = chunks
+        self.k1 = k1
+        self.b = b
+
+        postings: Dict[str, List[Tuple[int, int]]] = {}
+        doc_lengths: List[int] = []
+        for doc_id, chunk in enumerate(chunks):
+            tokens = tokenize(chunk)
+            doc_lengths.append(len(tokens))
+            for term, tf in Counter(tokens).items():
+                postings.setdefault(term, []).append((doc_id, tf))
+
+        self.doc_count = len(chunks)
+        self.avg_doc_length = (sum(doc_lengths) / self.doc_count) if self.doc_count else 0.0
+
+        # Normalizarea de lungime depinde doar de document, o precalculăm
+        avgdl = self.avg_doc_length or 1.0
+        self._length_norm = [k1 * (1 - b + b * dl / avgdl) for dl in doc_lengths]
+
+        self._postings: Dict[str, Tuple[Tuple[int, ...], Tuple[int, ...]]] = {}
+        self._idf: Dict[str, float] = {}
+        for term, plist in postings.items():
+            doc_ids, tfs = zip(*plist)
+            self._postings[term] = (doc_ids, tfs)
+            df = len(doc_ids)
+            self._idf[term] = math.log(1 + (self.doc_count - df + 0.5) / (df + 0.5))
+
+    def search(self, query: str, max_results: int = 3) -> List[Tuple[float, int]]:
+        """
+        Score chunks against the query.
+
+        Returns:
+            List[Tuple[float, int]]: (score, chunk index) for the top
+            max_results chunks, best first
+        """
+        if max_results <= 0:
+            return []
+
+        scores: Dict[int, float] = {}
+        k1_plus_1 = self.k1 + 1
+        length_norm = self._length_norm
+        for term in set(tokenize(query)):
+            posting = self._postings.get(term)
+            if posting is None:
+                continue
+            idf = self._idf[term]
+            for doc_id, tf in zip(*posting):
+                scores[doc_id] = scores.get(doc_id, 0.0) + idf * tf * k1_plus_1 / (tf + length_norm[doc_id])
+
+        # Selecție top-k cu heap, fără sortarea tuturor scorurilor
+        top = heapq.nlargest(max_results, scores.items(), key=lambda item: (item[1], -item[0]))
+        return [(score, doc_id) for doc_id, score in top]
+
+
+def merge_ranked_results(*ranked_lists: Sequence[str], max_results: int = 3) -> List[str]:
+    """
+    Interleave several best-first result lists (e.g. vector + BM25),
+    dropping duplicates, until max_results chunks are collected.
+    """
+    merged: List[str] = []
+    seen = set()
+    for rank in range(max((len(r) for r in ranked_lists), default=0)):
+        for results in ranked_lists:
+            if rank < len(results) and results[rank] not in seen:
+                seen.add(results[rank])
+                merged.append(results[rank])
+                if len(merged) >= max_results:
+                    return merged
+    return merged
+
+
+# Indexul pentru ultimul set de chunk-uri căutat. Păstrăm o referință la
+# secvență, ca identitatea ei să nu poată fi refolosită de alt obiect.
+_index_lock = threading.Lock()
+_cached_chunks: Sequence[str] = ()
+_cached_index: BM25Index = BM25Index(())
+
+
+def get_index(chunks: Sequence[str]) -> BM25Index:
+    """
+    Return the BM25 index for this chunk sequence, building it on first use.
+
+    The index is cached by identity: pass the same (immutable) sequence, such
+    as the tuple returned by knowledge_corpus.corpus.get_chunks(), to reuse it.
+    """
+    global _cached_chunks, _cached_index
+    if chunks is _cached_chunks:
+        return _cached_index
+    with _index_lock:
+        if chunks is not _cached_chunks:
+            _cached_index = BM25Index(chunks)
+            _cached_chunks = chunks
+        return _cached_index
@@ -0,0 +1,111 @@
+"""
+Single Flight - Coalescing of identical in-flight LLM calls
+
+Când mai mulți cetățeni trimit aceeași întrebare în același timp (ex: după un
+anunț al primăriei), cererile către model sunt identice. În loc de N apeluri
+gpt-4o, primul request face apelul și ceilalți așteaptă și primesc același
+rezultat (sau aceeași excepție). Cheia este hash-ul cererii canonice (model,
+mesaje, parametri), deci doar cererile identice sunt comasate.
+
+Nu este un cache: după ce apelul se termină, cheia dispare, iar următorul
+request identic face un apel nou (pentru reutilizare există result_cache și
+answer_cache).
+"""
+
+import asyncio
+import hashlib
+import json
+import threading
+from typing import Any, Awaitable, Callable, Dict
+
+
+def completion_key(**request: Any) -> str:
+    """Hash of a canonical chat completion request (model, messages, options)."""
+    canonical = json.dumps(request, sort_keys=True, ensure_ascii=False, separators=(",", ":"), default=str)
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+
+class _Call:
+    __slots__ = ("done", "result", "error")
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class SingleFlight:
+    """One upstream call per key at a time; concurrent callers share its outcome."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls: Dict[str, _Call] = {}
+        self._tasks: Dict[str, asyncio.Future] = {}
+        self.calls = 0
+        self.shared = 0
+
+    def do(self, key: str, fn: Callable[[], Any]) -> Any:
+        """Run fn() for key, or wait for the identical call already running (threads)."""
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+                self.calls += 1
+            else:
+                self.shared += 1
+
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            call.result = fn()
+            return call.result
+        except Exception as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                self._calls.pop(key, None)
+            call.done.set()
+
+    async def do_async(self, key: str, fn: Callable[[], Awaitable[Any]]) -> Any:
+        """Async variant of do(); the call runs as a task shared by all waiters."""
+        loop = asyncio.get_running_loop()
+        task = self._tasks.get(key)
+        if task is None or task.get_loop() is not loop:
+            task = asyncio.ensure_future(fn())
+            self._tasks[key] = task
+            self.calls += 1
+            task.add_done_callback(lambda t: self._task_done(key, t))
+        else:
+            self.shared += 1
+        # shield: dacă un request este anulat (clientul a închis conexiunea),
+        # apelul continuă pentru ceilalți care îl așteaptă
+        return await asyncio.shield(task)
+
+    def _task_done(self, key: str, task: asyncio.Future) -> None:
+        if self._tasks.get(key) is task:
+            del self._tasks[key]
+        if not task.cancelled():
+            # Marcăm excepția ca preluată, chiar dacă toți cei care așteptau au fost anulați
+            task.exception()
+
+    def stats(self) -> dict:
+        return {
+            "calls": self.calls,
+            "shared": self.shared,
+            "in_flight": len(self._calls) + len(self._tasks),
+        }
+
+
+# Instanța partajată de toate apelurile LLM
+llm_flight = SingleFlight()
+
+
+def create_completion(client, **request: Any):
+    """client.chat.completions.create(**request), coalesced with identical calls in flight."""
+    return llm_flight.do(completion_key(**request), lambda: client.chat.completions.create(**request))
@@ -0,0 +1,223 @@
+"""
+Storage Writer - Concurrent, retried uploads to Supabase storage
+
+/upload urca fișierele valide în bucket-ul "documents" unul după altul, în
+timpul request-ului, iar o eroare trecătoare (timeout, 5xx) pierdea fișierul
+doar cu un warning în log. StorageWriter:
+    1. urcă fișierele unui job în paralel, pe un pool limitat de thread-uri
+       (clientul Supabase e sincron),
+    2. reîncearcă erorile trecătoare cu backoff exponențial + jitter,
+    3. poate rula după ce răspunsul a fost trimis (BackgroundTasks),
+    4. ține starea fiecărui job, ca să poată fi interogată de client
+       (GET /upload/storage/{job_id}).
+
+Starea job-urilor e ținută în memorie, în procesul care a primit upload-ul.
+
+Configurare (opțional, în .env):
+    STORAGE_UPLOAD_CONCURRENCY=4
+    STORAGE_UPLOAD_RETRIES=3
+    STORAGE_UPLOAD_BACKOFF=0.5
+    STORAGE_UPLOAD_IN_BACKGROUND=true
+    STORAGE_JOB_TTL=3600
+"""
+
+import asyncio
+import os
+import random
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, List, Optional
+
+import httpx
+
+
+STORAGE_UPLOAD_CONCURRENCY = int(os.getenv("STORAGE_UPLOAD_CONCURRENCY", "4"))
+STORAGE_UPLOAD_RETRIES = int(os.getenv("STORAGE_UPLOAD_RETRIES", "3"))
+STORAGE_UPLOAD_BACKOFF = float(os.getenv("STORAGE_UPLOAD_BACKOFF", "0.5"))
+STORAGE_UPLOAD_IN_BACKGROUND = os.getenv("STORAGE_UPLOAD_IN_BACKGROUND", "true").lower() in ("1", "true", "yes")
+STORAGE_JOB_TTL = float(os.getenv("STORAGE_JOB_TTL", "3600"))
+
+# Răspunsuri HTTP ale storage-ului după care merită reîncercat
+TRANSIENT_STATUS_CODES = {408, 429, 500, 502, 503, 504}
+
+
+@dataclass
+class StorageFile:
+    path: str
+    content: bytes
+    content_type: str
+    status: str = "pending"  # pending | uploading | done | failed
+    attempts: int = 0
+    error: Optional[str] = None
+
+
+@dataclass
+class StorageJob:
+    job_id: str
+    files: List[StorageFile]
+    status: str = "pending"  # pending | running | done | partial | failed
+    created_at: float = field(default_factory=time.time)
+    finished_at: Optional[float] = None
+
+    def to_dict(self) -> dict:
+        return {
+            "job_id": self.job_id,
+            "status": self.status,
+            "created_at": self.created_at,
+            "finished_at": self.finished_at,
+            "files": [
+                {"path": f.path, "status": f.status, "attempts": f.attempts, "error": f.error}
+                for f in self.files
+            ],
+        }
+
+
+def _status_code(error: Exception) -> Optional[int]:
+    # storage3.StorageException poartă un dict cu "statusCode"
+    details = error.args[0] if error.args else None
+    if isinstance(details, dict):
+        try:
+            return int(details.get("statusCode"))
+        except (TypeError, ValueError):
+            return None
+    return None
+
+
+def _is_duplicate(error: Exception) -> bool:
+    details = error.args[0] if error.args else None
+    return isinstance(details, dict) and details.get("error") == "Duplicate"
+
+
+def is_transient(error: Exception) -> bool:
+    """Errors worth retrying: network failures, timeouts, throttling and 5xx."""
+    status = _status_code(error)
+    if status is None:
+        # Fără cod HTTP: doar erorile de rețea / timeout (httpx.TimeoutException
+        # e tot un TransportError). O eroare de programare (TypeError,
+        # KeyError...) nu trece la o nouă încercare
+        return isinstance(error, (httpx.TransportError, OSError))
+    return status in TRANSIENT_STATUS_CODES
+
+
+class StorageWriter:
+    """Uploads the files of a job concurrently (bounded) with retries and backoff."""
+
+    def __init__(
+        self,
+        upload_fn: Callable[[str, bytes, str], Any],
+        concurrency: int = STORAGE_UPLOAD_CONCURRENCY,
+        retries: int = STORAGE_UPLOAD_RETRIES,
+        backoff: float = STORAGE_UPLOAD_BACKOFF,
+        job_ttl: float = STORAGE_JOB_TTL,
+    ):
+        self.upload_fn = upload_fn
+        self.concurrency = concurrency
+        self.retries = retries
+        self.backoff = backoff
+        self.job_ttl = job_ttl
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._lock = threading.Lock()
+        self._jobs: Dict[str, StorageJob] = {}
+        self.uploaded = 0
+        self.retried = 0
+        self.failed = 0
+
+    def _pool(self) -> ThreadPoolExecutor:
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(
+                    max_workers=self.concurrency, thread_name_prefix="storage-upload"
+                )
+            return self._executor
+
+    # ---------- job-uri ----------
+
+    def create_job(self, files: List[tuple]) -> StorageJob:
+        """Register a job for [(path, content, content_type), ...]."""
+        now = time.time()
+        job = StorageJob(
+            job_id=uuid.uuid4().hex,
+            files=[StorageFile(path, content, content_type) for path, content, content_type in files],
+        )
+        with self._lock:
+            # Job-urile terminate de mult nu mai sunt interogate
+            for job_id in [
+                j.job_id for j in self._jobs.values()
+                if j.finished_at is not None and j.finished_at + self.job_ttl < now
+            ]:
+                del self._jobs[job_id]
+            self._jobs[job.job_id] = job
+        return job
+
+    def get_job(self, job_id: str) -> Optional[StorageJob]:
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    # ---------- upload ----------
+
+    async def _upload_file(self, file: StorageFile) -> None:
+        loop = asyncio.get_running_loop()
+        file.status = "uploading"
+        while True:
+            file.attempts += 1
+            try:
+                await loop.run_in_executor(self._pool(), self.upload_fn, file.path, file.content, file.content_type)
+                file.status = "done"
+                self.uploaded += 1
+                return
+            except Exception as e:
+                if file.attempts > 1 and _is_duplicate(e):
+                    # O încercare anterioară (timeout) a ajuns totuși în bucket
+                    file.status = "done"
+                    self.uploaded += 1
+                    return
+                if file.attempts > self.retries or not is_transient(e):
+                    file.status = "failed"
+                    file.error = str(e)
+                    self.failed += 1
+                    print(f"Storage upload warning for {file.path}: {e}")
+                    return
+                self.retried += 1
+                delay = self.backoff * (2 ** (file.attempts - 1))
+                await asyncio.sleep(delay * random.uniform(0.5, 1.5))
+            finally:
+                if file.status != "uploading":
+                    # Conținutul nu mai e necesar după ultima încercare
+                    file.content = b""
+
+    async def run(self, job: StorageJob) -> StorageJob:
+        """Upload every file of the job; never raises (per-file errors are recorded)."""
+        job.status = "running"
+        await asyncio.gather(*(self._upload_file(f) for f in job.files))
+        done = sum(1 for f in job.files if f.status == "done")
+        job.status = "done" if done == len(job.files) else ("failed" if done == 0 else "partial")
+        job.finished_at = time.time()
+        return job
+
+    def stats(self) -> dict:
+        with self._lock:
+            active = sum(1 for j in self._jobs.values() if j.finished_at is None)
+            jobs = len(self._jobs)
+        return {
+            "concurrency": self.concurrency,
+            "retries": self.retries,
+            "jobs": jobs,
+            "active_jobs": active,
+            "uploaded": self.uploaded,
+            "retried": self.retried,
+            "failed": self.failed,
+        }
+
+
+def _supabase_upload(path: str, content: bytes, content_type: str) -> Any:
+    # Import la prima folosire: modulul (și testele lui) nu cer credențiale Supabase
+    from app.services.supabase_client import supabase
+
+    return supabase.storage.from_("documents").upload(path, content, {"content-type": content_type})
+
+
+# Instanța partajată de toată aplicația
+storage_writer = StorageWriter(_supabase_upload)
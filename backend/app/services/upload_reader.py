@@ -0,0 +1,108 @@
+"""
+Upload Reader - Read uploaded files once, in chunks, with size limits
+
+Endpoint-urile de upload citeau fiecare fișier întreg cu `await file.read()`,
+iar /upload îl citea a doua oară (seek(0) + read) pentru Supabase storage:
+două copii complete ale fiecărui fișier în memorie. Acum fiecare fișier e:
+    1. citit în bucăți de UPLOAD_READ_CHUNK_SIZE,
+    2. hash-uit (SHA-256) în aceeași trecere,
+    3. verificat față de limitele per fișier și per request (HTTP 413),
+    4. adunat într-un bytearray, transformat apoi o singură dată în bytes,
+folosiți și de analiza AI, și de storage. Fișierele mari sunt deja ținute pe
+disc de Starlette (UploadFile e un SpooledTemporaryFile) până le citim.
+
+Configurare (opțional, în .env):
+    UPLOAD_MAX_FILE_BYTES=20971520
+    UPLOAD_MAX_REQUEST_BYTES=52428800
+    UPLOAD_READ_CHUNK_SIZE=65536
+"""
+
+import hashlib
+import os
+from dataclasses import dataclass
+from typing import List, Optional, Sequence
+
+from fastapi import HTTPException, UploadFile
+
+
+UPLOAD_MAX_FILE_BYTES = int(os.getenv("UPLOAD_MAX_FILE_BYTES", str(20 * 1024 * 1024)))
+UPLOAD_MAX_REQUEST_BYTES = int(os.getenv("UPLOAD_MAX_REQUEST_BYTES", str(50 * 1024 * 1024)))
+UPLOAD_READ_CHUNK_SIZE = int(os.getenv("UPLOAD_READ_CHUNK_SIZE", str(64 * 1024)))
+
+
+@dataclass(frozen=True)
+class UploadedDocument:
+    filename: str
+    content_type: str
+    size: int
+    sha256: str
+    content: bytes
+
+
+def _too_large(message: str) -> HTTPException:
+    return HTTPException(status_code=413, detail=message)
+
+
+async def read_upload(
+    file: UploadFile,
+    max_file_bytes: int = UPLOAD_MAX_FILE_BYTES,
+    remaining_request_bytes: Optional[int] = None,
+) -> UploadedDocument:
+    """
+    Read one uploaded file in chunks, hashing it and enforcing the size limits.
+
+    Args:
+        file: Fișierul primit de FastAPI
+        max_file_bytes: Dimensiunea maximă a fișierului
+        remaining_request_bytes: Cât mai permite limita pe request (None = fără limită)
+
+    Raises:
+        HTTPException 413 când fișierul depășește una dintre limite
+    """
+    limit = max_file_bytes if remaining_request_bytes is None else min(max_file_bytes, remaining_request_bytes)
+
+    def check(size: int) -> None:
+        if size > max_file_bytes:
+            raise _too_large(
+                f"Fișierul '{file.filename}' depășește dimensiunea maximă de {max_file_bytes // (1024 * 1024)} MB."
+            )
+        if size > limit:
+            raise _too_large("Fișierele încărcate depășesc împreună dimensiunea maximă permisă pentru un request.")
+
+    # Dimensiunea e de obicei cunoscută din multipart: refuzăm înainte de a citi ceva
+    if file.size is not None:
+        check(file.size)
+
+    digest = hashlib.sha256()
+    buffer = bytearray()
+    while True:
+        chunk = await file.read(UPLOAD_READ_CHUNK_SIZE)
+        if not chunk:
+            break
+        check(len(buffer) + len(chunk))
+        digest.update(chunk)
+        buffer += chunk
+
+    return UploadedDocument(
+        filename=file.filename,
+        content_type=file.content_type or "application/octet-stream",
+        size=len(buffer),
+        sha256=digest.hexdigest(),
+        # bytes: clientul Supabase și Pillow nu acceptă bytearray
+        content=bytes(buffer),
+    )
+
+
+async def read_uploads(
+    files: Sequence[UploadFile],
+    max_file_bytes: int = UPLOAD_MAX_FILE_BYTES,
+    max_request_bytes: int = UPLOAD_MAX_REQUEST_BYTES,
+) -> List[UploadedDocument]:
+    """Read every file of a request, in order, under a shared request-size budget."""
+    documents = []
+    remaining = max_request_bytes
+    for file in files:
+        document = await read_upload(file, max_file_bytes, remaining)
+        remaining -= document.size
+        documents.append(document)
+    return documents
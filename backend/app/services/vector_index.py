@@ -0,0 +1,203 @@
+"""
+Vector Index - Local cosine search over precomputed chunk embeddings
+
+Vectorii sunt construiți offline (vezi build_embeddings.py) și salvați ca
+matrice float32 brută (knowledge/embeddings.f32), plus un fișier JSON cu
+dimensiunile și id-urile chunk-urilor. La rulare matricea este deschisă cu
+np.memmap, așa că o căutare este un singur produs matrice-vector, fără să
+încărcăm tot fișierul în memorie la pornire.
+"""
+
+import hashlib
+import json
+import os
+import threading
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from app.services.knowledge_loader import JSON_KNOWLEDGE_DIR
+
+
+EMBEDDINGS_PATH = JSON_KNOWLEDGE_DIR / "embeddings.f32"
+EMBEDDINGS_META_PATH = JSON_KNOWLEDGE_DIR / "embeddings_meta.json"
+
+EMBEDDING_MODEL = "openai/text-embedding-3-small"
+EMBEDDING_BATCH_SIZE = 64
+
+
+def text_fingerprint(text: str) -> str:
+    """Short content hash used to detect chunks whose text changed."""
+    return hashlib.sha1(text.encode("utf-8")).hexdigest()
+
+
+def _normalize_rows(matrix: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return matrix / norms
+
+
+class VectorIndex:
+    """
+    Memory-mapped matrix of L2-normalized chunk embeddings.
+
+    Because rows are normalized at build time, cosine similarity is just
+    matrix @ query.
+    """
+
+    def __init__(self, matrix: np.ndarray, ids: Sequence[str]):
+        self.matrix = matrix
+        self.ids = list(ids)
+
+    @classmethod
+    def load(
+        cls,
+        path: Path = EMBEDDINGS_PATH,
+        meta_path: Path = EMBEDDINGS_META_PATH,
+    ) -> Optional["VectorIndex"]:
+        """Open the on-disk index, or return None if it was not built yet."""
+        if not path.exists() or not meta_path.exists():
+            return None
+        with meta_path.open("r", encoding="utf-8") as f:
+            meta = json.load(f)
+        rows, dims = meta["rows"], meta["dims"]
+        # Index vechi: alt model de embedding (alt spațiu vectorial) sau o
+        # matrice care nu are dimensiunea din meta (scriere întreruptă)
+        if meta.get("model") != EMBEDDING_MODEL:
+            print(
+                f"Warning: Vector index built with {meta.get('model')}, expected "
+                f"{EMBEDDING_MODEL}; ignoring it (run build_embeddings.py)"
+            )
+            return None
+        if path.stat().st_size != rows * dims * np.dtype(np.float32).itemsize:
+            print(f"Warning: Vector index {path} does not match its metadata; ignoring it (run build_embeddings.py)")
+            return None
+        if rows == 0:
+            return cls(np.zeros((0, dims), dtype=np.float32), [])
+        matrix = np.memmap(path, dtype=np.float32, mode="r", shape=(rows, dims))
+        return cls(matrix, meta["ids"])
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def search(self, query_embedding: Sequence[float], max_results: int = 3) -> List[Tuple[float, str]]:
+        """
+        Cosine top-k search.
+
+        Returns:
+            List[Tuple[float, str]]: (similarity, chunk id), best first
+        """
+        if len(self.ids) == 0 or max_results <= 0:
+            return []
+
+        query = np.asarray(query_embedding, dtype=np.float32)
+        norm = np.linalg.norm(query)
+        if norm == 0:
+            return []
+        scores = self.matrix @ (query / norm)
+
+        k = min(max_results, len(scores))
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top], kind="stable")]
+        return [(float(scores[i]), self.ids[i]) for i in top]
+
+
+def build_vector_index(
+    chunks: Sequence[Tuple[str, str]],
+    embed_batch: Callable[[List[str]], List[List[float]]],
+    path: Path = EMBEDDINGS_PATH,
+    meta_path: Path = EMBEDDINGS_META_PATH,
+    batch_size: int = EMBEDDING_BATCH_SIZE,
+) -> dict:
+    """
+    Build (or incrementally rebuild) the on-disk embedding matrix.
+
+    Chunks whose id and text fingerprint match the previous build reuse the
+    stored vector; only new or changed chunks are sent to embed_batch.
+
+    Args:
+        chunks: (chunk_id, text) pairs
+        embed_batch: function that embeds a list of texts
+            (ai_processor.create_embeddings_batch)
+
+    Returns:
+        dict: {"rows": int, "embedded": int, "reused": int}
+    """
+    previous = VectorIndex.load(path, meta_path)
+    previous_rows: Dict[Tuple[str, str], int] = {}
+    if previous is not None:
+        with meta_path.open("r", encoding="utf-8") as f:
+            old_meta = json.load(f)
+        for row, (chunk_id, fp) in enumerate(zip(old_meta["ids"], old_meta["fingerprints"])):
+            previous_rows[(chunk_id, fp)] = row
+
+    ids = [chunk_id for chunk_id, _ in chunks]
+    fingerprints = [text_fingerprint(text) for _, text in chunks]
+
+    vectors: List[Optional[np.ndarray]] = [None] * len(chunks)
+    pending: List[int] = []
+    for i, key in enumerate(zip(ids, fingerprints)):
+        row = previous_rows.get(key)
+        if row is not None:
+            vectors[i] = np.array(previous.matrix[row], dtype=np.float32)
+        else:
+            pending.append(i)
+
+    for start in range(0, len(pending), batch_size):
+        batch = pending[start : start + batch_size]
+        embedded = embed_batch([chunks[i][1] for i in batch])
+        for i, vector in zip(batch, embedded):
+            vectors[i] = np.asarray(vector, dtype=np.float32)
+        print(f"Embedded {min(start + batch_size, len(pending))}/{len(pending)} chunks")
+
+    dims = len(vectors[0]) if vectors else 0
+    matrix = _normalize_rows(np.vstack(vectors)) if vectors else np.zeros((0, dims), dtype=np.float32)
+
+    # Scriem într-un fișier temporar și apoi înlocuim atomic, ca procesele
+    # care au deja fișierul mapat să nu vadă o matrice pe jumătate scrisă.
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_suffix(".f32.tmp")
+    matrix.astype(np.float32).tofile(tmp_path)
+    tmp_meta = meta_path.with_suffix(".json.tmp")
+    with tmp_meta.open("w", encoding="utf-8") as f:
+        json.dump(
+            {
+                "model": EMBEDDING_MODEL,
+                "rows": len(ids),
+                "dims": dims,
+                "ids": ids,
+                "fingerprints": fingerprints,
+            },
+            f,
+            ensure_ascii=False,
+        )
+    os.replace(tmp_path, path)
+    os.replace(tmp_meta, meta_path)
+
+    return {"rows": len(ids), "embedded": len(pending), "reused": len(ids) - len(pending)}
+
+
+# Indexul deschis de aplicație (încărcat leneș, la prima căutare)
+_index_lock = threading.Lock()
+_loaded_index: Optional[VectorIndex] = None
+_loaded_mtime: Optional[int] = None
+
+
+def get_vector_index() -> Optional[VectorIndex]:
+    """
+    Return the on-disk vector index, reopening it if build_embeddings.py
+    wrote a new version. Returns None when no index has been built.
+    """
+    global _loaded_index, _loaded_mtime
+    try:
+        mtime = EMBEDDINGS_META_PATH.stat().st_mtime_ns
+    except OSError:
+        return None
+    if mtime == _loaded_mtime:
+        return _loaded_index
+    with _index_lock:
+        if mtime != _loaded_mtime:
+            _loaded_index = VectorIndex.load()
+            _loaded_mtime = mtime
+        return _loaded_index
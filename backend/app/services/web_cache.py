@@ -0,0 +1,178 @@
+"""
+Web Cache - In-memory cache of LEGAL_URLS content, refreshed in background
+
+/chatbot citește doar chunk-urile deja păstrate în memorie; rețeaua este
+folosită exclusiv de task-ul de fundal pornit la startup, care revalidează
+fiecare URL când îi expiră TTL-ul (cu If-None-Match / If-Modified-Since,
+deci o pagină neschimbată costă doar un răspuns 304).
+"""
+
+import asyncio
+import os
+import threading
+import time
+from dataclasses import dataclass
+from typing import Callable, Dict, List, Optional, Tuple
+
+from app.config.urls import LEGAL_URLS, LEGAL_URL_TTLS
+from app.services.web_scraper import (
+    chunk_text,
+    fetch_urls_conditional_async,
+)
+
+
+# TTL implicit pentru un URL (secunde) – paginile legale se schimbă rar
+WEB_CACHE_DEFAULT_TTL = float(os.getenv("WEB_CACHE_DEFAULT_TTL", "21600"))
+
+# Cât așteptăm înainte de a reîncerca un URL care a dat eroare
+WEB_CACHE_RETRY_AFTER = float(os.getenv("WEB_CACHE_RETRY_AFTER", "300"))
+
+# Cât de des verifică task-ul de fundal dacă a expirat vreun URL
+WEB_CACHE_CHECK_INTERVAL = float(os.getenv("WEB_CACHE_CHECK_INTERVAL", "60"))
+
+
+@dataclass
+class CachedPage:
+    url: str
+    ttl: float
+    chunks: Tuple[str, ...] = ()
+    etag: Optional[str] = None
+    last_modified: Optional[str] = None
+    fetched_at: Optional[float] = None
+    next_refresh: float = 0.0
+    last_error: Optional[str] = None
+
+
+class WebContentCache:
+    """
+    Per-URL cache of chunked page text.
+
+    get_chunks() never touches the network and returns the same tuple object
+    until some page content actually changes.
+    """
+
+    def __init__(
+        self,
+        urls: List[str],
+        ttl_overrides: Optional[Dict[str, float]] = None,
+        default_ttl: float = WEB_CACHE_DEFAULT_TTL,
+    ):
+        ttl_overrides = ttl_overrides or {}
+        self._lock = threading.Lock()
+        self._pages: Dict[str, CachedPage] = {
+            url: CachedPage(url=url, ttl=ttl_overrides.get(url, default_ttl))
+            for url in urls
+        }
+        self._chunks: Tuple[str, ...] = ()
+
+    @property
+    def urls(self) -> List[str]:
+        return list(self._pages)
+
+    def get_chunks(self) -> Tuple[str, ...]:
+        """All cached chunks, in LEGAL_URLS order (memory only)."""
+        return self._chunks
+
+    def due_urls(self, now: Optional[float] = None) -> List[str]:
+        """URLs whose TTL (or retry delay) has expired."""
+        now = time.monotonic() if now is None else now
+        return [url for url, page in self._pages.items() if page.next_refresh <= now]
+
+    def apply_result(self, url: str, result: Optional[dict]) -> None:
+        """
+        Store the outcome of a (conditional) fetch for url.
+
+        Args:
+            result: dict returned by fetch_webpage_conditional_async, or None if
+                    the fetch failed (the previous content is kept)
+        """
+        page = self._pages[url]
+        now = time.monotonic()
+        with self._lock:
+            if result is None:
+                page.last_error = "fetch failed"
+                page.next_refresh = now + min(page.ttl, WEB_CACHE_RETRY_AFTER)
+                return
+
+            page.last_error = None
+            page.fetched_at = time.time()
+            page.next_refresh = now + page.ttl
+            if result["not_modified"]:
+                return
+
+            page.etag = result.get("etag")
+            page.last_modified = result.get("last_modified")
+            new_chunks = tuple(chunk_text(result["text"] or ""))
+            if new_chunks != page.chunks:
+                page.chunks = new_chunks
+                self._chunks = tuple(c for p in self._pages.values() for c in p.chunks)
+
+    async def refresh_due_async(self) -> int:
+        """
+        Revalidate every expired URL concurrently (shared httpx pool, per-host
+        rate limits, overall deadline).
+
+        Returns:
+            int: number of URLs that were checked
+        """
+        due = self.due_urls()
+        if not due:
+            return 0
+        results = await fetch_urls_conditional_async(
+            {url: (self._pages[url].etag, self._pages[url].last_modified) for url in due}
+        )
+        for url in due:
+            self.apply_result(url, results.get(url))
+        return len(due)
+
+    async def run_refresher(
+        self,
+        check_interval: float = WEB_CACHE_CHECK_INTERVAL,
+        on_change: Optional[Callable[[], None]] = None,
+    ) -> None:
+        """
+        Background loop: refresh expired URLs, forever.
+
+        Args:
+            check_interval: Secunde între verificări
+            on_change: Apelat (într-un thread) când s-au schimbat chunk-urile,
+                       ca indexul de căutare să fie reconstruit aici, nu pe
+                       primul request care urmează
+        """
+        while True:
+            try:
+                before = self._chunks
+                await self.refresh_due_async()
+                if on_change is not None and self._chunks is not before:
+                    await asyncio.to_thread(on_change)
+            except Exception as e:
+                print(f"Warning: Web cache refresh failed: {e}")
+            await asyncio.sleep(check_interval)
+
+    def stats(self) -> dict:
+        """Per-URL cache state for monitoring."""
+        now = time.monotonic()
+        return {
+            "urls": [
+                {
+                    "url": page.url,
+                    "chunks": len(page.chunks),
+                    "ttl": page.ttl,
+                    "etag": page.etag,
+                    "last_modified": page.last_modified,
+                    "fetched_at": (
+                        time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime(page.fetched_at))
+                        if page.fetched_at
+                        else None
+                    ),
+                    "refresh_in": max(0.0, page.next_refresh - now),
+                    "last_error": page.last_error,
+                }
+                for page in self._pages.values()
+            ],
+            "chunk_count": len(self._chunks),
+        }
+
+
+# Instanța partajată de toată aplicația
+web_cache = WebContentCache(LEGAL_URLS, LEGAL_URL_TTLS)
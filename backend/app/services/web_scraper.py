@@ -2,9 +2,52 @@
 Web Scraper - Fetches and extracts text content from web pages
 """
 
+import asyncio
+import os
+import time
+from typing import Dict, List, Optional, Tuple
+from urllib.parse import urlsplit
+
+import httpx
 import requests
 from bs4 import BeautifulSoup
-from typing import List, Optional
+
+
+REQUEST_HEADERS = {
+    'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'
+}
+
+# Limite pentru varianta async (fetch_multiple_urls_async)
+SCRAPER_MAX_CONCURRENCY = int(os.getenv("SCRAPER_MAX_CONCURRENCY", "8"))
+SCRAPER_PER_HOST_CONCURRENCY = int(os.getenv("SCRAPER_PER_HOST_CONCURRENCY", "2"))
+SCRAPER_PER_HOST_INTERVAL = float(os.getenv("SCRAPER_PER_HOST_INTERVAL", "0.5"))
+SCRAPER_REQUEST_TIMEOUT = float(os.getenv("SCRAPER_REQUEST_TIMEOUT", "10"))
+SCRAPER_DEADLINE = float(os.getenv("SCRAPER_DEADLINE", "20"))
+
+
+def extract_page_text(html: bytes) -> str:
+    """
+    Extract readable text from an HTML document.
+    
+    Args:
+        html: Raw HTML content
+    
+    Returns:
+        str: Text with scripts, styles and page chrome removed
+    """
+    # Parse HTML
+    soup = BeautifulSoup(html, 'html.parser')
+    
+    # Remove script and style elements
+    for script in soup(["script", "style", "nav", "footer", "header"]):
+        script.decompose()
+    
+    # Get text
+    text = soup.get_text(separator='\n', strip=True)
+    
+    # Clean up text
+    lines = [line.strip() for line in text.splitlines() if line.strip()]
+    return '\n'.join(lines)
 
 
 def fetch_webpage_content(url: str) -> Optional[str]:
@@ -18,27 +61,9 @@ def fetch_webpage_content(url: str) -> Optional[str]:
         str: Extracted text content, or None if failed
     """
     try:
-        headers = {
-            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'
-        }
-        response = requests.get(url, headers=headers, timeout=10)
+        response = requests.get(url, headers=REQUEST_HEADERS, timeout=10)
         response.raise_for_status()
-        
-        # Parse HTML
-        soup = BeautifulSoup(response.content, 'html.parser')
-        
-        # Remove script and style elements
-        for script in soup(["script", "style", "nav", "footer", "header"]):
-            script.decompose()
-        
-        # Get text
-        text = soup.get_text(separator='\n', strip=True)
-        
-        # Clean up text
-        lines = [line.strip() for line in text.splitlines() if line.strip()]
-        text = '\n'.join(lines)
-        
-        return text
+        return extract_page_text(response.content)
         
     except Exception as e:
         print(f"Error fetching {url}: {e}")
@@ -83,3 +108,189 @@ def fetch_multiple_urls(urls: List[str]) -> List[str]:
             all_chunks.extend(chunks)
     
     return all_chunks
+
+
+# ========================================
+# Varianta async (httpx, conexiuni refolosite)
+# ========================================
+_async_client: Optional[httpx.AsyncClient] = None
+
+
+def get_async_client() -> httpx.AsyncClient:
+    """Shared pooled httpx client (keep-alive connections are reused across fetches)."""
+    global _async_client
+    if _async_client is None or _async_client.is_closed:
+        _async_client = httpx.AsyncClient(
+            headers=REQUEST_HEADERS,
+            timeout=SCRAPER_REQUEST_TIMEOUT,
+            follow_redirects=True,
+            limits=httpx.Limits(max_connections=SCRAPER_MAX_CONCURRENCY * 2, max_keepalive_connections=SCRAPER_MAX_CONCURRENCY),
+        )
+    return _async_client
+
+
+async def close_async_client() -> None:
+    """Close the shared client (called on app shutdown)."""
+    global _async_client
+    if _async_client is not None:
+        await _async_client.aclose()
+        _async_client = None
+
+
+class HostRateLimiter:
+    """
+    Per-host politeness: at most per_host_concurrency requests in flight to
+    the same host, and at least min_interval seconds between request starts.
+    """
+
+    def __init__(
+        self,
+        per_host_concurrency: int = SCRAPER_PER_HOST_CONCURRENCY,
+        min_interval: float = SCRAPER_PER_HOST_INTERVAL,
+    ):
+        self.per_host_concurrency = per_host_concurrency
+        self.min_interval = min_interval
+        self._semaphores: Dict[str, asyncio.Semaphore] = {}
+        self._locks: Dict[str, asyncio.Lock] = {}
+        self._next_start: Dict[str, float] = {}
+
+    async def acquire(self, host: str) -> None:
+        semaphore = self._semaphores.setdefault(host, asyncio.Semaphore(self.per_host_concurrency))
+        await semaphore.acquire()
+        try:
+            lock = self._locks.setdefault(host, asyncio.Lock())
+            async with lock:
+                wait = self._next_start.get(host, 0.0) - time.monotonic()
+                if wait > 0:
+                    await asyncio.sleep(wait)
+                self._next_start[host] = time.monotonic() + self.min_interval
+        except BaseException:
+            # Anulat (ex: deadline) cât aștepta: release() nu va mai fi apelat
+            semaphore.release()
+            raise
+
+    def release(self, host: str) -> None:
+        self._semaphores[host].release()
+
+
+async def fetch_webpage_conditional_async(
+    url: str,
+    etag: Optional[str] = None,
+    last_modified: Optional[str] = None,
+    client: Optional[httpx.AsyncClient] = None,
+) -> Optional[dict]:
+    """
+    Fetch a webpage with HTTP conditional revalidation, using the shared client.
+    
+    Args:
+        url: The URL of the webpage to fetch
+        etag: ETag from the previous response, sent as If-None-Match
+        last_modified: Last-Modified from the previous response, sent as
+                       If-Modified-Since
+        client: httpx client (default: the shared one)
+    
+    Returns:
+        dict: {"not_modified": bool, "text": str | None, "etag": str | None,
+               "last_modified": str | None}, or None if the fetch failed
+    """
+    client = client or get_async_client()
+    headers = {}
+    if etag:
+        headers['If-None-Match'] = etag
+    if last_modified:
+        headers['If-Modified-Since'] = last_modified
+
+    try:
+        response = await client.get(url, headers=headers)
+        if response.status_code == 304:
+            return {"not_modified": True, "text": None, "etag": etag, "last_modified": last_modified}
+        response.raise_for_status()
+        # Parsarea HTML e CPU-bound, o scoatem de pe event loop
+        text = await asyncio.to_thread(extract_page_text, response.content)
+        return {
+            "not_modified": False,
+            "text": text,
+            "etag": response.headers.get('ETag'),
+            "last_modified": response.headers.get('Last-Modified'),
+        }
+
+    except Exception as e:
+        print(f"Error fetching {url}: {e}")
+        return None
+
+
+async def fetch_urls_conditional_async(
+    pages: Dict[str, Tuple[Optional[str], Optional[str]]],
+    max_concurrency: int = SCRAPER_MAX_CONCURRENCY,
+    deadline: float = SCRAPER_DEADLINE,
+    rate_limiter: Optional[HostRateLimiter] = None,
+) -> Dict[str, Optional[dict]]:
+    """
+    Fetch several URLs concurrently with conditional revalidation.
+    
+    Args:
+        pages: {url: (etag, last_modified)} from the previous fetch
+        max_concurrency: maximum number of requests in flight overall
+        deadline: seconds after which unfinished fetches are cancelled
+        rate_limiter: per-host limits (a fresh HostRateLimiter by default)
+    
+    Returns:
+        Dict[str, Optional[dict]]: fetch_webpage_conditional_async result per
+        URL; None for URLs that failed or did not finish before the deadline
+    """
+    if not pages:
+        return {}
+
+    client = get_async_client()
+    rate_limiter = rate_limiter or HostRateLimiter()
+    semaphore = asyncio.Semaphore(max_concurrency)
+
+    async def fetch_one(url: str, etag: Optional[str], last_modified: Optional[str]) -> Optional[dict]:
+        host = urlsplit(url).netloc
+        async with semaphore:
+            await rate_limiter.acquire(host)
+            try:
+                return await fetch_webpage_conditional_async(url, etag, last_modified, client)
+            finally:
+                rate_limiter.release(host)
+
+    tasks = {
+        url: asyncio.create_task(fetch_one(url, etag, last_modified))
+        for url, (etag, last_modified) in pages.items()
+    }
+    done, pending = await asyncio.wait(tasks.values(), timeout=deadline)
+    for task in pending:
+        task.cancel()
+    if pending:
+        print(f"Warning: {len(pending)} URL(s) did not finish within {deadline}s")
+        await asyncio.gather(*pending, return_exceptions=True)
+
+    return {
+        url: task.result() if task in done and not task.cancelled() else None
+        for url, task in tasks.items()
+    }
+
+
+async def fetch_multiple_urls_async(
+    urls: List[str],
+    max_concurrency: int = SCRAPER_MAX_CONCURRENCY,
+    deadline: float = SCRAPER_DEADLINE,
+) -> List[str]:
+    """
+    Async version of fetch_multiple_urls: fetches all URLs concurrently, so
+    the total time is bounded by the slowest URL (and by deadline), not the sum.
+    
+    Returns:
+        List[str]: All text chunks, in the order of urls
+    """
+    results = await fetch_urls_conditional_async(
+        {url: (None, None) for url in urls},
+        max_concurrency=max_concurrency,
+        deadline=deadline,
+    )
+    all_chunks = []
+    for url in urls:
+        result = results.get(url)
+        if result and result["text"]:
+            all_chunks.extend(chunk_text(result["text"]))
+    return all_chunks
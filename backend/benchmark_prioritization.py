@@ -0,0 +1,189 @@
+"""
+Benchmark pentru /requests/prioritized
+======================================
+
+Generează cereri sintetice (100 → 100.000) și măsoară costul per cerere
+pentru etapele endpoint-ului: mapare rânduri → Application, prioritizare,
+join cu rândurile originale. Coloana "numpy" este prioritizarea vectorizată
+(score_priorities_batch, folosită de update_priorities.py), fără conversia
+în coloane.
+
+Coloanele "json" și "stream": serializarea răspunsului endpoint-ului –
+un singur json.dumps (main._json_list_response) față de vechiul răspuns
+StreamingResponse cu un generator sync, pe care Starlette îl consumă prin
+iterate_in_threadpool (un salt în threadpool pentru fiecare element).
+
+Coloana "coadă": calea fără limită (implicită pentru /requests/prioritized
+și /clerk/requests/status) dacă ar trece prin coada incrementală –
+sync_from_rows + top() peste toate cererile. E mai lentă decât
+mapare + prioritizare, de aceea fără limită endpoint-urile sortează direct.
+
+Ultima coloană: citirea primelor TOP_K cereri din coada incrementală
+(priority_queue), în µs per apel – crește doar cu numărul de cereri care
+au aceleași zile rămase ca a TOP_K-a, nu cu toată coada.
+
+Join-ul vechi (next() peste toate rândurile, pentru fiecare cerere) este
+rulat doar până la 10.000 de cereri, fiind pătratic; la fel și varianta
+"stream", care durează secunde la 100.000.
+
+Rulare:
+    python benchmark_prioritization.py
+"""
+
+import asyncio
+import json
+import random
+import time
+from datetime import datetime, timedelta, timezone
+
+from starlette.concurrency import iterate_in_threadpool
+
+from app.services.priority_queue import PriorityQueue
+from app.services.prioritization import (
+    FLOW_LEGAL_DEADLINES_DAYS,
+    application_from_row,
+    applications_to_columns,
+    join_with_rows,
+    prioritize_applications,
+    score_priorities_batch,
+)
+
+
+SIZES = [100, 1_000, 10_000, 100_000]
+OLD_JOIN_MAX_SIZE = 10_000
+TOP_K = 50
+
+
+def make_rows(n: int, seed: int = 42) -> list:
+    """Rânduri sintetice în formatul tabelei requests."""
+    rng = random.Random(seed)
+    flow_types = list(FLOW_LEGAL_DEADLINES_DAYS) + ["altele"]
+    now = datetime.now(timezone.utc)
+    rows = []
+    for i in range(n):
+        created = now - timedelta(minutes=rng.randint(0, 60 * 24 * 90))
+        rows.append({
+            "id": f"req-{i}",
+            "user_id": f"user-{rng.randint(0, n // 3)}",
+            "request_type": rng.choice(flow_types),
+            "status": rng.choice(["pending_validation", "in_review"]),
+            "priority": 0,
+            "assigned_clerk_id": None,
+            "created_at": created.isoformat(),
+            "legal_deadline": None,
+            "profiles": {"full_name": f"Cetățean {i}"},
+        })
+    rng.shuffle(rows)
+    return rows
+
+
+def _item(item: dict, original: dict) -> dict:
+    # Aceleași câmpuri ca main._prioritized_request_item
+    return {
+        "id": item["id"],
+        "user_id": original["user_id"],
+        "citizen_name": original["profiles"]["full_name"],
+        "request_type": item["flow_type"],
+        "status": original["status"],
+        "created_at": original["created_at"],
+        "legal_deadline": item["legal_due_date"].isoformat(),
+        "days_left": item["days_left"],
+        "backlog_in_category": item["backlog_in_category"],
+        "priority_score": item["priority_score"],
+    }
+
+
+def old_join(prioritized: list, rows: list) -> list:
+    result = []
+    for item in prioritized:
+        original = next((r for r in rows if str(r["id"]) == item["id"]), None)
+        if original:
+            result.append(_item(item, original))
+    return result
+
+
+def new_join(prioritized: list, rows: list) -> list:
+    return [_item(item, original) for item, original in join_with_rows(prioritized, rows)]
+
+
+def json_body(items: list) -> bytes:
+    # Același apel ca main._json_list_response
+    return json.dumps(items, ensure_ascii=False, default=str).encode("utf-8")
+
+
+def stream_body(items: list) -> bytes:
+    """The previous response: one JSON element per yield, drained like StreamingResponse does."""
+    def generate():
+        yield "["
+        for i, item in enumerate(items):
+            yield ("," if i else "") + json.dumps(item, ensure_ascii=False, default=str)
+        yield "]"
+
+    async def drain():
+        return b"".join([chunk.encode("utf-8") async for chunk in iterate_in_threadpool(generate())])
+
+    return asyncio.run(drain())
+
+
+def queue_all(rows: list) -> list:
+    queue = PriorityQueue()
+    queue.sync_from_rows(rows)
+    return queue.top()
+
+
+def _timed(fn, *args):
+    start = time.perf_counter()
+    result = fn(*args)
+    return result, time.perf_counter() - start
+
+
+def main() -> None:
+    print(
+        f"{'cereri':>8} | {'mapare':>8} | {'prioritizare':>12} | {'numpy':>7} | {'join nou':>9} | "
+        f"{'join vechi':>10} | {'json':>6} | {'stream':>7} | {'coadă':>7}   (µs / cerere) | top {TOP_K} (µs / apel)"
+    )
+    print("-" * 135)
+
+    for n in SIZES:
+        rows = make_rows(n)
+        apps, t_map = _timed(lambda: [application_from_row(r) for r in rows])
+        prioritized, t_prio = _timed(prioritize_applications, apps)
+        columns = applications_to_columns(apps)
+        scores, t_np = _timed(
+            score_priorities_batch,
+            columns["submitted_us"], columns["legal_due_us"], columns["flow_codes"], columns["flow_types"],
+        )
+        assert [columns["ids"][i] for i in scores["order"]] == [i["id"] for i in prioritized]
+        joined, t_new = _timed(new_join, prioritized, rows)
+        assert len(joined) == n
+
+        body, t_json = _timed(json_body, joined)
+
+        if n <= OLD_JOIN_MAX_SIZE:
+            old, t_old = _timed(old_join, prioritized, rows)
+            assert old == joined
+            old_col = f"{t_old / n * 1e6:10.1f}"
+            streamed, t_stream = _timed(stream_body, joined)
+            assert json.loads(streamed) == json.loads(body)
+            stream_col = f"{t_stream / n * 1e6:7.1f}"
+        else:
+            old_col = f"{'—':>10}"
+            stream_col = f"{'—':>7}"
+
+        queued, t_queue = _timed(queue_all, rows)
+        assert [i["id"] for i in queued] == [i["id"] for i in prioritized]
+
+        queue = PriorityQueue()
+        queue.sync_from_rows(rows)
+        top, t_top = _timed(queue.top, TOP_K)
+        assert [i["id"] for i in top] == [i["id"] for i in prioritized[:TOP_K]]
+
+        print(
+            f"{n:>8} | {t_map / n * 1e6:8.1f} | {t_prio / n * 1e6:12.1f} | {t_np / n * 1e6:7.2f} | "
+            f"{t_new / n * 1e6:9.1f} | {old_col} | {t_json / n * 1e6:6.1f} | {stream_col} | {t_queue / n * 1e6:7.1f}                  | "
+            f"{t_top * 1e6:8.0f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,52 @@
+"""
+Construiește indexul vectorial local pentru chatbot
+===================================================
+
+Creează embedding-uri pentru chunk-urile din knowledge/*.jsonl (și din
+knowledge_base/*.txt) și le salvează în knowledge/embeddings.f32, ca
+matrice float32 deschisă apoi cu np.memmap de /chatbot.
+
+Rulează după script-urile de ingestie:
+    python ingest_hcl_timisoara.py
+    python ingest_constructii_timisoara.py
+    python build_embeddings.py
+
+Chunk-urile neschimbate de la rularea anterioară nu mai sunt trimise la API.
+"""
+
+import time
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+from app.services.ai_processor import create_embeddings_batch
+from app.services.knowledge_loader import list_source_files, load_file_chunks
+from app.services.vector_index import EMBEDDINGS_PATH, build_vector_index
+
+
+def main() -> None:
+    print("=== Încarc chunk-urile din baza de cunoștințe ===")
+
+    chunks = []
+    for path in list_source_files():
+        pairs = load_file_chunks(path)
+        print(f"  {path.name}: {len(pairs)} chunk-uri")
+        chunks.extend(pairs)
+
+    if not chunks:
+        print("Nu există chunk-uri. Rulează mai întâi script-urile de ingestie.")
+        return
+
+    start = time.perf_counter()
+    result = build_vector_index(chunks, create_embeddings_batch)
+    elapsed = time.perf_counter() - start
+
+    print(
+        f"✅ Index scris în {EMBEDDINGS_PATH}: {result['rows']} vectori "
+        f"({result['embedded']} noi, {result['reused']} refolosiți) în {elapsed:.1f}s"
+    )
+
+
+if __name__ == "__main__":
+    main()
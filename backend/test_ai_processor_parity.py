@@ -0,0 +1,107 @@
+"""
+Test pentru perechile sync/async din ai_processor: aceleași rezultate și
+aceleași erori, indiferent de clientul folosit. Rulează fără rețea (LLM-ul
+e înlocuit); scriptul cu apeluri reale la model e test_ai_processor.py.
+"""
+
+import asyncio
+import json
+import os
+from types import SimpleNamespace
+
+import pytest
+
+# Clienții OpenAI sunt creați la import și cer o cheie; LLM-ul e înlocuit
+# mai jos (fake_llm), deci orice valoare e suficientă
+os.environ.setdefault("OPENROUTER_API_KEY", "test-key")
+
+from app.services import ai_processor
+from app.services.requirements_store import RequirementsStore
+from app.services.result_cache import result_cache
+
+
+def _response(content: str):
+    return SimpleNamespace(choices=[SimpleNamespace(message=SimpleNamespace(content=content))])
+
+
+@pytest.fixture
+def fake_llm(monkeypatch):
+    """Înlocuiește ambii clienți cu aceeași funcție; `outcome` e conținutul sau excepția."""
+    state = {"outcome": "{}", "requests": []}
+
+    def reply(request):
+        state["requests"].append(request)
+        if isinstance(state["outcome"], Exception):
+            raise state["outcome"]
+        return _response(state["outcome"])
+
+    async def chat_completion(**request):
+        return reply(request)
+
+    monkeypatch.setattr(ai_processor, "create_completion", lambda client, **request: reply(request))
+    monkeypatch.setattr(ai_processor, "chat_completion", chat_completion)
+    monkeypatch.setattr(ai_processor, "requirements_store", RequirementsStore(path=None))
+    result_cache.clear()
+    yield state
+    result_cache.clear()
+
+
+def _clear_caches():
+    # Altfel a doua variantă ar răspunde din cache, fără apel
+    result_cache.clear()
+    ai_processor.requirements_store.clear()
+
+
+PAIRS = {
+    "validate_id_card": (
+        lambda: ai_processor.validate_id_card(b"buletin"),
+        lambda: ai_processor.validate_id_card_async(b"buletin"),
+        json.dumps({"is_valid": True, "message": "Document valid"}),
+    ),
+    "extract_metadata": (
+        lambda: ai_processor.extract_metadata(b"plan", "plan_cadastral"),
+        lambda: ai_processor.extract_metadata_async(b"plan", "plan_cadastral"),
+        json.dumps({"nr_cadastral": "123456"}),
+    ),
+    "get_rag_answer": (
+        lambda: ai_processor.get_rag_answer("Ce acte trebuie?", ["Cerere, plan."]),
+        lambda: ai_processor.get_rag_answer_async("Ce acte trebuie?", ["Cerere, plan."]),
+        json.dumps({"answer": "Cerere și plan."}),
+    ),
+    "extract_procedure_requirements": (
+        lambda: ai_processor.extract_procedure_requirements("certificat de urbanism", [{"page_url": "u", "text": "t"}]),
+        lambda: ai_processor.extract_procedure_requirements_async("certificat de urbanism", [{"page_url": "u", "text": "t"}]),
+        json.dumps({"procedure_name": "certificat de urbanism", "required_documents": []}),
+    ),
+    "validate_and_guide_dossier": (
+        lambda: ai_processor.validate_and_guide_dossier("Am tot?", {"required_documents": []}),
+        lambda: ai_processor.validate_and_guide_dossier_async("Am tot?", {"required_documents": []}),
+        json.dumps({"assistant_reply": "Da.", "action": {"type": "save_dossier", "dossier": {"status": "pending", "submitted_at": "2026-01-05T10:00:00"}}}),
+    ),
+}
+
+
+@pytest.mark.parametrize("name", list(PAIRS))
+def test_sync_and_async_agree(fake_llm, name):
+    """Testează că varianta sync și cea async dau același rezultat, cerere și erori"""
+    print("=" * 60)
+    print(f"TEST: {name}")
+    print("=" * 60)
+
+    sync_call, async_call, content = PAIRS[name]
+    for outcome in (content, "nu este JSON", RuntimeError("upstream 503")):
+        fake_llm["outcome"] = outcome
+        fake_llm["requests"].clear()
+        _clear_caches()
+        sync_result = sync_call()
+        _clear_caches()
+        async_result = asyncio.run(async_call())
+
+        assert sync_result == async_result, outcome
+        sync_request, async_request = fake_llm["requests"]
+        assert sync_request == async_request
+
+
+if __name__ == "__main__":
+    print("\n🤖 TESTARE PERECHI SYNC/ASYNC AI PROCESSOR\n")
+    raise SystemExit(pytest.main(["-q", __file__]))
@@ -0,0 +1,92 @@
+"""
+Test pentru cache-ul semantic de răspunsuri al chatbot-ului
+"""
+
+from app.services.answer_cache import SemanticAnswerCache, context_key, is_first_turn
+
+
+ANSWER = {"answer": "Depuneți cererea la ghișeu.", "suggested_action": "answer_questions"}
+CHUNKS = ["Certificatul de urbanism se eliberează în termen de 30 de zile."]
+
+
+def test_similar_question_hits():
+    """Testează că o întrebare aproape identică primește răspunsul din cache"""
+    print("=" * 60)
+    print("TEST 1: Întrebare similară")
+    print("=" * 60)
+
+    cache = SemanticAnswerCache(threshold=0.95, ttl=60, max_entries=10)
+    key = context_key(CHUNKS)
+    cache.put([1.0, 0.0, 0.0], key, ANSWER, corpus_version=1)
+
+    assert cache.get([0.99, 0.05, 0.0], key, corpus_version=1) == ANSWER
+    assert cache.get([0.0, 1.0, 0.0], key, corpus_version=1) is None
+    print(f"  → {cache.stats()}")
+
+
+def test_context_is_part_of_key():
+    """Testează că alte chunk-uri sau altă procedură nu refolosesc răspunsul"""
+    print("\n" + "=" * 60)
+    print("TEST 2: Context diferit")
+    print("=" * 60)
+
+    cache = SemanticAnswerCache(threshold=0.95, ttl=60, max_entries=10)
+    cache.put([1.0, 0.0], context_key(CHUNKS), ANSWER, corpus_version=1)
+
+    assert cache.get([1.0, 0.0], context_key(CHUNKS + ["alt chunk"]), corpus_version=1) is None
+    assert cache.get([1.0, 0.0], context_key(CHUNKS, {"procedure": "demolare"}), corpus_version=1) is None
+    history = [{"role": "user", "content": "Vreau să construiesc o casă"}]
+    assert context_key(CHUNKS, {}, history) != context_key(CHUNKS)
+
+
+def test_corpus_reload_invalidates():
+    """Testează golirea cache-ului când corpus-ul se reîncarcă"""
+    print("\n" + "=" * 60)
+    print("TEST 3: Invalidare la reîncărcarea corpus-ului")
+    print("=" * 60)
+
+    cache = SemanticAnswerCache(threshold=0.95, ttl=60, max_entries=10)
+    key = context_key(CHUNKS)
+    cache.put([1.0, 0.0], key, ANSWER, corpus_version=1)
+
+    assert cache.get([1.0, 0.0], key, corpus_version=2) is None
+    assert cache.stats()["entries"] == 0
+
+
+def test_errors_not_cached():
+    """Testează că răspunsurile de eroare nu sunt păstrate"""
+    print("\n" + "=" * 60)
+    print("TEST 4: Erorile nu intră în cache")
+    print("=" * 60)
+
+    cache = SemanticAnswerCache(threshold=0.95, ttl=60, max_entries=10)
+    key = context_key(CHUNKS)
+    cache.put([1.0, 0.0], key, {"answer": "Eroare tehnică", "suggested_action": "retry"})
+
+    assert cache.get([1.0, 0.0], key) is None
+
+
+def test_first_turn_only():
+    """Testează detectarea primei ture (singura servită din cache)"""
+    print("\n" + "=" * 60)
+    print("TEST 5: Doar prima tură")
+    print("=" * 60)
+
+    assert is_first_turn([])
+    assert is_first_turn(None)
+    assert is_first_turn([{"role": "assistant", "content": "[SYSTEM] CONTEXT: Domain detected = urbanism"}])
+    assert not is_first_turn([{"role": "user", "content": "Bună ziua"}])
+
+
+if __name__ == "__main__":
+    print("\n💬 TESTARE CACHE RĂSPUNSURI\n")
+
+    test_similar_question_hits()
+    test_context_is_part_of_key()
+    test_corpus_reload_invalidates()
+    test_errors_not_cached()
+    test_first_turn_only()
+
+    print("\n" + "=" * 60)
+    print("✅ TOATE TESTELE AU FOST RULATE")
+    print("=" * 60)
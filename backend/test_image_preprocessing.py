@@ -0,0 +1,103 @@
+"""
+Test pentru pregătirea imaginilor înainte de apelurile vision
+"""
+
+import base64
+import io
+
+from PIL import Image
+
+from app.services.image_preprocessing import prepare_image, vision_image_content
+
+
+def make_photo(size=(4032, 3024), orientation=None, fmt="JPEG") -> bytes:
+    """Poză de test: fundal închis cu un document deschis la culoare în mijloc."""
+    img = Image.new("RGB", size, (90, 70, 50))
+    w, h = size
+    img.paste((235, 235, 225), (w // 6, h // 6, w * 5 // 6, h * 5 // 6))
+    out = io.BytesIO()
+    if orientation:
+        exif = Image.Exif()
+        exif[0x0112] = orientation
+        img.save(out, fmt, exif=exif)
+    else:
+        img.save(out, fmt)
+    return out.getvalue()
+
+
+def test_phone_photo_is_rotated_cropped_and_downscaled():
+    """Testează o poză de 12 MP, rotită prin EXIF"""
+    print("=" * 60)
+    print("TEST 1: Poză de pe telefon")
+    print("=" * 60)
+
+    data = make_photo(orientation=6)  # 90° – poza e de fapt portret
+    image = prepare_image(data, "metadata", "carte_identitate")
+    print(f"  → {len(data) // 1000} KB → {len(image.data) // 1000} KB, {image.width}x{image.height}")
+
+    assert image.mime_type == "image/jpeg"
+    assert image.height > image.width
+    assert max(image.width, image.height) <= 1536 and min(image.width, image.height) <= 768
+    assert len(image.data) < len(data) / 5
+    with Image.open(io.BytesIO(image.data)) as decoded:
+        # Fundalul închis a fost tăiat (rămâne doar o margine mică)
+        assert decoded.convert("RGB").getpixel((image.width // 2, image.height // 10))[0] > 200
+
+
+def test_detail_per_task():
+    """Testează nivelul de detaliu și rezoluția pe sarcină"""
+    print("\n" + "=" * 60)
+    print("TEST 2: Detail pe sarcină")
+    print("=" * 60)
+
+    data = make_photo()
+    low = vision_image_content(data, "classify")
+    high = vision_image_content(data, "id_card")
+
+    assert low["image_url"]["detail"] == "low"
+    assert high["image_url"]["detail"] == "high"
+    assert low["image_url"]["url"].startswith("data:image/jpeg;base64,")
+    assert len(low["image_url"]["url"]) < len(high["image_url"]["url"])
+
+
+def test_real_format_and_small_images_kept():
+    """Testează că o imagine mică, deja dreaptă, e trimisă neschimbată, cu tipul real"""
+    print("\n" + "=" * 60)
+    print("TEST 3: Format real")
+    print("=" * 60)
+
+    # Desen alb-negru: PNG-ul e mai mic decât orice JPEG
+    img = Image.new("1", (300, 200), 1)
+    img.paste(0, (20, 20, 280, 24))
+    out = io.BytesIO()
+    img.save(out, "PNG")
+    data = out.getvalue()
+
+    image = prepare_image(data, "id_card")
+    assert image.mime_type == "image/png"
+    assert image.data == data
+
+
+def test_non_image_falls_back_to_original():
+    """Testează că un fișier care nu e imagine e trimis ca înainte"""
+    print("\n" + "=" * 60)
+    print("TEST 4: Fișier care nu e imagine")
+    print("=" * 60)
+
+    data = b"%PDF-1.4 nu este o imagine"
+    image = prepare_image(data, "classify")
+    assert image.data == data
+    assert image.data_url == "data:image/jpeg;base64," + base64.b64encode(data).decode("utf-8")
+
+
+if __name__ == "__main__":
+    print("\n🖼️ TESTARE PREGĂTIRE IMAGINI\n")
+
+    test_phone_photo_is_rotated_cropped_and_downscaled()
+    test_detail_per_task()
+    test_real_format_and_small_images_kept()
+    test_non_image_falls_back_to_original()
+
+    print("\n" + "=" * 60)
+    print("✅ TOATE TESTELE AU FOST RULATE")
+    print("=" * 60)
@@ -0,0 +1,66 @@
+"""
+Test pentru extragerea incrementală a câmpului "answer" din JSON în stream
+"""
+
+import json
+
+from app.services.json_stream import JsonStringFieldStreamer
+
+
+def stream_in_pieces(text: str, size: int) -> str:
+    streamer = JsonStringFieldStreamer("answer")
+    result = "".join(streamer.feed(text[i:i + size]) for i in range(0, len(text), size))
+    assert streamer.done
+    assert result == streamer.value
+    return result
+
+
+def test_matches_json_loads():
+    """Testează că textul decodat incremental e identic cu json.loads"""
+    print("=" * 60)
+    print("TEST 1: Decodare incrementală")
+    print("=" * 60)
+
+    answer = 'Pentru "certificatul de urbanism" 📄:\n\t1. Cerere\\tip\n2. Taxă – 15 lei 💰 / € ș ț'
+    for ensure_ascii in (True, False):
+        text = json.dumps({"answer": answer, "detected_domain": "urbanism"}, ensure_ascii=ensure_ascii)
+        # Bucăți de 1 caracter: escape-urile (inclusiv \uXXXX\uXXXX) sunt tăiate între bucăți
+        for size in (1, 2, 3, 5, 7, 64):
+            assert stream_in_pieces(text, size) == answer
+    print("  → OK pentru toate dimensiunile de bucăți")
+
+
+def test_field_not_first():
+    """Testează un câmp care nu apare primul în obiect"""
+    print("\n" + "=" * 60)
+    print("TEST 2: Câmpul după alte chei")
+    print("=" * 60)
+
+    text = '{"detected_procedure": null,\n  "answer" :  "Bună ziua", "needs_documents": true}'
+    assert stream_in_pieces(text, 4) == "Bună ziua"
+
+
+def test_nothing_after_value_end():
+    """Testează că restul obiectului nu mai produce text"""
+    print("\n" + "=" * 60)
+    print("TEST 3: Sfârșitul valorii")
+    print("=" * 60)
+
+    streamer = JsonStringFieldStreamer("answer")
+    assert streamer.feed('{"ans') == ""
+    assert streamer.feed('wer": "A') == "A"
+    assert streamer.feed('B", "x": "C"}') == "B"
+    assert streamer.feed('more') == ""
+    assert streamer.value == "AB"
+
+
+if __name__ == "__main__":
+    print("\n📡 TESTARE STREAM JSON\n")
+
+    test_matches_json_loads()
+    test_field_not_first()
+    test_nothing_after_value_end()
+
+    print("\n" + "=" * 60)
+    print("✅ TOATE TESTELE AU FOST RULATE")
+    print("=" * 60)
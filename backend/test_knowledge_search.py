@@ -0,0 +1,102 @@
+"""
+Test pentru căutarea BM25 în baza de cunoștințe
+"""
+
+from concurrent.futures import ThreadPoolExecutor
+
+from app.services.knowledge_corpus import combine_chunk_sources
+from app.services.knowledge_loader import search_relevant_chunks
+from app.services.search_index import BM25Index, fold_diacritics, get_index
+
+
+CHUNKS = (
+    "Certificatul de urbanism se eliberează în termen de 30 de zile.",
+    "Taxa auto se poate plăti online pe portalul primăriei.",
+    "Pentru autorizatie de construire este necesar certificatul de urbanism.",
+    "Programul de lucru cu publicul este de luni până vineri.",
+)
+
+
+def test_diacritic_folding():
+    """Testează eliminarea diacriticelor (inclusiv variantele cu sedilă)"""
+    print("=" * 60)
+    print("TEST 1: Eliminare diacritice")
+    print("=" * 60)
+
+    folded = fold_diacritics("Autorizație ȘTAMPILĂ ţară Învățământ")
+    print(f"  → {folded}")
+    assert folded == "autorizatie stampila tara invatamant"
+
+
+def test_search_ranking():
+    """Testează ordonarea rezultatelor după scorul BM25"""
+    print("\n" + "=" * 60)
+    print("TEST 2: Căutare BM25")
+    print("=" * 60)
+
+    question = "Ce acte trebuie pentru autorizație de construire?"
+    results = search_relevant_chunks(question, CHUNKS, max_results=2)
+    for chunk in results:
+        print(f"  → {chunk}")
+
+    assert results[0] == CHUNKS[2]
+    assert len(results) == 2
+
+
+def test_no_match():
+    """Testează o întrebare fără niciun termen comun"""
+    print("\n" + "=" * 60)
+    print("TEST 3: Fără rezultate")
+    print("=" * 60)
+
+    results = search_relevant_chunks("xyzzy", CHUNKS, max_results=3)
+    print(f"  → {len(results)} rezultate")
+    assert results == []
+
+
+def test_index_is_reused():
+    """Testează că indexul se construiește o singură dată per corpus"""
+    print("\n" + "=" * 60)
+    print("TEST 4: Reutilizare index")
+    print("=" * 60)
+
+    first = get_index(CHUNKS)
+    second = get_index(CHUNKS)
+    print(f"  → Același index: {first is second}")
+    assert first is second
+    assert isinstance(first, BM25Index)
+
+
+def test_combined_sources_concurrent():
+    """Testează combinarea surselor din mai multe thread-uri (request-uri + refresher)"""
+    print("\n" + "=" * 60)
+    print("TEST 5: Combinare surse, concurent")
+    print("=" * 60)
+
+    local = ("a", "b")
+    web_versions = [(f"web {i}",) for i in range(8)]
+
+    def combine(i):
+        web = web_versions[i % len(web_versions)]
+        return web, combine_chunk_sources(local, web)
+
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        results = list(pool.map(combine, range(2000)))
+
+    assert all(combined == local + web for web, combined in results)
+    # Surse neschimbate → același tuplu (indexul e refolosit)
+    assert combine_chunk_sources(local, web_versions[0]) is combine_chunk_sources(local, web_versions[0])
+
+
+if __name__ == "__main__":
+    print("\n🔍 TESTARE CĂUTARE BM25\n")
+
+    test_diacritic_folding()
+    test_search_ranking()
+    test_no_match()
+    test_index_is_reused()
+    test_combined_sources_concurrent()
+
+    print("\n" + "=" * 60)
+    print("✅ TOATE TESTELE AU FOST RULATE")
+    print("=" * 60)
@@ -0,0 +1,157 @@
+"""
+Test pentru coada incrementală de priorități
+"""
+
+import random
+from datetime import datetime, timedelta, timezone
+
+from app.services.prioritization import (
+    Application,
+    applications_to_columns,
+    compute_priority,
+    score_priorities_batch,
+)
+from app.services.priority_queue import PriorityQueue
+
+
+NOW = datetime(2025, 11, 15, 12, 0, tzinfo=timezone.utc)
+FLOW_TYPES = ["certificat_urbanism", "autorizatie_demolare", "aviz_preliminar", "altele"]
+
+
+def make_apps(n: int, seed: int = 7) -> list:
+    rng = random.Random(seed)
+    return [
+        Application(
+            id=f"req-{i}",
+            flow_type=rng.choice(FLOW_TYPES),
+            submitted_at=NOW - timedelta(hours=rng.randint(0, 24 * 60)),
+            status="pending_validation",
+        )
+        for i in range(n)
+    ]
+
+
+def _order(items: list) -> list:
+    return [item["id"] for item in items]
+
+
+def _full_sort(apps: list) -> list:
+    # Referința: același calcul ca prioritize_applications, dar cu "acum" fix
+    counts = {}
+    for app in apps:
+        counts[app.flow_type] = counts.get(app.flow_type, 0) + 1
+    enriched = [compute_priority(a, counts[a.flow_type], NOW) for a in apps]
+    enriched.sort(key=lambda x: (x["days_left"], -x["priority_score"], x["submitted_at"]))
+    return enriched
+
+
+def test_top_k_matches_full_sort():
+    """Testează că top-k din heap = primele k din sortarea completă"""
+    print("=" * 60)
+    print("TEST 1: Top-k vs sortare completă")
+    print("=" * 60)
+
+    apps = make_apps(500)
+    queue = PriorityQueue()
+    for app in apps:
+        queue.upsert(app)
+
+    expected = _order(_full_sort(apps))
+    for k in (1, 10, 57, 500):
+        assert _order(queue.top(k, now=NOW)) == expected[:k]
+    print(f"  → {queue.stats()['backlog']}")
+
+
+def test_updates_and_removals():
+    """Testează schimbările de status și cererile închise"""
+    print("\n" + "=" * 60)
+    print("TEST 2: Actualizări incrementale")
+    print("=" * 60)
+
+    apps = make_apps(200)
+    queue = PriorityQueue()
+    for app in apps:
+        queue.upsert(app)
+
+    # Închidem câteva cereri și mutăm altele în altă categorie
+    for app in apps[:50]:
+        app.status = "approved"
+        queue.upsert(app)
+    for app in apps[50:80]:
+        app.flow_type = "aviz_preliminar"
+        app.status = "in_review"
+        queue.upsert(app)
+
+    active = [a for a in apps if a.status in ("pending_validation", "in_review")]
+    assert len(queue) == len(active)
+    assert queue.backlog("aviz_preliminar") == sum(a.flow_type == "aviz_preliminar" for a in active)
+    assert _order(queue.top(20, now=NOW)) == _order(_full_sort(active))[:20]
+
+    # top() nu pierde cereri din heap
+    assert len(queue.top(now=NOW)) == len(active)
+
+
+def test_sync_from_rows():
+    """Testează încărcarea cozii din rânduri Supabase"""
+    print("\n" + "=" * 60)
+    print("TEST 3: Sincronizare din tabela requests")
+    print("=" * 60)
+
+    rows = [
+        {"id": 1, "request_type": "certificat_urbanism", "status": "pending_validation",
+         "created_at": "2025-11-01T10:00:00Z", "legal_deadline": None},
+        {"id": 2, "request_type": "aviz_preliminar", "status": "in_review",
+         "created_at": "2025-11-10T10:00:00+00:00", "legal_deadline": None},
+        {"id": 3, "request_type": "aviz_preliminar", "status": "approved",
+         "created_at": "2025-11-12T10:00:00Z", "legal_deadline": None},
+    ]
+    queue = PriorityQueue()
+    queue.sync_from_rows(rows)
+
+    top = queue.top(now=NOW)
+    print(f"  → {[(i['id'], i['days_left']) for i in top]}")
+    assert _order(top) == ["2", "1"]
+    assert not queue.is_stale()
+
+
+def test_batch_scorer_matches_full_sort():
+    """Testează scorul vectorizat (NumPy) față de calculul per cerere"""
+    print("\n" + "=" * 60)
+    print("TEST 4: Scor vectorizat")
+    print("=" * 60)
+
+    apps = make_apps(1000)
+    # Câteva termene explicite, unele deja depășite
+    for i, app in enumerate(apps[:100]):
+        app.legal_due_date = NOW + timedelta(hours=37 * i - 900)
+
+    columns = applications_to_columns(apps)
+    scores = score_priorities_batch(
+        columns["submitted_us"],
+        columns["legal_due_us"],
+        columns["flow_codes"],
+        columns["flow_types"],
+        now=NOW,
+    )
+
+    expected = _full_sort(apps)
+    assert [columns["ids"][i] for i in scores["order"]] == _order(expected)
+
+    by_id = {item["id"]: item for item in expected}
+    for i, app_id in enumerate(columns["ids"]):
+        assert scores["days_left"][i] == by_id[app_id]["days_left"]
+        assert scores["priority_score"][i] == by_id[app_id]["priority_score"]
+        assert scores["backlog_in_category"][i] == by_id[app_id]["backlog_in_category"]
+
+
+if __name__ == "__main__":
+    print("\n📋 TESTARE COADĂ DE PRIORITĂȚI\n")
+
+    test_top_k_matches_full_sort()
+    test_updates_and_removals()
+    test_sync_from_rows()
+    test_batch_scorer_matches_full_sort()
+
+    print("\n" + "=" * 60)
+    print("✅ TOATE TESTELE AU FOST RULATE")
+    print("=" * 60)
@@ -0,0 +1,107 @@
+"""
+Test pentru asamblarea promptului RAG în limita de token-uri
+"""
+
+from app.services.prompt_builder import (
+    build_messages,
+    clean_history,
+    count_message_tokens,
+    dedupe_chunks,
+)
+
+
+def render(context_text: str) -> str:
+    return f"*Context Legal:*\n---\n{context_text}\n---\n\n*Întrebarea Utilizatorului:*\nCe acte îmi trebuie?"
+
+
+def test_dedupe_chunks():
+    """Testează eliminarea chunk-urilor duplicate sau incluse în altele"""
+    print("=" * 60)
+    print("TEST 1: Deduplicare chunk-uri")
+    print("=" * 60)
+
+    chunks = [
+        "Certificatul de urbanism se eliberează în 30 de zile.",
+        "certificatul de urbanism   se eliberează în 30 de zile.",
+        "Taxa este de 15 lei.",
+        "Art. 5: Certificatul de urbanism se eliberează în 30 de zile. Taxa este de 15 lei.",
+        "Cererea se depune la ghișeu.",
+    ]
+    result = dedupe_chunks(chunks)
+    print(f"  → {len(chunks)} → {len(result)} chunk-uri")
+
+    assert result == [chunks[3], chunks[4]]
+
+
+def test_history_cleanup():
+    """Testează eliminarea mesajelor [SYSTEM] și a celor goale"""
+    print("\n" + "=" * 60)
+    print("TEST 2: Curățare istoric")
+    print("=" * 60)
+
+    history = [
+        {"role": "user", "content": "Bună"},
+        {"role": "assistant", "content": "[SYSTEM] CONTEXT: Domain detected = urbanism"},
+        {"role": "assistant", "content": ""},
+        {"role": "assistant", "content": "Bună ziua!"},
+    ]
+    assert clean_history(history) == [
+        {"role": "user", "content": "Bună"},
+        {"role": "assistant", "content": "Bună ziua!"},
+    ]
+
+
+def test_budget_respected():
+    """Testează că promptul nu depășește bugetul și păstrează mesajele noi"""
+    print("\n" + "=" * 60)
+    print("TEST 3: Buget de token-uri")
+    print("=" * 60)
+
+    chunks = [f"Fragment {i}: " + "text legal despre autorizații " * 40 for i in range(10)]
+    history = []
+    for i in range(10):
+        history.append({"role": "user", "content": f"Întrebarea {i} " + "detalii " * 60})
+        history.append({"role": "assistant", "content": f"Răspunsul {i} " + "explicații " * 60})
+
+    messages, usage = build_messages("Ești un asistent.", render, chunks, history, budget=2000)
+    print(f"  → {usage}")
+
+    assert usage["total"] == count_message_tokens(messages)
+    assert usage["total"] <= 2000
+    assert usage["chunks_used"] >= 1
+    assert messages[0]["content"] == "Ești un asistent."
+    assert messages[-1]["content"].endswith("Ce acte îmi trebuie?")
+    # Cele mai noi mesaje sunt păstrate, cele vechi sunt rezumate
+    if usage["history_messages"]:
+        assert messages[-2]["content"].startswith("Răspunsul 9")
+    assert usage["history_dropped"] > 0
+    assert usage["truncated"]
+    assert any(m["role"] == "system" and "Rezumatul" in m["content"] for m in messages[1:])
+
+
+def test_small_prompt_unchanged():
+    """Testează că un prompt mic intră întreg"""
+    print("\n" + "=" * 60)
+    print("TEST 4: Prompt sub buget")
+    print("=" * 60)
+
+    history = [{"role": "user", "content": "Bună"}, {"role": "assistant", "content": "Bună ziua!"}]
+    messages, usage = build_messages("Sistem", render, ["A", "B"], history, budget=6000)
+
+    assert usage["chunks_dropped"] == 0 and usage["history_dropped"] == 0
+    assert not usage["truncated"]
+    assert messages[1:3] == history
+    assert "A\n\nB" in messages[-1]["content"]
+
+
+if __name__ == "__main__":
+    print("\n🧮 TESTARE BUGET PROMPT RAG\n")
+
+    test_dedupe_chunks()
+    test_history_cleanup()
+    test_budget_respected()
+    test_small_prompt_unchanged()
+
+    print("\n" + "=" * 60)
+    print("✅ TOATE TESTELE AU FOST RULATE")
+    print("=" * 60)
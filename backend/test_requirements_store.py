@@ -0,0 +1,85 @@
+"""
+Test pentru memorarea extragerilor LLM1 (SQLite + LRU)
+"""
+
+import tempfile
+from pathlib import Path
+
+from app.services.requirements_store import RequirementsStore, requirements_key
+
+
+CHUNKS = [
+    {"page_url": "https://www.primariatm.ro/urbanism", "text": "Pentru certificatul de urbanism sunt necesare: cerere, plan."},
+    {"page_url": "https://www.primariatm.ro/taxe", "text": "Taxa este de 15 lei."},
+]
+RESULT = {"procedure_name": "certificat de urbanism", "required_documents": [{"doc_id": "cerere"}]}
+
+
+def test_key_fingerprint():
+    """Testează cheia: ordinea chunk-urilor nu contează, textul da"""
+    print("=" * 60)
+    print("TEST 1: Amprenta chunk-urilor")
+    print("=" * 60)
+
+    key = requirements_key("Certificat de urbanism", CHUNKS, "1")
+    assert requirements_key("  certificat  de URBANISM ", list(reversed(CHUNKS)), "1") == key
+    assert requirements_key("certificat de urbanism", CHUNKS + [CHUNKS[0]], "1") == key
+
+    changed = [dict(CHUNKS[0]), CHUNKS[1]]
+    changed[0]["text"] += " Actualizat."
+    assert requirements_key("certificat de urbanism", changed, "1") != key
+    assert requirements_key("autorizație de construire", CHUNKS, "1") != key
+    assert requirements_key("certificat de urbanism", CHUNKS, "2") != key
+
+
+def test_persists_on_disk():
+    """Testează că rezultatul rămâne salvat după o repornire (instanță nouă)"""
+    print("\n" + "=" * 60)
+    print("TEST 2: Persistență SQLite")
+    print("=" * 60)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = Path(tmp) / "requirements.sqlite3"
+        key = requirements_key("certificat de urbanism", CHUNKS, "1")
+
+        store = RequirementsStore(path=path, max_entries=2)
+        assert store.get(key) is None
+        store.put(key, "certificat de urbanism", RESULT)
+        assert store.get(key) == RESULT
+
+        restarted = RequirementsStore(path=path, max_entries=2)
+        assert restarted.get(key) == RESULT
+        assert restarted.get(key) == RESULT
+        print(f"  → {restarted.stats()}")
+        assert restarted.stats()["disk_hits"] == 1
+        assert restarted.stats()["hits"] == 1
+
+        # Valorile returnate sunt copii
+        restarted.get(key)["required_documents"].clear()
+        assert restarted.get(key) == RESULT
+
+
+def test_expired_entries_ignored():
+    """Testează TTL-ul intrărilor"""
+    print("\n" + "=" * 60)
+    print("TEST 3: Expirare")
+    print("=" * 60)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = Path(tmp) / "requirements.sqlite3"
+        store = RequirementsStore(path=path, ttl=-1)
+        store.put("k", "procedura", RESULT)
+        assert store.get("k") is None
+        assert RequirementsStore(path=path, ttl=-1).get("k") is None
+
+
+if __name__ == "__main__":
+    print("\n🗄️ TESTARE REQUIREMENTS STORE\n")
+
+    test_key_fingerprint()
+    test_persists_on_disk()
+    test_expired_entries_ignored()
+
+    print("\n" + "=" * 60)
+    print("✅ TOATE TESTELE AU FOST RULATE")
+    print("=" * 60)
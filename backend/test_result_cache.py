@@ -0,0 +1,112 @@
+"""
+Test pentru cache-ul de rezultate al analizei documentelor
+"""
+
+import time
+
+from app.services.result_cache import ResultCache, make_key
+
+
+def test_key_depends_on_content_and_version():
+    """Testează că cheia se schimbă cu conținutul, versiunea și tipul"""
+    print("=" * 60)
+    print("TEST 1: Chei de cache")
+    print("=" * 60)
+
+    key = make_key("metadata", "1", b"scan", "carte_identitate")
+    print(f"  → {key}")
+
+    assert key == make_key("metadata", "1", b"scan", "carte_identitate")
+    assert key != make_key("metadata", "1", b"scan2", "carte_identitate")
+    assert key != make_key("metadata", "2", b"scan", "carte_identitate")
+    assert key != make_key("metadata", "1", b"scan", "act_proprietate")
+
+
+def test_lru_eviction():
+    """Testează eliminarea celei mai vechi intrări când cache-ul e plin"""
+    print("\n" + "=" * 60)
+    print("TEST 2: Evicție LRU")
+    print("=" * 60)
+
+    cache = ResultCache(max_entries=2, ttl=60, redis_url=None)
+    cache.set("a", {"nume": "Pop"})
+    cache.set("b", "plan_cadastral")
+    cache.get("a")  # "a" devine cea mai recent folosită
+    cache.set("c", "act_proprietate")
+
+    print(f"  → {cache.stats()}")
+    assert cache.get("a") == {"nume": "Pop"}
+    assert cache.get("b") is None
+    assert cache.get("c") == "act_proprietate"
+
+
+def test_ttl_expiry():
+    """Testează expirarea intrărilor după TTL"""
+    print("\n" + "=" * 60)
+    print("TEST 3: Expirare TTL")
+    print("=" * 60)
+
+    cache = ResultCache(max_entries=10, ttl=60, redis_url=None)
+    cache.set("scurt", "carte_identitate", ttl=0.05)
+    cache.set("lung", "carte_identitate")
+    time.sleep(0.1)
+
+    assert cache.get("scurt") is None
+    assert cache.get("lung") == "carte_identitate"
+
+
+def test_values_are_copies():
+    """Testează că modificarea unui rezultat nu alterează cache-ul"""
+    print("\n" + "=" * 60)
+    print("TEST 4: Copii independente")
+    print("=" * 60)
+
+    cache = ResultCache(max_entries=10, ttl=60, redis_url=None)
+    cache.set("k", {"nume": "Pop"})
+    cache.get("k")["nume"] = "Ionescu"
+
+    assert cache.get("k") == {"nume": "Pop"}
+
+
+def test_size_based_eviction():
+    """Testează evicția după dimensiunea totală a valorilor, nu doar după număr"""
+    print("\n" + "=" * 60)
+    print("TEST 5: Evicție după dimensiune")
+    print("=" * 60)
+
+    cache = ResultCache(max_entries=100, ttl=60, redis_url=None, max_bytes=1000)
+    cache.set("mic1", {"tip": "carte_identitate"})
+    cache.set("mic2", {"tip": "plan_cadastral"})
+    cache.set("text", {"text": "ă" * 300})  # ~600 bytes în UTF-8
+    cache.get("mic1")
+    cache.set("text2", {"text": "x" * 400})
+
+    print(f"  → {cache.stats()}")
+    assert cache.stats()["bytes"] <= 1000
+    assert cache.get("text") is None  # cea mai veche folosită, dintre cele mari
+    assert cache.get("mic1") is not None
+    assert cache.get("text2") is not None
+
+    # O valoare mai mare decât tot cache-ul nu e păstrată și nu golește cache-ul
+    cache.set("urias", {"text": "x" * 5000})
+    assert cache.get("urias") is None
+    assert cache.get("text2") is not None
+
+    # Suprascrierea unei chei nu dublează dimensiunea contorizată
+    before = cache.stats()["bytes"]
+    cache.set("text2", {"text": "x" * 400})
+    assert cache.stats()["bytes"] == before
+
+
+if __name__ == "__main__":
+    print("\n🗂️ TESTARE CACHE REZULTATE\n")
+
+    test_key_depends_on_content_and_version()
+    test_lru_eviction()
+    test_ttl_expiry()
+    test_values_are_copies()
+    test_size_based_eviction()
+
+    print("\n" + "=" * 60)
+    print("✅ TOATE TESTELE AU FOST RULATE")
+    print("=" * 60)
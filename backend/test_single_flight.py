@@ -0,0 +1,118 @@
+"""
+Test pentru comasarea apelurilor LLM identice aflate în desfășurare
+"""
+
+import asyncio
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from app.services.single_flight import SingleFlight, completion_key
+
+
+def test_completion_key_is_canonical():
+    """Testează că ordinea parametrilor nu schimbă cheia"""
+    print("=" * 60)
+    print("TEST 1: Cheie canonică")
+    print("=" * 60)
+
+    messages = [{"role": "user", "content": "Ce acte trebuie?"}]
+    a = completion_key(model="openai/gpt-4o", messages=messages, response_format={"type": "json_object"})
+    b = completion_key(response_format={"type": "json_object"}, messages=messages, model="openai/gpt-4o")
+    c = completion_key(model="gpt-4o-mini", messages=messages, response_format={"type": "json_object"})
+    assert a == b
+    assert a != c
+
+
+def test_threads_share_one_call():
+    """Testează că 20 de cereri identice simultane fac un singur apel"""
+    print("\n" + "=" * 60)
+    print("TEST 2: Comasare (thread-uri)")
+    print("=" * 60)
+
+    flight = SingleFlight()
+    calls = []
+    started = threading.Event()
+
+    def upstream():
+        calls.append(1)
+        started.set()
+        time.sleep(0.2)
+        return {"answer": "Bună ziua"}
+
+    with ThreadPoolExecutor(max_workers=20) as pool:
+        first = pool.submit(flight.do, "k", upstream)
+        started.wait()
+        others = [pool.submit(flight.do, "k", upstream) for _ in range(19)]
+        results = [first.result()] + [f.result() for f in others]
+
+    print(f"  → {len(calls)} apel(uri) pentru {len(results)} cereri")
+    assert len(calls) == 1
+    assert all(r is results[0] for r in results)
+
+    # După ce apelul s-a terminat, o cerere nouă face un apel nou
+    flight.do("k", upstream)
+    assert len(calls) == 2
+
+
+def test_errors_are_shared():
+    """Testează că eroarea apelului ajunge la toți cei care așteaptă"""
+    print("\n" + "=" * 60)
+    print("TEST 3: Erori partajate")
+    print("=" * 60)
+
+    flight = SingleFlight()
+
+    async def upstream():
+        await asyncio.sleep(0.05)
+        raise TimeoutError("upstream timeout")
+
+    async def run():
+        return await asyncio.gather(*(flight.do_async("k", upstream) for _ in range(5)), return_exceptions=True)
+
+    results = asyncio.run(run())
+    assert all(isinstance(r, TimeoutError) for r in results)
+    assert flight.stats() == {"calls": 1, "shared": 4, "in_flight": 0}
+
+
+def test_async_cancelled_waiter_does_not_cancel_call():
+    """Testează că anularea primului request nu anulează apelul partajat"""
+    print("\n" + "=" * 60)
+    print("TEST 4: Anulare (async)")
+    print("=" * 60)
+
+    flight = SingleFlight()
+    calls = []
+
+    async def upstream():
+        calls.append(1)
+        await asyncio.sleep(0.1)
+        return "rezultat"
+
+    async def run():
+        leader = asyncio.ensure_future(flight.do_async("k", upstream))
+        await asyncio.sleep(0)
+        follower = asyncio.ensure_future(flight.do_async("k", upstream))
+        await asyncio.sleep(0.01)
+        leader.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await leader
+        return await follower
+
+    assert asyncio.run(run()) == "rezultat"
+    assert len(calls) == 1
+
+
+if __name__ == "__main__":
+    print("\n🔀 TESTARE SINGLE-FLIGHT\n")
+
+    test_completion_key_is_canonical()
+    test_threads_share_one_call()
+    test_errors_are_shared()
+    test_async_cancelled_waiter_does_not_cancel_call()
+
+    print("\n" + "=" * 60)
+    print("✅ TOATE TESTELE AU FOST RULATE")
+    print("=" * 60)
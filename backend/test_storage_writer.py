@@ -0,0 +1,118 @@
+"""
+Test pentru urcarea fișierelor în Supabase storage (paralel, reîncercări, stare job)
+"""
+
+import asyncio
+import threading
+import time
+
+import httpx
+
+from app.services.storage_writer import StorageWriter
+
+
+class StorageException(Exception):
+    """Ca storage3.StorageException: un dict cu statusCode."""
+
+
+def test_concurrent_and_bounded():
+    """Testează că fișierele urcă în paralel, dar cel mult `concurrency` odată"""
+    print("=" * 60)
+    print("TEST 1: Paralel, limitat")
+    print("=" * 60)
+
+    lock = threading.Lock()
+    active, peak = [0], [0]
+
+    def upload(path, content, content_type):
+        with lock:
+            active[0] += 1
+            peak[0] = max(peak[0], active[0])
+        time.sleep(0.1)
+        with lock:
+            active[0] -= 1
+
+    writer = StorageWriter(upload, concurrency=3, backoff=0)
+    job = writer.create_job([(f"documents/u/{i}.jpg", b"x", "image/jpeg") for i in range(9)])
+    start = time.perf_counter()
+    asyncio.run(writer.run(job))
+    elapsed = time.perf_counter() - start
+
+    print(f"  → 9 fișiere în {elapsed:.2f}s, maxim {peak[0]} simultan")
+    assert job.status == "done"
+    assert peak[0] == 3
+    assert elapsed < 0.6
+
+
+def test_transient_errors_retried():
+    """Testează reîncercarea erorilor trecătoare și oprirea la cele permanente"""
+    print("\n" + "=" * 60)
+    print("TEST 2: Reîncercări")
+    print("=" * 60)
+
+    attempts = {}
+
+    def upload(path, content, content_type):
+        attempts[path] = attempts.get(path, 0) + 1
+        if path.endswith("flaky.jpg") and attempts[path] < 3:
+            raise StorageException({"statusCode": 503, "error": "Service Unavailable"})
+        if path.endswith("forbidden.jpg"):
+            raise StorageException({"statusCode": 403, "error": "Unauthorized"})
+        if path.endswith("bug.jpg"):
+            raise TypeError("upload() got an unexpected keyword argument")
+        if path.endswith("network.jpg") and attempts[path] < 2:
+            raise httpx.ConnectError("connection reset")
+
+    writer = StorageWriter(upload, retries=3, backoff=0)
+    job = writer.create_job([
+        ("documents/u/flaky.jpg", b"x", "image/jpeg"),
+        ("documents/u/forbidden.jpg", b"x", "image/jpeg"),
+        ("documents/u/bug.jpg", b"x", "image/jpeg"),
+        ("documents/u/network.jpg", b"x", "image/jpeg"),
+    ])
+    asyncio.run(writer.run(job))
+
+    status = writer.get_job(job.job_id).to_dict()
+    print(f"  → {status}")
+    assert status["status"] == "partial"
+    assert [f["status"] for f in status["files"]] == ["done", "failed", "failed", "done"]
+    assert attempts == {
+        "documents/u/flaky.jpg": 3,
+        "documents/u/forbidden.jpg": 1,
+        "documents/u/bug.jpg": 1,
+        "documents/u/network.jpg": 2,
+    }
+    assert writer.stats()["retried"] == 3
+
+
+def test_duplicate_after_timeout_counts_as_done():
+    """Testează că un 'Duplicate' după un timeout înseamnă că fișierul a ajuns deja"""
+    print("\n" + "=" * 60)
+    print("TEST 3: Duplicate după timeout")
+    print("=" * 60)
+
+    calls = []
+
+    def upload(path, content, content_type):
+        calls.append(path)
+        if len(calls) == 1:
+            raise TimeoutError("read timeout")
+        raise StorageException({"statusCode": 400, "error": "Duplicate"})
+
+    writer = StorageWriter(upload, backoff=0)
+    job = asyncio.run(writer.run(writer.create_job([("documents/u/a.jpg", b"x", "image/jpeg")])))
+    assert job.status == "done"
+    assert job.files[0].content == b""  # conținutul e eliberat după upload
+    assert len(calls) == 2
+
+
+if __name__ == "__main__":
+    print("\n☁️ TESTARE STORAGE WRITER\n")
+
+    test_concurrent_and_bounded()
+    test_transient_errors_retried()
+    test_duplicate_after_timeout_counts_as_done()
+
+    print("\n" + "=" * 60)
+    print("✅ TOATE TESTELE AU FOST RULATE")
+    print("=" * 60)
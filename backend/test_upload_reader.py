@@ -0,0 +1,90 @@
+"""
+Test pentru citirea fișierelor încărcate (bucăți, hash, limite de dimensiune)
+"""
+
+import asyncio
+import hashlib
+import io
+
+import pytest
+from fastapi import HTTPException, UploadFile
+
+from app.services import upload_reader
+from app.services.upload_reader import read_upload, read_uploads
+
+
+def make_upload(data: bytes, filename: str = "buletin.jpg", known_size: bool = True) -> UploadFile:
+    return UploadFile(io.BytesIO(data), size=len(data) if known_size else None, filename=filename)
+
+
+def test_reads_once_with_hash():
+    """Testează conținutul, dimensiunea și SHA-256 calculat la citire"""
+    print("=" * 60)
+    print("TEST 1: Citire în bucăți + hash")
+    print("=" * 60)
+
+    data = bytes(range(256)) * 4000  # ~1 MB, mai multe bucăți
+    upload = asyncio.run(read_upload(make_upload(data)))
+
+    assert upload.content == data
+    assert upload.size == len(data)
+    assert upload.sha256 == hashlib.sha256(data).hexdigest()
+    assert upload.filename == "buletin.jpg"
+    assert upload.content_type == "application/octet-stream"
+
+
+def test_small_chunks(monkeypatch):
+    """Testează că un fișier citit în multe bucăți mici rămâne identic"""
+    print("\n" + "=" * 60)
+    print("TEST 2: Bucăți mici")
+    print("=" * 60)
+
+    monkeypatch.setattr(upload_reader, "UPLOAD_READ_CHUNK_SIZE", 100)
+    data = b"plan cadastral " * 1000
+    upload = asyncio.run(read_upload(make_upload(data)))
+    assert upload.content == data
+    assert type(upload.content) is bytes
+
+
+def test_file_limit():
+    """Testează limita per fișier, și când dimensiunea nu e cunoscută dinainte"""
+    print("\n" + "=" * 60)
+    print("TEST 3: Limita per fișier")
+    print("=" * 60)
+
+    for known_size in (True, False):
+        with pytest.raises(HTTPException) as exc:
+            asyncio.run(read_upload(make_upload(b"x" * 2000, known_size=known_size), max_file_bytes=1000))
+        assert exc.value.status_code == 413
+        assert "buletin.jpg" in exc.value.detail
+
+
+def test_request_limit():
+    """Testează limita pe tot request-ul"""
+    print("\n" + "=" * 60)
+    print("TEST 4: Limita per request")
+    print("=" * 60)
+
+    files = [make_upload(b"a" * 600, "a.jpg"), make_upload(b"b" * 600, "b.jpg")]
+    uploads = asyncio.run(read_uploads(files[:1], max_file_bytes=1000, max_request_bytes=1000))
+    assert [u.size for u in uploads] == [600]
+
+    files = [make_upload(b"a" * 600, "a.jpg"), make_upload(b"b" * 600, "b.jpg", known_size=False)]
+    with pytest.raises(HTTPException) as exc:
+        asyncio.run(read_uploads(files, max_file_bytes=1000, max_request_bytes=1000))
+    assert exc.value.status_code == 413
+
+
+if __name__ == "__main__":
+    print("\n📤 TESTARE CITIRE UPLOAD\n")
+
+    test_reads_once_with_hash()
+    mp = pytest.MonkeyPatch()
+    test_small_chunks(mp)
+    mp.undo()
+    test_file_limit()
+    test_request_limit()
+
+    print("\n" + "=" * 60)
+    print("✅ TOATE TESTELE AU FOST RULATE")
+    print("=" * 60)
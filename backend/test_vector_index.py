@@ -0,0 +1,118 @@
+"""
+Test pentru indexul vectorial local (matrice memmap + căutare top-k)
+"""
+
+import json
+import tempfile
+from pathlib import Path
+
+import numpy as np
+
+from app.services.vector_index import VectorIndex, build_vector_index
+
+
+# Vectori fixi: fiecare text are direcția lui
+VECTORS = {
+    "urbanism": [1.0, 0.0, 0.0],
+    "constructii": [0.8, 0.6, 0.0],
+    "taxe": [0.0, 0.0, 2.0],
+}
+CHUNKS = [("c1", "urbanism"), ("c2", "constructii"), ("c3", "taxe")]
+
+
+def make_embedder(calls):
+    def embed_batch(texts):
+        calls.extend(texts)
+        return [VECTORS[t] for t in texts]
+    return embed_batch
+
+
+def build(tmp: str, chunks=CHUNKS, calls=None):
+    paths = {"path": Path(tmp) / "embeddings.f32", "meta_path": Path(tmp) / "embeddings_meta.json"}
+    result = build_vector_index(chunks, make_embedder(calls if calls is not None else []), batch_size=2, **paths)
+    return result, paths
+
+
+def test_build_and_search():
+    """Testează ordinea rezultatelor și k mai mare decât numărul de vectori"""
+    print("=" * 60)
+    print("TEST 1: Construire + căutare top-k")
+    print("=" * 60)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        result, paths = build(tmp)
+        assert result == {"rows": 3, "embedded": 3, "reused": 0}
+
+        index = VectorIndex.load(**paths)
+        assert isinstance(index.matrix, np.memmap)
+        assert len(index) == 3
+
+        hits = index.search([1.0, 0.1, 0.0], max_results=2)
+        assert [chunk_id for _, chunk_id in hits] == ["c1", "c2"]
+        assert hits[0][0] > hits[1][0]
+
+        # Vectorii sunt normalizați: scorul e cosinusul, nu depinde de lungime
+        assert abs(index.search([0.0, 0.0, 5.0], max_results=1)[0][0] - 1.0) < 1e-6
+
+        all_hits = index.search([1.0, 0.1, 0.0], max_results=10)
+        assert [chunk_id for _, chunk_id in all_hits] == ["c1", "c2", "c3"]
+        assert index.search([0.0, 0.0, 0.0]) == []
+
+
+def test_incremental_rebuild():
+    """Testează că doar chunk-urile noi sau schimbate sunt trimise la API"""
+    print("\n" + "=" * 60)
+    print("TEST 2: Reconstruire incrementală")
+    print("=" * 60)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        build(tmp)
+        calls = []
+        result, paths = build(tmp, [("c1", "urbanism"), ("c2", "taxe"), ("c4", "constructii")], calls)
+
+        print(f"  → {result}")
+        assert result == {"rows": 3, "embedded": 2, "reused": 1}
+        assert calls == ["taxe", "constructii"]
+        # c2 are acum textul "taxe", deci vectorul lui s-a schimbat
+        hits = VectorIndex.load(**paths).search([0.0, 0.0, 1.0], max_results=1)
+        assert hits[0][1] == "c2"
+
+
+def test_stale_index_rejected_and_rebuilt():
+    """Testează că un index scris cu alt model sau trunchiat nu e folosit"""
+    print("\n" + "=" * 60)
+    print("TEST 3: Index vechi")
+    print("=" * 60)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        _, paths = build(tmp)
+
+        # Matrice trunchiată (scriere întreruptă)
+        data = paths["path"].read_bytes()
+        paths["path"].write_bytes(data[:-4])
+        assert VectorIndex.load(**paths) is None
+        paths["path"].write_bytes(data)
+        assert VectorIndex.load(**paths) is not None
+
+        # Alt model de embedding: vectorii vechi nu sunt refolosiți
+        meta = json.loads(paths["meta_path"].read_text(encoding="utf-8"))
+        meta["model"] = "alt-model"
+        paths["meta_path"].write_text(json.dumps(meta), encoding="utf-8")
+        assert VectorIndex.load(**paths) is None
+
+        calls = []
+        result, _ = build(tmp, calls=calls)
+        assert result["embedded"] == 3
+        assert VectorIndex.load(**paths) is not None
+
+
+if __name__ == "__main__":
+    print("\n🧭 TESTARE INDEX VECTORIAL\n")
+
+    test_build_and_search()
+    test_incremental_rebuild()
+    test_stale_index_rejected_and_rebuilt()
+
+    print("\n" + "=" * 60)
+    print("✅ TOATE TESTELE AU FOST RULATE")
+    print("=" * 60)
@@ -0,0 +1,149 @@
+"""
+Test pentru scraper-ul async (limite per host, revalidare condiționată)
+"""
+
+import asyncio
+import threading
+import time
+
+import httpx
+
+from app.services import web_scraper
+from app.services.web_cache import WebContentCache
+from app.services.web_scraper import HostRateLimiter, fetch_urls_conditional_async
+
+
+PAGE = b"<html><body><nav>Meniu</nav><p>Certificat de urbanism: cerere, plan.</p></body></html>"
+
+
+def run_with_transport(handler, coro_fn):
+    """Rulează coro_fn cu clientul partajat înlocuit de unul cu MockTransport."""
+    async def run():
+        web_scraper._async_client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+        try:
+            return await coro_fn()
+        finally:
+            await web_scraper.close_async_client()
+
+    return asyncio.run(run())
+
+
+def test_per_host_limits():
+    """Testează concurența și intervalul minim per host"""
+    print("=" * 60)
+    print("TEST 1: Limite per host")
+    print("=" * 60)
+
+    in_flight, peak, starts = {}, {}, {}
+
+    async def handler(request):
+        host = request.url.host
+        starts.setdefault(host, []).append(time.monotonic())
+        in_flight[host] = in_flight.get(host, 0) + 1
+        peak[host] = max(peak.get(host, 0), in_flight[host])
+        await asyncio.sleep(0.1)
+        in_flight[host] -= 1
+        return httpx.Response(200, content=PAGE)
+
+    pages = {f"https://www.primariatm.ro/p{i}": (None, None) for i in range(6)}
+    pages.update({f"https://www.anaf.ro/p{i}": (None, None) for i in range(2)})
+    limiter = HostRateLimiter(per_host_concurrency=2, min_interval=0.03)
+    results = run_with_transport(
+        handler, lambda: fetch_urls_conditional_async(pages, rate_limiter=limiter, deadline=5)
+    )
+
+    gaps = [b - a for a, b in zip(starts["www.primariatm.ro"], starts["www.primariatm.ro"][1:])]
+    print(f"  → maxim simultan: {peak}, pauza minimă: {min(gaps) * 1000:.0f} ms")
+    assert all(r and "Certificat de urbanism" in r["text"] for r in results.values())
+    assert peak["www.primariatm.ro"] == 2
+    assert min(gaps) >= 0.025
+    # Hosturile diferite nu se așteaptă unul pe altul
+    assert starts["www.anaf.ro"][0] < starts["www.primariatm.ro"][1]
+
+
+def test_cancelled_wait_releases_slot():
+    """Testează că o cerere anulată cât aștepta intervalul nu blochează hostul"""
+    print("\n" + "=" * 60)
+    print("TEST 2: Anulare în timpul așteptării")
+    print("=" * 60)
+
+    async def run():
+        limiter = HostRateLimiter(per_host_concurrency=2, min_interval=10)
+        await limiter.acquire("h")
+        waiting = asyncio.ensure_future(limiter.acquire("h"))
+        await asyncio.sleep(0.01)
+        waiting.cancel()
+        await asyncio.gather(waiting, return_exceptions=True)
+        # Doar primul acquire mai ține un loc
+        assert not limiter._semaphores["h"].locked()
+        limiter.release("h")
+        assert limiter._semaphores["h"]._value == 2
+
+    asyncio.run(run())
+
+
+def test_not_modified():
+    """Testează revalidarea condiționată (304 Not Modified)"""
+    print("\n" + "=" * 60)
+    print("TEST 3: 304 Not Modified")
+    print("=" * 60)
+
+    async def handler(request):
+        if request.headers.get("If-None-Match") == '"v1"':
+            return httpx.Response(304)
+        return httpx.Response(200, content=PAGE, headers={"ETag": '"v1"', "Last-Modified": "Mon, 01 Jan 2024 00:00:00 GMT"})
+
+    url = "https://www.primariatm.ro/urbanism"
+    first = run_with_transport(handler, lambda: fetch_urls_conditional_async({url: (None, None)}))[url]
+    assert first["not_modified"] is False
+    assert first["etag"] == '"v1"'
+    assert "Meniu" not in first["text"]
+
+    second = run_with_transport(
+        handler, lambda: fetch_urls_conditional_async({url: (first["etag"], first["last_modified"])})
+    )[url]
+    assert second == {
+        "not_modified": True, "text": None, "etag": '"v1"', "last_modified": "Mon, 01 Jan 2024 00:00:00 GMT",
+    }
+
+
+def test_refresher_rebuilds_index_on_change():
+    """Testează că refresher-ul cere reconstruirea indexului doar când se schimbă conținutul"""
+    print("\n" + "=" * 60)
+    print("TEST 4: Refresher + index de căutare")
+    print("=" * 60)
+
+    async def handler(request):
+        return httpx.Response(200, content=PAGE)
+
+    cache = WebContentCache(["https://www.primariatm.ro/urbanism"], default_ttl=3600)
+    calls = []
+
+    def on_change():
+        calls.append((threading.get_ident(), cache.get_chunks()))
+
+    async def run():
+        task = asyncio.create_task(cache.run_refresher(check_interval=0.01, on_change=on_change))
+        await asyncio.sleep(0.2)  # mai multe verificări, un singur fetch (TTL 1h)
+        task.cancel()
+        await asyncio.gather(task, return_exceptions=True)
+
+    run_with_transport(handler, run)
+
+    assert len(calls) == 1
+    thread_id, chunks = calls[0]
+    assert thread_id != threading.get_ident()  # nu pe event loop
+    assert chunks and "Certificat de urbanism" in chunks[0]
+
+
+if __name__ == "__main__":
+    print("\n🌐 TESTARE WEB SCRAPER ASYNC\n")
+
+    test_per_host_limits()
+    test_cancelled_wait_releases_slot()
+    test_not_modified()
+    test_refresher_rebuilds_index_on_change()
+
+    print("\n" + "=" * 60)
+    print("✅ TOATE TESTELE AU FOST RULATE")
+    print("=" * 60)
@@ -1,66 +1,141 @@
 import os
-from datetime import datetime
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from app.services.supabase_client import supabase  # Clientul tău Supabase
-from app.services.prioritization import Application, prioritize_applications # Logica ta de prioritizare
+from app.services.prioritization import (  # Logica ta de prioritizare
+    application_from_row,
+    applications_to_columns,
+    score_priorities_batch,
+)
 from app.core.config import SUPABASE_URL # Asigură-te că .env e încărcat
 
-def _parse_iso(dt_str: str) -> datetime:
-    if dt_str is None:
-        return None
-    return datetime.fromisoformat(dt_str.replace("Z", "+00:00"))
+# Doar coloanele necesare (user_id și request_type sunt NOT NULL, deci trebuie
+# trimise și la upsert, altfel INSERT ... ON CONFLICT eșuează)
+PRIORITY_SELECT = "id, user_id, request_type, status, created_at, legal_deadline, priority"
+ACTIVE_STATUSES = ["pending_validation", "in_review"]
+
+PAGE_SIZE = int(os.getenv("PRIORITY_PAGE_SIZE", "1000"))      # rânduri per pagină la citire
+BATCH_SIZE = int(os.getenv("PRIORITY_BATCH_SIZE", "500"))     # rânduri per upsert
+WORKERS = int(os.getenv("PRIORITY_WORKERS", "4"))             # upsert-uri în paralel
+MAX_RETRIES = int(os.getenv("PRIORITY_MAX_RETRIES", "3"))
+
+
+def fetch_active_requests() -> list:
+    """
+    Citește cererile active pagină cu pagină (keyset pagination după id),
+    deci fiecare query rămâne rapid oricât de mare ar fi tabela.
+    """
+    rows = []
+    last_id = None
+    while True:
+        query = (
+            supabase.table("requests")
+            .select(PRIORITY_SELECT)
+            .in_("status", ACTIVE_STATUSES)
+            .order("id")
+            .limit(PAGE_SIZE)
+        )
+        if last_id is not None:
+            query = query.gt("id", last_id)
+        page = query.execute().data or []
+        rows.extend(page)
+        if len(page) < PAGE_SIZE:
+            return rows
+        last_id = page[-1]["id"]
+
+
+def upsert_batch(batch: list) -> int:
+    """Trimite un batch de actualizări, cu reîncercări și backoff exponențial."""
+    for attempt in range(MAX_RETRIES + 1):
+        try:
+            supabase.table("requests").upsert(batch).execute()
+            return len(batch)
+        except Exception as e:
+            if attempt == MAX_RETRIES:
+                raise
+            delay = 2 ** attempt
+            print(f"⚠️ Upsert eșuat ({e}), reîncerc în {delay}s...")
+            time.sleep(delay)
+
 
 def run_priority_update():
     print("Încep actualizarea priorităților...")
-    
+    start = time.perf_counter()
+
     try:
-        # 1. Preia toate cererile active (nefinalizate)
-        res = supabase.table("requests").select("*").in_("status", ["pending_validation", "in_review"]).execute()
-        
-        if not res.data:
+        # 1. Preia toate cererile active (nefinalizate), paginat
+        rows = fetch_active_requests()
+
+        if not rows:
             print("Nu există cereri active de prioritizat.")
             return
 
-        print(f"Am găsit {len(res.data)} cereri active.")
-        
-        # 2. Mapează datele la obiectele 'Application'
-        apps: list[Application] = []
-        for r in res.data:
-            submitted_at = _parse_iso(r["created_at"]) # Folosim created_at sau submitted_at
-            legal_due = _parse_iso(r["legal_deadline"]) if r.get("legal_deadline") else None
-            
-            apps.append(
-                Application(
-                    id=str(r["id"]),
-                    flow_type=r.get("request_type", "altele"),
-                    submitted_at=submitted_at,
-                    legal_due_date=legal_due,
-                    status=r.get("status", "pending_validation"),
-                )
-            )
-
-        # 3. Calculează prioritățile folosind logica ta existentă
-        prioritized_list = prioritize_applications(apps)
-        
-        # 4. Pregătește datele pentru actualizare
+        fetch_elapsed = time.perf_counter() - start
+        print(f"Am găsit {len(rows)} cereri active ({len(rows) / max(fetch_elapsed, 1e-9):.0f} rânduri/s).")
+
+        # 2. Mapează datele la obiectele 'Application' și apoi la coloane NumPy
+        apps = [application_from_row(r, default_flow_type="altele") for r in rows]
+        columns = applications_to_columns(apps)
+
+        # 3. Calculează prioritățile vectorizat (aceeași logică ca prioritize_applications)
+        scores = score_priorities_batch(
+            columns["submitted_us"],
+            columns["legal_due_us"],
+            columns["flow_codes"],
+            columns["flow_types"],
+        )
+
+        # 4. Pregătește doar actualizările pentru scorurile care s-au schimbat
+        # (în ordinea priorității, ca cele urgente să fie scrise primele)
+        priority_scores = scores["priority_score"].tolist()
         updates = []
-        for item in prioritized_list:
+        for i in scores["order"].tolist():
+            r = rows[i]
+            if r.get("priority") == priority_scores[i]:
+                continue
             updates.append({
-                "id": item["id"],
-                "priority": item["priority_score"] # Salvează scorul în coloana 'priority'
+                "id": r["id"],
+                "user_id": r["user_id"],
+                "request_type": r["request_type"],
+                "priority": priority_scores[i] # Salvează scorul în coloana 'priority'
             })
-            
+
         if not updates:
             print("Nicio actualizare de prioritate necesară.")
             return
 
-        # 5. Actualizează toate cererile în Supabase
-        print(f"Actualizez {len(updates)} cereri...")
-        supabase.table("requests").upsert(updates).execute()
-        
-        print("✅ Actualizarea priorităților a fost finalizată cu succes!")
+        # 5. Actualizează cererile în Supabase, în batch-uri trimise în paralel
+        batches = [updates[i:i + BATCH_SIZE] for i in range(0, len(updates), BATCH_SIZE)]
+        print(
+            f"Actualizez {len(updates)} cereri ({len(rows) - len(updates)} neschimbate) "
+            f"în {len(batches)} batch-uri..."
+        )
+        upsert_start = time.perf_counter()
+        written = 0
+        failed = 0
+        with ThreadPoolExecutor(max_workers=WORKERS) as pool:
+            futures = [pool.submit(upsert_batch, batch) for batch in batches]
+            for future in as_completed(futures):
+                try:
+                    written += future.result()
+                except Exception as e:
+                    failed += 1
+                    print(f"❌ Batch eșuat definitiv: {e}")
+        upsert_elapsed = time.perf_counter() - upsert_start
+
+        total_elapsed = time.perf_counter() - start
+        print(
+            f"Scrise {written} rânduri în {upsert_elapsed:.2f}s "
+            f"({written / max(upsert_elapsed, 1e-9):.0f} rânduri/s); "
+            f"total {total_elapsed:.2f}s ({len(rows) / max(total_elapsed, 1e-9):.0f} rânduri/s)"
+        )
+        if failed:
+            print(f"❌ {failed} batch-uri nu au putut fi scrise.")
+        else:
+            print("✅ Actualizarea priorităților a fost finalizată cu succes!")
 
     except Exception as e:
         print(f"❌ Eroare la actualizarea priorităților: {e}")
 
 if __name__ == "__main__":
-    run_priority_update()
\ No newline at end of file
+    run_priority_update()
@@ -0,0 +1,19 @@
+-- ================================================
+-- Add structured metadata to chat_messages
+-- ================================================
+-- Contextul conversației (domeniul detectat, procedura selectată) se
+-- salvează pe mesajul asistentului, în loc de mesaje separate de tip
+-- "[SYSTEM] CONTEXT: Domain detected = ..."
+
+ALTER TABLE public.chat_messages
+ADD COLUMN IF NOT EXISTS metadata JSONB;
+
+-- Index pentru istoricul recent al unui utilizator (ultimele N mesaje)
+CREATE INDEX IF NOT EXISTS idx_chat_messages_user_created
+    ON public.chat_messages(user_id, created_at DESC);
+
+-- Comentariu
+COMMENT ON COLUMN public.chat_messages.metadata IS 'Context conversație: {"detected_domain": ..., "procedure": ...}';
+
+-- Mesajele vechi cu markerul [SYSTEM] sunt încă recunoscute de backend
+-- (conversation_state.state_from_rows), deci nu trebuie migrate.
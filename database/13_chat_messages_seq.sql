@@ -0,0 +1,40 @@
+-- ================================================
+-- Ordinea mesajelor din chat_messages: coloană identity
+-- ================================================
+-- created_at nu e o ordine sigură: backend-ul punea timestamp-urile din
+-- ceasul aplicației (diferit între workeri), restul rândurilor primesc now()
+-- din baza de date, iar toate mesajele unei ture inserate în același batch
+-- au același now(). seq este atribuit de Postgres, crescător, în ordinea în
+-- care rândurile sunt inserate (inclusiv în același INSERT cu mai multe rânduri).
+
+ALTER TABLE public.chat_messages
+ADD COLUMN IF NOT EXISTS seq BIGINT GENERATED BY DEFAULT AS IDENTITY;
+
+-- Rândurile existente primesc seq la adăugarea coloanei, în ordinea fizică
+-- din tabel; le renumerotăm după created_at ca istoricul vechi să rămână
+-- în ordinea în care a fost afișat până acum.
+WITH ordered AS (
+    SELECT id, row_number() OVER (ORDER BY created_at, seq) AS rn
+    FROM public.chat_messages
+)
+UPDATE public.chat_messages m
+SET seq = ordered.rn
+FROM ordered
+WHERE m.id = ordered.id;
+
+-- Următoarele valori continuă după cele existente
+SELECT setval(
+    pg_get_serial_sequence('public.chat_messages', 'seq'),
+    COALESCE((SELECT max(seq) FROM public.chat_messages), 0) + 1,
+    false
+);
+
+-- Index pentru istoricul recent al unui utilizator (ultimele N mesaje)
+CREATE INDEX IF NOT EXISTS idx_chat_messages_user_seq
+    ON public.chat_messages(user_id, seq DESC);
+
+-- Indexul din 12_chat_messages_metadata.sql nu mai e folosit de nicio
+-- interogare (istoricul nu se mai sortează după created_at)
+DROP INDEX IF EXISTS public.idx_chat_messages_user_created;
+
+COMMENT ON COLUMN public.chat_messages.seq IS 'Ordinea mesajelor (atribuită de baza de date); istoricul se sortează după seq, nu după created_at';
@@ -46,7 +46,7 @@ export default function ChatPage() {
               .from('chat_messages')
               .select('*')
               .eq('user_id', session.user.id)
-              .order('created_at', { ascending: true })
+              .order('seq', { ascending: true })
               .limit(50);
 
             if (isMounted && messagesData) {
@@ -44,7 +44,7 @@ export class ChatService {
       .from('chat_messages')
       .select('*')
       .eq('user_id', user.id)
-      .order('created_at', { ascending: true })
+      .order('seq', { ascending: true })
 
     if (error) {
       console.error('Error loading messages:', error)
@@ -101,7 +101,7 @@ export class ChatService {
       .select('*')
       .eq('user_id', user.id)
       .eq('request_id', requestId)
-      .order('created_at', { ascending: true })
+      .order('seq', { ascending: true })
 
     if (error) {
       console.error('Error loading request messages:', error)